@@ -0,0 +1,325 @@
+import abc
+import random
+from typing import List, Optional, Tuple
+
+from battleship import const
+from battleship.battleship import Battleship, MoveResult
+from battleship.placement import Fleet, get_placements
+from battleship.pool import FleetPool
+from battleship.posterior import hit_probabilities
+
+
+class Shooter(abc.ABC):
+    """Стратегия стрельбы.
+
+    Стратегия получает поле соперника в том виде, в котором его видит
+    игрок: на нём отмечены только результаты уже сделанных выстрелов.
+    Поле обновляется до вызова `record_shot`.
+    """
+
+    def __init__(
+        self,
+        enemy_battleship: Battleship,
+        rng: random.Random,
+        fleet: Optional[Fleet] = None,
+    ):
+        self.enemy_battleship = enemy_battleship
+        self.rng = rng
+        self.fleet = const.DEFAULT_FLEET if fleet is None else fleet
+
+    @abc.abstractmethod
+    def next_shot(self) -> Tuple[int, int]:
+        """Выбор клетки для следующего выстрела."""
+
+    def record_shot(self, cell_x: int, cell_y: int, move_result: MoveResult):
+        """Учёт результата выстрела."""
+
+
+class RandomShooter(Shooter):
+    """Стрельба по случайным клеткам, в которые ещё не стреляли."""
+
+    def __init__(
+        self,
+        enemy_battleship: Battleship,
+        rng: random.Random,
+        fleet: Optional[Fleet] = None,
+    ):
+        super().__init__(enemy_battleship, rng, fleet)
+        self._cells = [
+            (x, y)
+            for y in range(enemy_battleship.height)
+            for x in range(enemy_battleship.width)
+        ]
+        rng.shuffle(self._cells)
+
+    def next_shot(self) -> Tuple[int, int]:
+        return self._cells[-1]
+
+    def record_shot(self, cell_x: int, cell_y: int, move_result: MoveResult):
+        # выстрел мог быть сделан не в предложенную клетку
+        cell = (cell_x, cell_y)
+        if self._cells and self._cells[-1] == cell:
+            self._cells.pop()
+        elif cell in self._cells:
+            self._cells.remove(cell)
+
+
+class DensityShooter(Shooter):
+    """Стрельба по карте плотности положений кораблей.
+
+    Плотность клетки - это количество допустимых положений оставшихся
+    кораблей, покрывающих клетку. Положение недопустимо, если задевает
+    промах, потопленный корабль или его соседние клетки, либо клетку по
+    диагонали от попадания (там корабля быть не может).
+
+    Пока есть подбитые, но не потопленные корабли, стрельба ведётся только
+    по клеткам положений, проходящих через попадания ("добивание"),
+    иначе - по клетке с наибольшей плотностью ("охота").
+
+    Карта плотности обновляется инкрементально: закрытие клетки вычитает
+    из карты только положения, проходящие через эту клетку.
+    """
+
+    def __init__(
+        self,
+        enemy_battleship: Battleship,
+        rng: random.Random,
+        fleet: Optional[Fleet] = None,
+    ):
+        super().__init__(enemy_battleship, rng, fleet)
+        self.width = enemy_battleship.width
+        self.height = enemy_battleship.height
+
+        self._remaining = dict(self.fleet)
+        self._placements = {}
+        self._valid = {}
+        self._covering = [[] for _ in range(self.width * self.height)]
+        self.density = [0] * (self.width * self.height)
+
+        for ship_length in self._remaining:
+            placements = [
+                _points_to_cells(self.width, *points)
+                for points in get_placements(
+                    self.width, self.height, ship_length
+                )
+            ]
+            self._placements[ship_length] = placements
+            self._valid[ship_length] = [True] * len(placements)
+            for (i, cells) in enumerate(placements):
+                for cell in cells:
+                    self._covering[cell].append((ship_length, i))
+                    self.density[cell] += self._remaining[ship_length]
+
+        self._blocked = [False] * (self.width * self.height)
+        self._shot = [False] * (self.width * self.height)
+        self._hits = set()
+
+    def next_shot(self) -> Tuple[int, int]:
+        scores = self._target_scores() if self._hits else self.density
+
+        best_score = -1
+        best_cells = []
+        for (cell, score) in enumerate(scores):
+            if self._shot[cell] or score < best_score:
+                continue
+            if score > best_score:
+                best_score = score
+                best_cells = []
+            best_cells.append(cell)
+
+        cell = self.rng.choice(best_cells)
+        return cell % self.width, cell // self.width
+
+    def record_shot(self, cell_x: int, cell_y: int, move_result: MoveResult):
+        cell = cell_y*self.width + cell_x
+        self._shot[cell] = True
+
+        if move_result == MoveResult.MISS:
+            self._block(cell)
+        elif move_result == MoveResult.DAMAGED:
+            self._hits.add(cell)
+            for (x, y) in _diagonal_neighbours(cell_x, cell_y):
+                if 0 <= x < self.width and 0 <= y < self.height:
+                    self._block(y*self.width + x)
+        elif move_result == MoveResult.DESTROYED:
+            ship_points = list(
+                self.enemy_battleship.get_ship_points(cell_x, cell_y)
+            )
+            for (x, y) in ship_points:
+                self._hits.discard(y*self.width + x)
+                for (i, j) in _neighbourhood(x, y):
+                    if 0 <= i < self.width and 0 <= j < self.height:
+                        self._block(j*self.width + i)
+            self._sink(len(ship_points))
+
+    def _block(self, cell: int):
+        """Закрытие клетки: ни одно положение корабля её не покрывает."""
+        if self._blocked[cell]:
+            return
+        self._blocked[cell] = True
+
+        for (ship_length, i) in self._covering[cell]:
+            valid = self._valid[ship_length]
+            if valid[i]:
+                valid[i] = False
+                weight = self._remaining[ship_length]
+                for covered in self._placements[ship_length][i]:
+                    self.density[covered] -= weight
+
+    def _sink(self, ship_length: int):
+        """Учёт потопления корабля заданной длины."""
+        if not self._remaining.get(ship_length):
+            return
+        self._remaining[ship_length] -= 1
+
+        valid = self._valid[ship_length]
+        for (i, cells) in enumerate(self._placements[ship_length]):
+            if valid[i]:
+                for cell in cells:
+                    self.density[cell] -= 1
+
+    def _target_scores(self) -> List[int]:
+        """Оценка клеток для добивания подбитых кораблей.
+
+        Клетка получает вес каждого допустимого положения, проходящего
+        через неё и через попадание; положение, проходящее через
+        несколько попаданий, учитывается несколько раз.
+        """
+        scores = [0] * (self.width * self.height)
+        for hit in self._hits:
+            for (ship_length, i) in self._covering[hit]:
+                if not self._valid[ship_length][i]:
+                    continue
+                weight = self._remaining[ship_length]
+                for cell in self._placements[ship_length][i]:
+                    scores[cell] += weight
+        return scores
+
+
+class PosteriorShooter(Shooter):
+    """Стрельба по клетке с наибольшей апостериорной вероятностью корабля.
+
+    Вероятности оцениваются по случайным расстановкам оставшихся кораблей,
+    согласным со всеми результатами выстрелов (см. `battleship.posterior`).
+    """
+
+    # количество расстановок для оценки вероятностей на каждом ходу
+    samples = 200
+
+    def __init__(
+        self,
+        enemy_battleship: Battleship,
+        rng: random.Random,
+        fleet: Optional[Fleet] = None,
+    ):
+        super().__init__(enemy_battleship, rng, fleet)
+        self.width = enemy_battleship.width
+        self._shot = [False] * (self.width * enemy_battleship.height)
+
+    def next_shot(self) -> Tuple[int, int]:
+        probabilities = hit_probabilities(
+            self.enemy_battleship.field,
+            self.fleet,
+            samples=self.samples,
+            seed=self.rng.randrange(2**32),
+            workers=1,
+        )
+        best_cells = []
+        best_probability = -1.0
+        for (cell, probability) in enumerate(probabilities):
+            if self._shot[cell] or probability < best_probability:
+                continue
+            if probability > best_probability:
+                best_probability = probability
+                best_cells = []
+            best_cells.append(cell)
+
+        cell = self.rng.choice(best_cells)
+        return cell % self.width, cell // self.width
+
+    def record_shot(self, cell_x: int, cell_y: int, move_result: MoveResult):
+        self._shot[cell_y*self.width + cell_x] = True
+
+
+SHOOTERS = {
+    "random": RandomShooter,
+    "density": DensityShooter,
+    "posterior": PosteriorShooter,
+}
+
+
+class BotCommander:
+    """Командир-компьютер.
+
+    Предоставляет те же методы, что и `Commander`, но вместо другой
+    стороны по сети играет соперник-компьютер в текущем процессе.
+    Если задан пул `pool`, расстановка кораблей компьютера берётся из
+    него, и начало игры не ждёт расстановки.
+    """
+
+    def __init__(
+        self,
+        width: int = 10,
+        height: int = 10,
+        fleet: Optional[Fleet] = None,
+        shooter_class: type = DensityShooter,
+        pool: Optional[FleetPool] = None,
+    ):
+        rng = random.Random()
+        self.our_battleship = Battleship(width, height)
+        if pool is not None:
+            self.our_battleship.adopt_ships(pool.get(width, height, fleet))
+        else:
+            self.our_battleship.place_ships(fleet, rng)
+        self.enemy_battleship = Battleship(width, height)
+        self.shooter = shooter_class(self.enemy_battleship, rng, fleet)
+
+        self._move_result = None
+        self._shot = None
+
+    def send_coords(self, cell_x: int, cell_y: int):
+        """Выстрел игрока по полю компьютера."""
+        self._move_result = self.our_battleship.hit_cell(cell_x, cell_y)
+
+    def receive_move_result(self) -> MoveResult:
+        """Получение результата выстрела игрока."""
+        return self._move_result
+
+    def receive_coords(self) -> Tuple[int, int]:
+        """Получение координат выстрела компьютера."""
+        self._shot = self.shooter.next_shot()
+        return self._shot
+
+    def send_move_result(self, move_result: MoveResult):
+        """Передача компьютеру результата его выстрела."""
+        cell_x, cell_y = self._shot
+        self.enemy_battleship.update_cell(cell_x, cell_y, move_result)
+        self.shooter.record_shot(cell_x, cell_y, move_result)
+
+    def peer_forfeited(self) -> bool:
+        """Компьютер всегда делает ход."""
+        return False
+
+    def close(self):
+        """Завершение игры с компьютером."""
+
+
+def _points_to_cells(
+    width: int, x0: int, y0: int, x1: int, y1: int
+) -> Tuple[int, ...]:
+    """Получение номеров клеток корабля по его границам."""
+    return tuple(
+        y*width + x
+        for y in range(y0, y1+1)
+        for x in range(x0, x1+1)
+    )
+
+
+def _diagonal_neighbours(x: int, y: int) -> List[Tuple[int, int]]:
+    """Клетки по диагонали от заданной."""
+    return [(x-1, y-1), (x+1, y-1), (x-1, y+1), (x+1, y+1)]
+
+
+def _neighbourhood(x: int, y: int) -> List[Tuple[int, int]]:
+    """Заданная клетка вместе со всеми соседними."""
+    return [(x+dx, y+dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
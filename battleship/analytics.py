@@ -0,0 +1,350 @@
+"""Статистика по клеткам поля для множества игр.
+
+Игры берутся из записей (см. `battleship.record`) или проводятся
+движком (см. `battleship.selfplay`), а статистика копится в массивах
+NumPy по всем клеткам сразу, без повторного проигрывания игр:
+
+- частота кораблей в клетке после `place_ships`;
+- средний номер выстрела, которым в клетку впервые попали;
+- среднее количество выстрелов от первого попадания в корабль до его
+  потопления, по длинам кораблей;
+- доли промахов, повреждений и потоплений выстрелов в клетку.
+
+Игры обрабатываются частями в пуле процессов, поэтому расход памяти не
+зависит от количества игр.
+"""
+
+import argparse
+import itertools as it
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    Union,
+)
+
+import numpy as np
+
+from battleship.ai import SHOOTERS, Shooter
+from battleship.battleship import MoveResult
+from battleship.placement import Fleet, ShipPoints
+from battleship.record import GameLog, GameRecord, iter_record_paths
+from battleship.selfplay import play_match
+
+
+# столбец счётчика результатов выстрела по значению `MoveResult`:
+# промах, повреждение и потопление (победный выстрел тоже топит корабль)
+RESULT_COLUMNS = np.zeros(max(MoveResult) + 1, dtype=np.intp)
+RESULT_COLUMNS[MoveResult.DAMAGED] = 1
+RESULT_COLUMNS[MoveResult.DESTROYED] = 2
+RESULT_COLUMNS[MoveResult.WIN] = 2
+
+Game = Union[GameRecord, GameLog]
+
+
+class FieldStats:
+    """Статистика игр по клеткам поля.
+
+    Все счётчики - массивы формы `(height, width)`, кроме `results`
+    формы `(height, width, 3)` и счётчиков потоплений, индексируемых
+    длиной корабля. Номера выстрелов считаются для каждого игрока
+    отдельно, начиная с единицы.
+    """
+
+    def __init__(self, width: int = 10, height: int = 10):
+        self.width = width
+        self.height = height
+        self.games = 0
+        self.fleets = 0
+
+        self.occupancy = np.zeros((height, width), dtype=np.int64)
+        self.first_hit_sum = np.zeros((height, width), dtype=np.int64)
+        self.first_hit_count = np.zeros((height, width), dtype=np.int64)
+        self.results = np.zeros((height, width, 3), dtype=np.int64)
+
+        max_length = max(width, height) + 1
+        self.sink_shots = np.zeros(max_length, dtype=np.int64)
+        self.sink_count = np.zeros(max_length, dtype=np.int64)
+
+    def add(self, game: Game):
+        """Учёт игры."""
+        if (game.width, game.height) != (self.width, self.height):
+            raise ValueError(
+                f"Игра на поле {game.width}x{game.height}, "
+                f"а статистика - для поля {self.width}x{self.height}."
+            )
+
+        turns = np.array(list(game.iter_turns()), dtype=np.intp)
+        turns = turns.reshape(-1, 4)
+        self.games += 1
+        for player in (0, 1):
+            self._add_shots(
+                turns[turns[:, 0] == player, 1:], game.fleets[1 - player]
+            )
+
+    def merge(self, other: "FieldStats"):
+        """Объединение со статистикой других игр."""
+        self.games += other.games
+        self.fleets += other.fleets
+        for name in (
+            "occupancy", "first_hit_sum", "first_hit_count", "results",
+            "sink_shots", "sink_count",
+        ):
+            getattr(self, name)[...] += getattr(other, name)
+
+    @property
+    def occupancy_frequency(self) -> np.ndarray:
+        """Доля расстановок, в которых клетка занята кораблём."""
+        return self.occupancy / max(self.fleets, 1)
+
+    @property
+    def first_hit_turn(self) -> np.ndarray:
+        """Средний номер выстрела, попавшего в клетку (NaN - попаданий нет)."""
+        return _mean(self.first_hit_sum, self.first_hit_count)
+
+    @property
+    def result_rates(self) -> np.ndarray:
+        """Доли промахов, повреждений и потоплений выстрелов в клетку."""
+        return _mean(self.results, self.results.sum(axis=2, keepdims=True))
+
+    def shots_to_sink(self) -> Dict[int, float]:
+        """Среднее количество выстрелов на потопление по длине корабля.
+
+        Считаются выстрелы от первого попадания в корабль до его
+        потопления включительно, в том числе мимо корабля.
+        """
+        return {
+            length: self.sink_shots[length] / count
+            for length, count in enumerate(self.sink_count)
+            if count
+        }
+
+    def _add_shots(self, shots: np.ndarray, fleet: List[ShipPoints]):
+        """Учёт выстрелов одного игрока по флоту соперника."""
+        ships = np.full((self.height, self.width), -1, dtype=np.intp)
+        lengths = np.empty(len(fleet), dtype=np.intp)
+        for ship, (x0, y0, x1, y1) in enumerate(fleet):
+            ships[y0:y1 + 1, x0:x1 + 1] = ship
+            lengths[ship] = max(x1 - x0, y1 - y0) + 1
+        self.occupancy += ships >= 0
+        self.fleets += 1
+
+        if not len(shots):
+            return
+        xs, ys = shots[:, 0], shots[:, 1]
+        columns = RESULT_COLUMNS[shots[:, 2]]
+        numbers = np.arange(1, len(shots) + 1)
+        np.add.at(self.results, (ys, xs, columns), 1)
+
+        # повторный выстрел в подбитую клетку возвращает прежний результат,
+        # поэтому для попаданий и потоплений учитывается только первый
+        fresh = np.zeros(len(shots), dtype=bool)
+        fresh[np.unique(ys * self.width + xs, return_index=True)[1]] = True
+        hits = fresh & (columns > 0)
+        self.first_hit_sum[ys[hits], xs[hits]] += numbers[hits]
+        self.first_hit_count[ys[hits], xs[hits]] += 1
+
+        hit_ships = ships[ys[hits], xs[hits]]
+        first_hits = np.full(len(fleet), len(shots) + 1, dtype=np.intp)
+        np.minimum.at(first_hits, hit_ships, numbers[hits])
+
+        sunk = fresh & (columns == 2)
+        sunk_ships = ships[ys[sunk], xs[sunk]]
+        shots_to_sink = numbers[sunk] - first_hits[sunk_ships] + 1
+        np.add.at(self.sink_shots, lengths[sunk_ships], shots_to_sink)
+        np.add.at(self.sink_count, lengths[sunk_ships], 1)
+
+
+def analyze_records(
+    paths: Iterable[str],
+    width: int = 10,
+    height: int = 10,
+    workers: Optional[int] = None,
+    chunk_size: int = 1_000,
+) -> FieldStats:
+    """Статистика записанных игр.
+
+    Пути делятся на части по `chunk_size` штук, каждая часть
+    обрабатывается в отдельном процессе, и в работе одновременно
+    находится не больше `workers` частей. При `workers=1` игры
+    обрабатываются в текущем процессе.
+    """
+    workers = workers or os.cpu_count()
+    chunks = _chunks(iter(paths), chunk_size)
+    tasks = ((chunk, width, height) for chunk in chunks)
+    return _merge(_analyze_records_chunk, tasks, width, height, workers)
+
+
+def analyze_matches(
+    games: int,
+    first: Type[Shooter],
+    second: Type[Shooter],
+    width: int = 10,
+    height: int = 10,
+    fleet: Optional[Fleet] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 100,
+) -> FieldStats:
+    """Статистика матчей между стратегиями, проводимых движком.
+
+    Матчи проводятся так же, как в `battleship.selfplay.run_matches`,
+    поэтому при одном `seed` статистика совпадает со статистикой их
+    записей.
+    """
+    workers = workers or os.cpu_count()
+    tasks = (
+        (
+            start, min(chunk_size, games - start),
+            first, second, width, height, fleet, seed,
+        )
+        for start in range(0, games, chunk_size)
+    )
+    return _merge(_analyze_matches_chunk, tasks, width, height, workers)
+
+
+def _merge(
+    function: Callable[[tuple], FieldStats],
+    tasks: Iterator[tuple],
+    width: int,
+    height: int,
+    workers: int,
+) -> FieldStats:
+    """Обработка частей игр и объединение их статистики."""
+    stats = FieldStats(width, height)
+    if workers == 1:
+        for chunk_stats in map(function, tasks):
+            stats.merge(chunk_stats)
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(it.islice(tasks, workers))
+            if not batch:
+                return stats
+            for chunk_stats in executor.map(function, batch):
+                stats.merge(chunk_stats)
+
+
+def _chunks(items: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(it.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _analyze_records_chunk(task: tuple) -> FieldStats:
+    """Статистика части записанных игр."""
+    paths, width, height = task
+    stats = FieldStats(width, height)
+    for path in paths:
+        record = GameRecord(path)
+        try:
+            stats.add(record)
+        finally:
+            record.close()
+    return stats
+
+
+def _analyze_matches_chunk(task: tuple) -> FieldStats:
+    """Статистика части матчей."""
+    start, count, first, second, width, height, fleet, seed = task
+    stats = FieldStats(width, height)
+    for game in range(start, start + count):
+        log = GameLog()
+        play_match(
+            first, second, width, height, fleet,
+            seed=None if seed is None else seed + game,
+            first_turn=game % 2,
+            log=log,
+        )
+        stats.add(log)
+    return stats
+
+
+def _mean(total: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """Поэлементное среднее, NaN там, где значений нет."""
+    mean = np.full(np.broadcast(total, count).shape, np.nan)
+    np.divide(total, count, out=mean, where=count > 0)
+    return mean
+
+
+def format_stats(stats: FieldStats) -> List[str]:
+    """Строковое представление статистики игр."""
+    totals = stats.results.sum(axis=(0, 1))
+    rates = totals / max(totals.sum(), 1)
+    lines = [
+        f"Игр: {stats.games}",
+        "Промахи/повреждения/потопления: "
+        + "/".join(f"{rate:.1%}" for rate in rates),
+        "Выстрелов на потопление по длине корабля: "
+        + ", ".join(
+            f"{length}: {shots:.2f}"
+            for length, shots in stats.shots_to_sink().items()
+        ),
+        "Частота кораблей в клетках, %:",
+    ]
+    lines.extend(_format_grid(stats.occupancy_frequency * 100))
+    lines.append("Средний номер выстрела, попавшего в клетку:")
+    lines.extend(_format_grid(stats.first_hit_turn))
+    return lines
+
+
+def _format_grid(grid: np.ndarray) -> List[str]:
+    return [" ".join(f"{value:5.1f}" for value in row) for row in grid]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Статистика игр по клеткам поля."
+    )
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--games", type=int)
+    parser.add_argument("--first", choices=SHOOTERS, default="random")
+    parser.add_argument("--second", choices=SHOOTERS, default="random")
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if args.games is not None:
+        stats = analyze_matches(
+            args.games,
+            SHOOTERS[args.first],
+            SHOOTERS[args.second],
+            width=args.width,
+            height=args.height,
+            seed=args.seed,
+            workers=args.workers,
+        )
+    elif args.paths:
+        stats = analyze_records(
+            iter_record_paths(args.paths),
+            width=args.width,
+            height=args.height,
+            workers=args.workers,
+        )
+    else:
+        parser.error("Нужны пути к записям игр или --games.")
+
+    print("\n".join(format_stats(stats)))
+    if args.output:
+        np.savez(
+            args.output,
+            occupancy_frequency=stats.occupancy_frequency,
+            first_hit_turn=stats.first_hit_turn,
+            result_rates=stats.result_rates,
+        )
+
+
+if __name__ == "__main__":
+    main()
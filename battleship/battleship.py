@@ -1,9 +1,12 @@
 import itertools as it
 import random
 from enum import IntFlag, auto
-from typing import Iterator, Tuple
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
-from battleship.field import Field
+from battleship import const
+from battleship.cell import CellType
+from battleship.field import BaseField, FieldState, make_field
+from battleship.placement import Fleet, ShipPoints, place_fleet
 
 
 class MoveResult(IntFlag):
@@ -35,87 +38,310 @@ class MoveResult(IntFlag):
         return self == MoveResult.WIN
 
 
+class BattleshipState(NamedTuple):
+    """Снимок изменяемой части игры.
+
+    Границы и клетки кораблей после расстановки не меняются, поэтому в
+    снимок входят только клетки поля и здоровье кораблей.
+    """
+
+    field: FieldState
+    ships_health: Tuple[int, ...]
+    ships_left: int
+
+
 class Battleship:
-    """Интерфейс игры."""
+    """Интерфейс игры.
+
+    Если `undo=True`, перед каждым выстрелом и обновлением клетки снимок
+    игры кладётся в стек, и `undo` отменяет последний ход - так перебор
+    ходов наперёд обходится без копирования полей.
+    """
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, undo: bool = False):
         self.width = width
         self.height = height
-        self.field = Field(self.width, self.height)
+        self.field = make_field(self.width, self.height)
+
+        # реестр размещённых кораблей: границы каждого корабля, номера его
+        # клеток, количество ещё не подбитых клеток, индекс клеток
+        # и количество непотопленных кораблей
+        self._ships = []
+        self._ships_cells = []
+        self._ships_health = []
+        self._ships_index = {}
+        self._ships_left = 0
+
+        self._undo_stack: Optional[List[BattleshipState]] = (
+            [] if undo else None
+        )
+
+    @property
+    def ships(self) -> Tuple[ShipPoints, ...]:
+        """Границы размещённых кораблей в порядке их расстановки."""
+        return tuple(self._ships)
+
+    def __getstate__(self) -> bytes:
+        """Компактное состояние для `pickle`.
+
+        Все числа записываются в `compress_varint`: размеры поля,
+        признак стека отмен, количество кораблей, для каждого корабля -
+        номер его первой клетки и длина вместе с направлением, а затем
+        клетки, тип которых отличается от поля сразу после расстановки,
+        в виде расстояния от предыдущей такой клетки и типа клетки.
+        Здоровье кораблей пересчитывается по полю при загрузке.
+        """
+        # компрессор сам импортирует `MoveResult` из этого модуля
+        from battleship.compressor import write_varint
+
+        data = bytearray()
+        write_varint(data, self.width)
+        write_varint(data, self.height)
+        data.append(self._undo_stack is not None)
+        write_varint(data, len(self._ships))
+        for (x0, y0, x1, y1) in self._ships:
+            vertical = x0 == x1 and y0 != y1
+            write_varint(data, y0*self.width + x0)
+            write_varint(data, (x1 - x0 + y1 - y0) << 1 | vertical)
+
+        placed = Battleship(self.width, self.height)
+        placed.adopt_ships(self._ships)
+        cells = list(self.field.changed_cells(placed.field.snapshot()))
+        write_varint(data, len(cells))
+        previous = 0
+        for cell in cells:
+            y, x = divmod(cell, self.width)
+            write_varint(data, cell - previous)
+            write_varint(data, self.field.get_type(x, y))
+            previous = cell
+        return bytes(data)
+
+    def __setstate__(self, state: bytes):
+        from battleship.compressor import decompress_varint
+
+        width, offset = decompress_varint(state)
+        height, offset = decompress_varint(state, offset)
+        self.__init__(width, height, undo=bool(state[offset]))
+        ships_count, offset = decompress_varint(state, offset + 1)
+        for _ in range(ships_count):
+            start, offset = decompress_varint(state, offset)
+            shape, offset = decompress_varint(state, offset)
+            y0, x0 = divmod(start, width)
+            # длина корабля без первой клетки
+            span = shape >> 1
+            if shape & 1:
+                self._place_ship(x0, y0, x0, y0 + span)
+            else:
+                self._place_ship(x0, y0, x0 + span, y0)
+
+        cells_count, offset = decompress_varint(state, offset)
+        cell = 0
+        for _ in range(cells_count):
+            gap, offset = decompress_varint(state, offset)
+            cell_type, offset = decompress_varint(state, offset)
+            cell += gap
+            y, x = divmod(cell, width)
+            self.field.set_type(x, y, CellType(cell_type))
+        self.load_field(self.field)
+
+    def snapshot(self) -> BattleshipState:
+        """Получение снимка игры.
+
+        Снимок плотного поля копирует только ссылки на битборды, поэтому
+        не зависит от размера поля.
+        """
+        return BattleshipState(
+            self.field.snapshot(),
+            tuple(self._ships_health),
+            self._ships_left,
+        )
+
+    def restore(self, state: BattleshipState):
+        """Восстановление игры из снимка."""
+        self.field.restore(state.field)
+        self._ships_health = list(state.ships_health)
+        self._ships_left = state.ships_left
+
+    def clone(self) -> "Battleship":
+        """Копирование игры.
 
-    def place_ships(self):
+        Реестр кораблей копируется поверхностно, а клетки - снимком.
+        """
+        clone = Battleship(
+            self.width, self.height, self._undo_stack is not None
+        )
+        clone._ships = list(self._ships)
+        clone._ships_cells = list(self._ships_cells)
+        clone._ships_index = dict(self._ships_index)
+        clone.restore(self.snapshot())
+        return clone
+
+    def undo(self):
+        """Отмена последнего выстрела или обновления клетки."""
+        if not self._undo_stack:
+            raise ValueError("Нет ходов для отмены.")
+        self.restore(self._undo_stack.pop())
+
+    def load_field(self, field: BaseField):
+        """Замена поля игры с уже размещёнными кораблями.
+
+        Здоровье кораблей пересчитывается по подбитым клеткам поля.
+        """
+        self.field = field
+        self._ships_left = 0
+        for (ship, cells) in enumerate(self._ships_cells):
+            health = 0
+            for cell in cells:
+                x, y = cell % self.width, cell // self.width
+                if not (
+                    field.has_type(x, y, CellType.DAMAGED)
+                    or field.has_type(x, y, CellType.DESTROYED)
+                ):
+                    health += 1
+            self._ships_health[ship] = health
+            if health:
+                self._ships_left += 1
+
+    def place_ships(
+        self,
+        fleet: Optional[Fleet] = None,
+        rng: Optional[random.Random] = None,
+    ):
         """Размещение кораблей в случайном порядке.
 
-        Весь метод строится на основании, что следуя правилам игры,
-        не существует позиций, когда невозможно разместить все корабли.
+        Флот задаётся словарём "длина корабля - количество кораблей",
+        по умолчанию используется стандартный флот `const.DEFAULT_FLEET`.
 
         Начиная с пустого поля, каждой итерацией мы находим все возможные
         (как горизонтальные, так и вертикальные) положения корабля, размещаем
         корабль, запоминаем координаты, и проходим так до тех пор, пока
-        не установлены все корабли.
-
-        Все операции по отметке занятых клеток проводятся на "разметочном"
-        поле. После заполнения разметочного поля всеми кораблями, по
-        получившимся координатам расставляются корабли на игровом поле.
+        не установлены все корабли. Поиск положений ведётся по
+        предпосчитанным маскам поля (см. `battleship.placement`).
         """
-        mark_field = Field(self.width, self.height)
-        ships_points = set()
-
-        ships_with_count = {
-            4: 1,
-            3: 2,
-            2: 3,
-            1: 4,
-        }
-        for (ship_length, ships_count) in ships_with_count.items():
-            for _ in range(ships_count):
-                ship_points = _get_available_ship_points(
-                    mark_field, ship_length
-                )
-                points = random.choice(tuple(ship_points))
-                ships_points.add(points)
-                _mark_ship_around_points(mark_field, *points)
+        if fleet is None:
+            fleet = const.DEFAULT_FLEET
+        ships_points = place_fleet(self.width, self.height, fleet, rng)
+        self.adopt_ships(ships_points)
 
-        for point in ships_points:
-            self._place_ship(*point)
+    def adopt_ships(self, ships_points: Sequence[ShipPoints]):
+        """Размещение готовой расстановки без проверки.
+
+        Расстановка должна быть получена `place_fleet` для поля того же
+        размера, например из `battleship.pool.FleetPool`.
+        """
+        for points in ships_points:
+            self._place_ship(*points)
 
     def _place_ship(self, x0: int, y0: int, x1: int, y1: int):
-        """Размещение корабля на игровом поле."""
-        for (x, y) in it.product(
-            range(x0, x1+1),
-            range(y0, y1+1),
-            repeat=1,
-        ):
-            self.field[y][x].set_ship()
+        """Размещение корабля на игровом поле и в реестре кораблей."""
+        ship = len(self._ships)
+        cells = tuple(
+            y*self.width + x
+            for (x, y) in it.product(
+                range(x0, x1+1),
+                range(y0, y1+1),
+                repeat=1,
+            )
+        )
+        for cell in cells:
+            self._ships_index[cell] = ship
+
+        self._ships.append((x0, y0, x1, y1))
+        self._ships_cells.append(cells)
+        self._ships_health.append(len(cells))
+        self._ships_left += 1
+        self.field.add_cells(CellType.SHIP, cells)
 
     def hit_cell(self, cell_x: int, cell_y: int) -> MoveResult:
-        """Обстрел клетки."""
-        cell = self.field[cell_y][cell_x]
-        if not cell.is_ship:
+        """Обстрел клетки.
+
+        Результат хода определяется по реестру кораблей: повторное
+        попадание в уже подбитую клетку не уменьшает здоровье корабля.
+        """
+        if self._undo_stack is not None:
+            self._undo_stack.append(self.snapshot())
+
+        ship = self._ships_index.get(cell_y*self.width + cell_x)
+        if ship is None:
             move_result = MoveResult.MISS
         else:
-            move_result = MoveResult.DAMAGED
-            if self._is_ship_destroyed(cell_x, cell_y):
+            hit = (
+                self.field.has_type(cell_x, cell_y, CellType.DAMAGED)
+                or self.field.has_type(cell_x, cell_y, CellType.DESTROYED)
+            )
+            if not hit:
+                self._ships_health[ship] -= 1
+                if not self._ships_health[ship]:
+                    self._ships_left -= 1
+
+            if self._ships_health[ship]:
+                move_result = MoveResult.DAMAGED
+            elif self._ships_left:
                 move_result = MoveResult.DESTROYED
-                if self._is_win(cell_x, cell_y):
-                    move_result = MoveResult.WIN
+            else:
+                move_result = MoveResult.WIN
 
-        self.update_cell(cell_x, cell_y, move_result)
+        self._update_cell(cell_x, cell_y, move_result)
         return move_result
 
+    def hit_cells(self, cells: Sequence[Tuple[int, int]]) -> List[MoveResult]:
+        """Обстрел нескольких клеток за один ход (залп).
+
+        Клетки обстреливаются по порядку, поэтому если залп топит несколько
+        кораблей, `WIN` получает только выстрел, потопивший последний
+        корабль, а предыдущие - `DESTROYED`. После победного выстрела
+        игра окончена, и оставшиеся выстрелы залпа не делаются:
+        результатов может быть меньше, чем клеток.
+        """
+        move_results = []
+        for (cell_x, cell_y) in cells:
+            move_result = self.hit_cell(cell_x, cell_y)
+            move_results.append(move_result)
+            if move_result.is_win:
+                break
+        return move_results
+
+    def update_cells(
+        self,
+        cells: Sequence[Tuple[int, int]],
+        move_results: Sequence[MoveResult],
+    ):
+        """Обновление клеток в соответствии с результатами залпа.
+
+        Клетки обновляются по порядку выстрелов, чтобы к потоплению
+        корабля все его подбитые клетки уже были отмечены.
+        """
+        for ((cell_x, cell_y), move_result) in zip(cells, move_results):
+            self.update_cell(cell_x, cell_y, move_result)
+
     def update_cell(self, cell_x: int, cell_y: int, move_result: MoveResult):
         """Обновление клетки в соответствии с результатом хода."""
-        cell = self.field[cell_y][cell_x]
+        if self._undo_stack is not None:
+            self._undo_stack.append(self.snapshot())
+        self._update_cell(cell_x, cell_y, move_result)
+
+    def _update_cell(
+        self, cell_x: int, cell_y: int, move_result: MoveResult
+    ):
+        """Отметка результата хода на поле."""
         if move_result == MoveResult.MISS:
-            cell.set_miss()
+            self.field.add_type(cell_x, cell_y, CellType.MISS)
         elif move_result == MoveResult.DAMAGED:
-            cell.set_damaged()
+            self.field.add_type(cell_x, cell_y, CellType.DAMAGED)
             # чтобы `get_ship_points` работал и для вражеской карты,
             # клетку нужно обозначить кораблём
-            cell.set_ship()
+            self.field.add_type(cell_x, cell_y, CellType.SHIP)
         elif move_result == MoveResult.DESTROYED:
-            for (x, y) in self.get_ship_points(cell_x, cell_y):
-                self.field[y][x].set_destroyed()
+            ship = self._ships_index.get(cell_y*self.width + cell_x)
+            if ship is not None:
+                self.field.add_cells(
+                    CellType.DESTROYED, self._ships_cells[ship]
+                )
+            else:
+                # на вражеском поле кораблей в реестре нет, поэтому
+                # клетки корабля находятся обходом соседних клеток
+                for (x, y) in self.get_ship_points(cell_x, cell_y):
+                    self.field.add_type(x, y, CellType.DESTROYED)
 
     def get_ship_points(
         self, cell_x: int, cell_y: int
@@ -132,7 +358,7 @@ class Battleship:
             return (
                 0 <= x < self.width
                 and 0 <= y < self.height
-                and self.field[y][x].is_ship
+                and self.field.has_type(x, y, CellType.SHIP)
             )
 
         # поиск клеток корабля справа
@@ -158,75 +384,3 @@ class Battleship:
         while filter_func(x, y):
             yield (x, y)
             y -= 1
-
-    def _is_ship_destroyed(self, cell_x: int, cell_y: int) -> bool:
-        """Является ли корабль потопленным.
-
-        Вызывается во время расчёта результата хода. Так как во время расчёта
-        хода клетки поля не изменяются, то существует проверка на то, что
-        либо корабль в клетке повреждён, либо клетка является объектом хода
-        (тогда все остальные клетки корабля должны быть повреждены).
-        """
-        return all(
-            self.field[y][x].is_damaged or (x, y) == (cell_x, cell_y)
-            for (x, y) in self.get_ship_points(cell_x, cell_y)
-        )
-
-    def _is_win(self, cell_x: int, cell_y: int) -> bool:
-        """Потоплены ли все корабли.
-
-        Вызывается во время расчёта результата хода. Так как во время расчёта
-        хода клетки поля не изменяются, то существует проверка, что либо
-        корабль потоплен, либо корабль будет потоплен этим ходом.
-        """
-        return all(
-            not cell.is_ship or cell.is_destroyed or (i, j) == (cell_x, cell_y)
-            for j, row in enumerate(self.field)
-            for i, cell in enumerate(row)
-        )
-
-
-def _get_available_ship_points(
-    mask_field: Field, ship_length: int
-) -> Iterator[Tuple[int, int, int, int]]:
-    """Получение всех возможных точек расположения корабля.
-
-    Получение всех возможных точек расположения для
-    горизонтального и вертикального полежения.
-    """
-    for j, row in enumerate(mask_field):
-        prev = 0
-        for i, cell in enumerate(row):
-            if cell.is_ship:
-                prev = 0
-            else:
-                prev += 1
-                if prev >= ship_length:
-                    yield (i-ship_length+1, j, i, j)
-
-    for i, row in enumerate(mask_field.as_transposed()):
-        prev = 0
-        for j, cell in enumerate(row):
-            if cell.is_ship:
-                prev = 0
-            else:
-                prev += 1
-                if prev >= ship_length:
-                    yield (i, j-ship_length+1, i, j)
-
-
-def _mark_ship_around_points(
-    mark_field: Field, x0: int, y0: int, x1: int, y1: int
-):
-    """Размещение корабля на разметочном поле.
-
-    "Размещая" корабль, мы обозначаем клетки, в которых не могут находиться
-    другие корабли - это клетки самого корабля, и его соседние клетки.
-    """
-    for (x, y) in it.product(
-        range(x0-1, x1+2),
-        range(y0-1, y1+2),
-        repeat=1,
-    ):
-        if 0 <= x < mark_field.width and 0 <= y < mark_field.height:
-            mark_field[y][x].set_ship()
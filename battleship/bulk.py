@@ -0,0 +1,167 @@
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from battleship import const
+from battleship.exceptions import CouldNotPlaceShipsError
+from battleship.placement import PLACEMENT_ATTEMPTS, Fleet
+
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def generate_fleets(
+    n: int,
+    width: int,
+    height: int,
+    fleet: Optional[Fleet] = None,
+    rng: Optional[np.random.Generator] = None,
+    packed: bool = False,
+) -> np.ndarray:
+    """Получение `n` случайных расстановок флота одним массивом.
+
+    Возвращается массив формы `(n, height, width)` из булевых значений
+    "есть ли корабль в клетке", либо, при `packed=True`, массив формы
+    `(n, ceil(height * width / 8))`, где клетки упакованы в биты построчно.
+    """
+    chunks = list(
+        iter_fleets(n, width, height, fleet, rng=rng, packed=packed)
+    )
+    if not chunks:
+        return _empty_fleets(width, height, packed)
+    return np.concatenate(chunks)
+
+
+def iter_fleets(
+    n: int,
+    width: int,
+    height: int,
+    fleet: Optional[Fleet] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rng: Optional[np.random.Generator] = None,
+    packed: bool = False,
+) -> Iterator[np.ndarray]:
+    """Потоковое получение `n` случайных расстановок флота.
+
+    Расстановки выдаются частями не больше `chunk_size` штук, поэтому
+    расход памяти не зависит от `n`. Формат частей такой же, как
+    у `generate_fleets`.
+    """
+    fleet = const.DEFAULT_FLEET if fleet is None else fleet
+    rng = rng or np.random.default_rng()
+
+    for start in range(0, n, chunk_size):
+        count = min(chunk_size, n - start)
+        boards = _place_fleets(count, width, height, fleet, rng)
+        if packed:
+            yield np.packbits(boards, axis=1)
+        else:
+            yield boards.reshape(-1, height, width)
+
+
+def _place_fleets(
+    n: int, width: int, height: int, fleet: Fleet, rng: np.random.Generator
+) -> np.ndarray:
+    """Случайная расстановка флота сразу на `n` полях.
+
+    Повторяет алгоритм `placement.place_fleet`: корабли ставятся по порядку,
+    каждый - в равновероятное из доступных положений, а поля, на которых
+    очередной корабль поставить некуда, расставляются заново. Поэтому
+    распределение расстановок совпадает с `Battleship.place_ships`.
+    """
+    boards = np.zeros((n, width * height), dtype=bool)
+    pending = np.arange(n)
+
+    for _ in range(PLACEMENT_ATTEMPTS):
+        ships, failed = _try_place_fleets(
+            len(pending), width, height, fleet, rng
+        )
+        done = ~failed
+        boards[pending[done]] = ships[done]
+        pending = pending[failed]
+        if not len(pending):
+            return boards
+
+    raise CouldNotPlaceShipsError("Не удалось расставить флот на поле.")
+
+
+def _try_place_fleets(
+    n: int, width: int, height: int, fleet: Fleet, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Попытка случайной расстановки флота на `n` полях.
+
+    Возвращает поля с кораблями и отметки о неудавшихся расстановках.
+    """
+    blocked = np.zeros((n, width * height), dtype=bool)
+    ships = np.zeros((n, width * height), dtype=bool)
+    failed = np.zeros(n, dtype=bool)
+    rows = np.arange(n)
+
+    for (ship_length, ships_count) in fleet.items():
+        cells, zones = _get_placements(width, height, ship_length)
+        if not len(cells):
+            failed[:] = True
+            break
+
+        for _ in range(ships_count):
+            # положение доступно, если ни одна его клетка не занята
+            available = ~blocked[:, cells].any(axis=2)
+            counts = available.sum(axis=1)
+            failed |= counts == 0
+
+            choice = np.floor(rng.random(n) * counts).astype(np.int64)
+            placement = (
+                available.cumsum(axis=1) > choice[:, None]
+            ).argmax(axis=1)
+
+            ships[rows[:, None], cells[placement]] = True
+            blocked |= zones[placement]
+
+    return ships, failed
+
+
+@lru_cache(maxsize=None)
+def _get_placements(
+    width: int, height: int, ship_length: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Получение всех положений корабля на поле заданного размера.
+
+    Возвращает номера клеток каждого положения (массив формы
+    `(P, ship_length)`) и маски клеток, занятых кораблём вместе
+    с соседними (массив формы `(P, width * height)`).
+    """
+    cells = []
+    for y in range(height):
+        for x in range(width - ship_length + 1):
+            cells.append([y*width + x + k for k in range(ship_length)])
+    if ship_length > 1:
+        # одноклеточный корабль в обоих положениях один и тот же
+        for y in range(height - ship_length + 1):
+            for x in range(width):
+                cells.append([(y+k)*width + x for k in range(ship_length)])
+    cells = np.array(cells, dtype=np.int64).reshape(-1, ship_length)
+
+    ship_boards = np.zeros((len(cells), height * width), dtype=bool)
+    ship_boards[np.arange(len(cells))[:, None], cells] = True
+    zones = _dilate(ship_boards.reshape(-1, height, width))
+
+    return cells, zones.reshape(len(cells), -1)
+
+
+def _dilate(boards: np.ndarray) -> np.ndarray:
+    """Расширение клеток полей на все соседние клетки."""
+    padded = np.pad(boards, ((0, 0), (1, 1), (1, 1)))
+    height, width = boards.shape[1:]
+    result = np.zeros_like(boards)
+    for dy in range(3):
+        for dx in range(3):
+            result |= padded[:, dy:dy+height, dx:dx+width]
+    return result
+
+
+def _empty_fleets(width: int, height: int, packed: bool) -> np.ndarray:
+    """Пустой массив расстановок."""
+    if packed:
+        return np.zeros((0, (width*height + 7) // 8), dtype=np.uint8)
+    return np.zeros((0, height, width), dtype=bool)
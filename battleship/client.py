@@ -1,25 +1,77 @@
+import os
+import select
 import socket
+from multiprocessing import reduction
+from typing import Optional, Tuple
 
 from battleship import const
 from battleship.exceptions import CouldNotConfirmError
 
 
+# размер буфера приёма: наибольшая длина содержимого кадра протокола
+RECEIVE_BUFFER_SIZE = 1 << 16
+
+
 class Client:
+    """Соединение с другой стороной.
+
+    Данные принимаются в буфер соединения `_receive_buffer`, выделяемый
+    один раз, поэтому получение сообщений не создаёт новых объектов
+    `bytes`.
+    """
+
+    def __init__(self):
+        self._receive_buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self._receive_view = memoryview(self._receive_buffer)
+
+    def fileno(self) -> int:
+        """Дескриптор сокета соединения для `selectors`."""
+        return self._client_socket.fileno()
+
+    def set_timeout(self, timeout: Optional[float]):
+        """Наибольшее время ожидания данных от другой стороны."""
+        self._client_socket.settimeout(timeout)
+
     def _send(self, data: bytes):
         """Отправка данных другой стороне."""
         self._client_socket.sendall(data)
 
     def _receive(self, data_length: int) -> bytes:
         """Получение данных от другой стороны."""
-        return self._client_socket.recv(data_length)
+        self._receive_into(data_length)
+        return bytes(self._receive_view[:data_length])
+
+    def _receive_into(self, data_length: int):
+        """Получение ровно `data_length` байт в начало буфера приёма.
+
+        Чтение продолжается, пока не будут получены все байты, так как
+        `recv_into` может получить только часть сообщения. Данные в
+        буфере действительны до следующего получения.
+        """
+        if not data_length:
+            return
+
+        received = self._client_socket.recv_into(
+            self._receive_buffer, data_length
+        )
+        while received < data_length:
+            count = self._client_socket.recv_into(
+                self._receive_view[received:], data_length - received
+            )
+            if not count:
+                raise ConnectionError("Другая сторона закрыла соединение.")
+            received += count
 
 
 class SubClient(Client):
     """Клиент."""
 
-    def __init__(self, server_host: str):
+    def __init__(self, server_host: str, port: int = const.PORT):
+        super().__init__()
         self._server_host = server_host
+        self._port = port
         self._client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        _disable_nagle(self._client_socket)
 
     def handshake(self):
         """Хэндшейк."""
@@ -40,7 +92,7 @@ class SubClient(Client):
 
     def connect_to_server(self):
         """Подключение к серверу."""
-        self._client_socket.connect((self._server_host, const.PORT))
+        self._client_socket.connect((self._server_host, self._port))
 
     def close(self):
         """Закрытие клиента."""
@@ -51,6 +103,7 @@ class MainClient(Client):
     """Сервер."""
 
     def __init__(self):
+        super().__init__()
         self._host = socket.gethostbyname(socket.gethostname())
 
         self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -66,6 +119,7 @@ class MainClient(Client):
         """Подключение к клиенту."""
         self._server_socket.listen()
         self._client_socket, _ = self._server_socket.accept()
+        _disable_nagle(self._client_socket)
 
     def handshake(self):
         """Хэндшейк."""
@@ -88,3 +142,95 @@ class MainClient(Client):
         """Закрытие сервера."""
         self._client_socket.close()
         self._server_socket.close()
+
+
+class PipeClient(Client):
+    """Соединение с другой стороной на той же машине через пару каналов.
+
+    Данные идут через `os.pipe` в каждую сторону, а не через сокет на
+    `const.PORT`, поэтому много матчей на одной машине не занимают
+    портов и не проходят через сетевой стек. Каналы создаются до запуска
+    процессов игроков (см. `pipe_pair`), и каждый процесс закрывает
+    дескрипторы другой стороны. Соединение можно передать аргументом
+    процессу `multiprocessing` любого способа запуска: дескрипторы
+    каналов передаются дочернему процессу вместе с ним.
+    """
+
+    def __init__(self, read_fd: int, write_fd: int):
+        super().__init__()
+        self._read_fd = read_fd
+        self._write_fd = write_fd
+        self._timeout: Optional[float] = None
+
+    def __reduce__(self):
+        """Передача соединения дочернему процессу `multiprocessing`."""
+        return (
+            _rebuild_pipe_client,
+            (
+                type(self),
+                reduction.DupFd(self._read_fd),
+                reduction.DupFd(self._write_fd),
+            ),
+        )
+
+    def fileno(self) -> int:
+        """Дескриптор канала приёма для `selectors`."""
+        return self._read_fd
+
+    def set_timeout(self, timeout: Optional[float]):
+        """Наибольшее время ожидания данных от другой стороны."""
+        self._timeout = timeout
+
+    def close(self):
+        """Закрытие каналов."""
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+    def _send(self, data: bytes):
+        """Отправка данных другой стороне."""
+        view = memoryview(data)
+        sent = 0
+        while sent < len(view):
+            sent += os.write(self._write_fd, view[sent:])
+
+    def _receive_into(self, data_length: int):
+        """Получение ровно `data_length` байт в начало буфера приёма."""
+        received = 0
+        while received < data_length:
+            if self._timeout is not None:
+                ready, _, _ = select.select(
+                    [self._read_fd], [], [], self._timeout
+                )
+                if not ready:
+                    raise socket.timeout("Другая сторона не отвечает.")
+            count = os.readv(
+                self._read_fd, [self._receive_view[received:data_length]]
+            )
+            if not count:
+                raise ConnectionError("Другая сторона закрыла соединение.")
+            received += count
+
+
+def _rebuild_pipe_client(cls: type, read_fd, write_fd) -> PipeClient:
+    """Восстановление соединения в дочернем процессе."""
+    return cls(read_fd.detach(), write_fd.detach())
+
+
+def pipe_pair() -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Создание каналов для двух сторон.
+
+    Возвращает дескрипторы приёма и отправки для каждой из сторон.
+    """
+    first_read, second_write = os.pipe()
+    second_read, first_write = os.pipe()
+    return (first_read, first_write), (second_read, second_write)
+
+
+def _disable_nagle(client_socket: socket.socket):
+    """Отправка кадров без задержки.
+
+    Кадры протокола короткие, и каждый ждёт ответа, поэтому алгоритм
+    Нейгла вместе с отложенными подтверждениями задерживал бы ход
+    на десятки миллисекунд.
+    """
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
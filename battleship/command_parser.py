@@ -1,16 +1,24 @@
 from typing import Tuple
 
 from battleship.exceptions import InvalidCommand
-from battleship.printer import COLS_INDEXES, ROWS_INDEXES
+from battleship.printer import column_index, row_index
 
 
-def parse_command(command: str) -> Tuple[int, int]:
-    """Получение координат хода из ввода игрока."""
+def parse_command(
+    command: str, width: int = 10, height: int = 10
+) -> Tuple[int, int]:
+    """Получение координат хода из ввода игрока.
+
+    Ход задаётся рядом и колонкой, например "5 Д", а на больших полях -
+    "1234 БВГ" (см. `battleship.printer.column_name`).
+    """
     try:
         cell_y, cell_x = command.split()
-        cell_x = COLS_INDEXES.index(cell_x)
-        cell_y = ROWS_INDEXES.index(cell_y)
+        cell_x = column_index(cell_x)
+        cell_y = row_index(cell_y)
     except ValueError:
         raise InvalidCommand("Неправильный вид команды!")
-    else:
-        return cell_x, cell_y
+
+    if not (0 <= cell_x < width and 0 <= cell_y < height):
+        raise InvalidCommand("Клетка вне поля!")
+    return cell_x, cell_y
@@ -1,14 +1,44 @@
-from typing import Tuple
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 from battleship import const
-from battleship.client import Client, MainClient, SubClient
+from battleship.client import (
+    Client,
+    MainClient,
+    PipeClient,
+    SubClient,
+    pipe_pair,
+)
 from battleship.compressor import (
-    compress_coords,
+    compress_varint,
+    decompress_varint,
     decomress_coords,
-    compress_move_result,
     decompress_move_result,
+    decompress_move_results,
+    decompress_salvo,
+    write_coords,
+    write_move_result,
+    write_move_results,
+    write_salvo,
 )
 from battleship.battleship import MoveResult
+from battleship.delta import FieldReplica
+from battleship.exceptions import ProtocolError
+from battleship.protocol import (
+    FRAME_HEADER,
+    MessageType,
+    pack_frame,
+    unpack_frame_header,
+)
+from battleship.spectator import split_update
+
+
+# место под заголовок кадра в буфере отправки
+FRAME_HEADER_PLACEHOLDER = bytes(FRAME_HEADER.size)
+# готовый кадр `KEEPALIVE` для отправки из фонового потока
+KEEPALIVE_FRAME = pack_frame(MessageType.KEEPALIVE, b"")
 
 
 class Commander(Client):
@@ -16,30 +46,227 @@ class Commander(Client):
 
     Класс предоставляет общие методы для общения данными как для сервера,
     так и для клиента.
+
+    Каждое сообщение передаётся кадром с версией протокола, типом
+    и длиной содержимого (см. `battleship.protocol`), поэтому сообщения
+    можно отправлять друг за другом, не дожидаясь ответа, а внутри
+    `batch` - ещё и одной отправкой.
+
+    Кадры собираются в буфере отправки `_send_buffer`, общем для всех
+    сообщений соединения, а содержимое полученных кадров декодируется
+    прямо из буфера приёма (см. `Client`).
+
+    Сообщения `KEEPALIVE` другой стороны пропускаются при получении
+    любого другого сообщения.
     """
 
+    def __init__(self):
+        super().__init__()
+        self._send_buffer = bytearray()
+        self._batching = False
+        # отправка из потока `keepalive` не должна разрывать чужой кадр
+        self._send_lock = threading.Lock()
+        # тип и длина содержимого кадра, заголовок которого уже прочитан
+        self._pending_header: Optional[Tuple[MessageType, int]] = None
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Объединение всех отправляемых сообщений в одну отправку."""
+        if self._batching:
+            yield
+            return
+
+        self._batching = True
+        try:
+            yield
+        finally:
+            self._batching = False
+            self._flush()
+
     def send_coords(self, cell_x: int, cell_y: int):
         """Отправка координат хода другой стороне."""
-        message = compress_coords(cell_x, cell_y)
-        self._send(message)
+        start = self._begin_frame()
+        write_coords(self._send_buffer, cell_x, cell_y)
+        self._end_frame(MessageType.COORDS, start)
 
     def receive_coords(self) -> Tuple[int, int]:
         """Получение координат хода от другой стороны."""
-        message = self._receive(const.MOVE_COORDS_MESSAGE_SIZE)
-        cell_x, cell_y = decomress_coords(message)
+        self._receive_message(MessageType.COORDS)
+        cell_x, cell_y = decomress_coords(self._receive_buffer)
         return cell_x, cell_y
 
     def send_move_result(self, move_result: MoveResult):
         """Отправка результата хода другой стороне."""
-        message = compress_move_result(move_result)
-        self._send(message)
+        start = self._begin_frame()
+        write_move_result(self._send_buffer, move_result)
+        self._end_frame(MessageType.MOVE_RESULT, start)
 
     def receive_move_result(self) -> MoveResult:
         """Получение результата хода от другой стороны."""
-        message = self._receive(const.MOVE_RESULT_MESSAGE_SIZE)
-        move_result = decompress_move_result(message)
+        length = self._receive_message(MessageType.MOVE_RESULT)
+        move_result = decompress_move_result(self._receive_buffer, length)
         return move_result
 
+    def send_salvo(self, cells: Sequence[Tuple[int, int]]):
+        """Отправка координат всех клеток залпа одним сообщением."""
+        start = self._begin_frame()
+        write_salvo(self._send_buffer, cells)
+        self._end_frame(MessageType.SALVO, start)
+
+    def receive_salvo(self) -> List[Tuple[int, int]]:
+        """Получение координат клеток залпа от другой стороны."""
+        length = self._receive_message(MessageType.SALVO)
+        return decompress_salvo(self._receive_buffer, length)
+
+    def send_salvo_results(self, move_results: Sequence[MoveResult]):
+        """Отправка результатов всех выстрелов залпа одним сообщением."""
+        start = self._begin_frame()
+        write_move_results(self._send_buffer, move_results)
+        self._end_frame(MessageType.SALVO_RESULTS, start)
+
+    def receive_salvo_results(self) -> List[MoveResult]:
+        """Получение результатов выстрелов залпа от другой стороны."""
+        length = self._receive_message(MessageType.SALVO_RESULTS)
+        return decompress_move_results(self._receive_buffer, length)
+
+    def send_salvo_size(self, salvo_size: int):
+        """Отправка количества выстрелов за ход другой стороне."""
+        self._send_message(MessageType.SALVO_SIZE, compress_varint(salvo_size))
+
+    def receive_salvo_size(self) -> int:
+        """Получение количества выстрелов за ход от другой стороны."""
+        length = self._receive_message(MessageType.SALVO_SIZE)
+        salvo_size, _ = decompress_varint(self._receive_view[:length])
+        if not salvo_size:
+            raise ProtocolError("Залп должен содержать хотя бы один выстрел.")
+        return salvo_size
+
+    def send_keepalive(self):
+        """Отправка сообщения о том, что соединение живо."""
+        start = self._begin_frame()
+        self._end_frame(MessageType.KEEPALIVE, start)
+
+    @contextmanager
+    def keepalive(
+        self, interval: float = const.KEEPALIVE_INTERVAL
+    ) -> Iterator[None]:
+        """Отправка `KEEPALIVE` каждые `interval` секунд в фоновом потоке.
+
+        Нужна там, где игра идёт блокирующим ожиданием ввода, чтобы
+        другая сторона не сочла соединение потерянным, пока игрок
+        думает над ходом.
+        """
+        stopped = threading.Event()
+
+        def send_keepalives():
+            while not stopped.wait(interval):
+                try:
+                    with self._send_lock:
+                        self._send(KEEPALIVE_FRAME)
+                except OSError:
+                    return
+
+        thread = threading.Thread(target=send_keepalives, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def send_forfeit(self):
+        """Отправка сообщения о том, что игрок сдался."""
+        start = self._begin_frame()
+        self._end_frame(MessageType.FORFEIT, start)
+
+    def peer_forfeited(self) -> bool:
+        """Ожидание следующего сообщения: сдалась ли другая сторона.
+
+        Сообщение `FORFEIT` читается, а любое другое остаётся для
+        следующего вызова `receive_*`.
+        """
+        while self.receive_message_type() == MessageType.KEEPALIVE:
+            pass
+        if self._pending_header[0] != MessageType.FORFEIT:
+            return False
+        self._receive_message(MessageType.FORFEIT)
+        return True
+
+    def receive_message_type(self) -> MessageType:
+        """Получение типа следующего сообщения.
+
+        Читается только заголовок кадра, а само сообщение - следующим
+        вызовом `receive_*`. Сообщение `KEEPALIVE` читается целиком, так
+        что после него можно снова ждать данных от другой стороны.
+        """
+        if self._pending_header is None:
+            self._receive_into(const.FRAME_HEADER_SIZE)
+            header = unpack_frame_header(self._receive_buffer)
+            if header[0] == MessageType.KEEPALIVE:
+                self._receive_into(header[1])
+                return MessageType.KEEPALIVE
+            self._pending_header = header
+        return self._pending_header[0]
+
+    def _send_message(self, message_type: MessageType, message: bytes):
+        """Отправка сообщения заданного типа другой стороне."""
+        start = self._begin_frame()
+        self._send_buffer += message
+        self._end_frame(message_type, start)
+
+    def _begin_frame(self) -> int:
+        """Начало кадра в буфере отправки. Возвращает смещение кадра.
+
+        Место под заголовок резервируется, а заполняется в `_end_frame`,
+        когда длина содержимого уже известна.
+        """
+        start = len(self._send_buffer)
+        self._send_buffer += FRAME_HEADER_PLACEHOLDER
+        return start
+
+    def _end_frame(self, message_type: MessageType, start: int):
+        """Завершение кадра и его отправка, если сообщения не объединяются."""
+        length = len(self._send_buffer) - start - FRAME_HEADER.size
+        FRAME_HEADER.pack_into(
+            self._send_buffer,
+            start,
+            const.PROTOCOL_VERSION,
+            message_type,
+            length,
+        )
+        if not self._batching:
+            self._flush()
+
+    def _flush(self):
+        """Отправка собранных в буфере кадров."""
+        if self._send_buffer:
+            # `with` создаёт связанный метод `__exit__` на каждую отправку,
+            # а вызовы `acquire` и `release` ничего не выделяют
+            self._send_lock.acquire()
+            try:
+                self._send(self._send_buffer)
+            finally:
+                self._send_lock.release()
+            del self._send_buffer[:]
+
+    def _receive_message(self, message_type: MessageType) -> int:
+        """Получение сообщения заданного типа от другой стороны.
+
+        Содержимое сообщения читается в начало `_receive_buffer`, а
+        возвращается его длина.
+        """
+        while self.receive_message_type() == MessageType.KEEPALIVE:
+            pass
+        received_type, length = self._pending_header
+        self._pending_header = None
+        if received_type != message_type:
+            raise ProtocolError(
+                f"Ожидалось сообщение {message_type.name}, "
+                f"получено {received_type.name}."
+            )
+        self._receive_into(length)
+        return length
+
 
 class MainCommander(MainClient, Commander):
     """Командир-сервер."""
@@ -47,3 +274,82 @@ class MainCommander(MainClient, Commander):
 
 class SubCommander(SubClient, Commander):
     """Командир-клиент."""
+
+
+class PipeCommander(PipeClient, Commander):
+    """Командир для игры двух сторон на одной машине."""
+
+
+def pipe_commanders() -> Tuple[PipeCommander, PipeCommander]:
+    """Создание пары командиров, соединённых каналами."""
+    first, second = pipe_pair()
+    return PipeCommander(*first), PipeCommander(*second)
+
+
+class SocketPairCommander(Commander):
+    """Командир, соединённый с другой стороной локальной парой сокетов."""
+
+    def __init__(self, client_socket: socket.socket):
+        super().__init__()
+        self._client_socket = client_socket
+
+    def close(self):
+        """Закрытие сокета."""
+        self._client_socket.close()
+
+
+def socket_commanders() -> Tuple[SocketPairCommander, SocketPairCommander]:
+    """Создание пары командиров, соединённых `socket.socketpair`."""
+    first, second = socket.socketpair()
+    return SocketPairCommander(first), SocketPairCommander(second)
+
+
+class LobbyCommander(SubCommander):
+    """Командир-клиент сервера лобби.
+
+    Вместе с согласием на соединение клиент сообщает количество
+    выстрелов за ход, и сервер подбирает ему соперника с тем же
+    количеством. Соединение подтверждается только после подбора
+    соперника, после чего сервер сообщает, кто из игроков ходит первым.
+    """
+
+    def handshake(self, salvo_size: int = 1):
+        """Хэндшейк с количеством выстрелов за ход."""
+        self._send(
+            bytes(const.MSG_CLIENT_CONF)
+            + pack_frame(MessageType.SALVO_SIZE, compress_varint(salvo_size))
+        )
+        self._accept_confirm()
+
+    def receive_turn(self) -> bool:
+        """Получение очерёдности хода: ходит ли игрок первым."""
+        length = self._receive_message(MessageType.TURN)
+        return self._receive_view[:length] == const.MSG_FIRST_TURN
+
+
+class SpectatorCommander(SubCommander):
+    """Командир-зритель сервера лобби.
+
+    Подписывается на трансляцию матча и поддерживает копии полей обоих
+    игроков в том виде, в котором их видят соперники.
+    """
+
+    def __init__(self, server_host: str, port: int = const.PORT):
+        super().__init__(server_host, port)
+        self.replicas = (FieldReplica(), FieldReplica())
+
+    def watch(self, match_id: int):
+        """Подписка на трансляцию матча."""
+        self._send(
+            bytes(const.MSG_WATCHER_CONF)
+            + pack_frame(MessageType.WATCH, compress_varint(match_id))
+        )
+        self._accept_confirm()
+
+    def receive_update(self) -> int:
+        """Получение изменений поля. Возвращает номер игрока."""
+        length = self._receive_message(MessageType.FIELD_UPDATE)
+        player, update = split_update(self._receive_view[:length])
+        if not self.replicas[player].apply(update):
+            raise ProtocolError("Изменения поля не совпали с его версией.")
+        return player
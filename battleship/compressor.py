@@ -1,48 +1,110 @@
 import itertools as it
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple
 
-from battleship.cell import Cell, CellType
-from battleship.field import Field
+from battleship.cell import CellType
+from battleship.field import BaseField, Field, SparseField, is_sparse_size
 from battleship.battleship import MoveResult
 
 
-def compress_field(field: Field) -> bytes:
-    """Превращение игрового поля в байтовые данные."""
-    cells_data = (_comress_cell(cell) for row in field for cell in row)
-    width_data = _compress_number(field.width)
-    height_data = _compress_number(field.height)
+def compress_field(field: BaseField) -> bytes:
+    """Превращение игрового поля в байтовые данные.
 
-    return b"".join(it.chain((width_data, height_data), cells_data))
+    Ширина и высота поля записываются в `compress_varint`, а после них
+    идут битовые слои всех типов клеток в порядке `CellType`: каждый
+    слой - это битборд поля длиной `ceil(W * H / 8)` байт, поэтому
+    кодирование не обходит клетки по одной.
 
+    Большие поля хранятся разреженно (см. `battleship.field.make_field`)
+    и кодируются в `_compress_sparse_field`.
+    """
+    if is_sparse_size(field.width, field.height):
+        return _compress_sparse_field(field)
 
-def decompress_field(field_data: bytes) -> Field:
-    """Получение игрового поля из байтовых данных."""
-    width, height, *cells = field_data
+    layer_size = _layer_size(field.width, field.height)
+    return b"".join(
+        it.chain(
+            (_compress_field_size(field.width, field.height),),
+            (
+                layer.to_bytes(layer_size, byteorder="little")
+                for layer in field.layers
+            ),
+        )
+    )
 
-    field = Field(width, height)
-    for j in range(height):
-        for i, cell in enumerate(cells[j*width:(j+1)*width]):
-            cell = _decomress_cell(cell)
-            field[j][i] = cell
 
-    return field
+def decompress_field(field_data: bytes) -> BaseField:
+    """Получение игрового поля из байтовых данных.
 
+    Битборды поля читаются напрямую из срезов буфера без создания
+    объектов клеток.
+    """
+    data = memoryview(field_data)
+    if data[0] < 0x80 and data[1] < 0x80:
+        # оба размера меньше 128 и занимают по байту
+        width, height, offset = data[0], data[1], 2
+    else:
+        width, offset = decompress_varint(data)
+        height, offset = decompress_varint(data, offset)
+    if is_sparse_size(width, height):
+        return _decompress_sparse_field(width, height, data, offset)
 
-def _comress_cell(cell: Cell) -> bytes:
-    """Превращение клетки игрового поля в байтовые данные."""
-    return _compress_number(cell.type)
+    layer_size = _layer_size(width, height)
 
+    layers = []
+    for _ in CellType:
+        layers.append(
+            int.from_bytes(data[offset:offset+layer_size], byteorder="little")
+        )
+        offset += layer_size
 
-def _decomress_cell(cell_data: int) -> Cell:
-    """Получение клетки игрового поля из числовых данных."""
-    cell_type = CellType.DEFAULT
-    i = 0
-    while (factor := 2**i) <= cell_data:
-        if factor & cell_data:
-            cell_type |= CellType(factor)
-        i += 1
+    return Field.from_layers(width, height, layers)
 
-    return Cell(cell_type)
+
+def _compress_sparse_field(field: SparseField) -> bytes:
+    """Превращение разреженного поля в байтовые данные.
+
+    После размеров поля идёт количество отмеченных клеток, а затем для
+    каждой клетки по возрастанию номеров - расстояние от предыдущей
+    клетки и байт типа клетки. Числа записываются в `compress_varint`.
+    """
+    data = bytearray(_compress_field_size(field.width, field.height))
+    data += compress_varint(len(field.cells))
+    previous = 0
+    for cell in sorted(field.cells):
+        data += compress_varint(cell - previous)
+        data.append(field.cells[cell])
+        previous = cell
+    return bytes(data)
+
+
+def _decompress_sparse_field(
+    width: int, height: int, data: memoryview, offset: int
+) -> SparseField:
+    """Получение разреженного поля из данных с позиции `offset`."""
+    count, offset = decompress_varint(data, offset)
+    cells = {}
+    cell = 0
+    for _ in range(count):
+        gap, offset = decompress_varint(data, offset)
+        cell += gap
+        cells[cell] = CellType(data[offset])
+        offset += 1
+    return SparseField.from_cells(width, height, cells)
+
+
+def _compress_field_size(width: int, height: int) -> bytes:
+    """Превращение размеров поля в байтовые данные."""
+    if width < 0x80 and height < 0x80:
+        return bytes((width, height))
+    data = bytearray()
+    write_varint(data, width)
+    write_varint(data, height)
+    return bytes(data)
+
+
+def _layer_size(width: int, height: int) -> int:
+    """Размер битового слоя поля в байтах."""
+    return (width*height + 7) // 8
 
 
 def _compress_number(number: int) -> bytes:
@@ -55,18 +117,111 @@ def _decompress_number(number_data: bytes) -> int:
     return int.from_bytes(number_data, byteorder="big")
 
 
+def compress_varint(number: int) -> bytes:
+    """Превращение неотрицательного числа в байты переменной длины.
+
+    В каждом байте 7 младших битов хранят очередные 7 бит числа, начиная
+    с младших, а старший бит отмечает, что за байтом следует ещё один.
+    """
+    data = bytearray()
+    write_varint(data, number)
+    return bytes(data)
+
+
+def write_varint(buffer: bytearray, number: int):
+    """Дописывание числа в формате `compress_varint` в конец буфера."""
+    while number >= 0x80:
+        buffer.append(number & 0x7F | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def decompress_varint(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    """Получение числа из байт переменной длины.
+
+    Возвращает число и позицию в данных сразу после него.
+    """
+    number = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return number, offset
+        shift += 7
+
+
 def compress_coords(cell_x: int, cell_y: int) -> bytes:
-    """Превращение координат клетки в байтовые данные."""
-    # добавление единицы нужно для того, чтобы число 0 имело байтовое
-    # представление (изначально, он выдаёт b"")
-    return b"".join((_compress_number(cell_x+1), _compress_number(cell_y+1)))
+    """Превращение координат клетки в байтовые данные.
+
+    Координаты записываются числами переменной длины, поэтому на поле
+    10x10 занимают 2 байта, а на больших полях - столько, сколько нужно.
+    """
+    if cell_x < 0x80 and cell_y < 0x80:
+        return bytes((cell_x, cell_y))
+    data = bytearray()
+    write_coords(data, cell_x, cell_y)
+    return bytes(data)
+
+
+def write_coords(buffer: bytearray, cell_x: int, cell_y: int):
+    """Дописывание координат клетки в конец буфера."""
+    if cell_x < 0x80 and cell_y < 0x80:
+        buffer.append(cell_x)
+        buffer.append(cell_y)
+        return
+    write_varint(buffer, cell_x)
+    write_varint(buffer, cell_y)
 
 
 def decomress_coords(coords_data: bytes) -> Tuple[int, int]:
-    """Получение координат клетки из байтовых данных."""
-    cell_x, cell_y = coords_data
-    # вычитание единицы происходит вследствие работы `compress_coords`
-    return cell_x-1, cell_y-1
+    """Получение координат клетки из байтовых данных.
+
+    Читаются только байты координат, поэтому данными может быть и буфер,
+    в начале которого лежит сообщение.
+    """
+    # обе координаты меньше 128 и занимают по байту; второй байт есть
+    # всегда: это либо вторая координата, либо продолжение первой
+    cell_x = coords_data[0]
+    cell_y = coords_data[1]
+    if cell_x < 0x80 and cell_y < 0x80:
+        return cell_x, cell_y
+    cell_x, offset = decompress_varint(coords_data)
+    cell_y, _ = decompress_varint(coords_data, offset)
+    return cell_x, cell_y
+
+
+def compress_salvo(cells: Sequence[Tuple[int, int]]) -> bytes:
+    """Превращение координат клеток залпа в байтовые данные."""
+    data = bytearray()
+    write_salvo(data, cells)
+    return bytes(data)
+
+
+def write_salvo(buffer: bytearray, cells: Sequence[Tuple[int, int]]):
+    """Дописывание координат клеток залпа в конец буфера."""
+    for (cell_x, cell_y) in cells:
+        write_coords(buffer, cell_x, cell_y)
+
+
+def decompress_salvo(
+    salvo_data: bytes, length: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """Получение координат клеток залпа из первых `length` байт данных."""
+    length = len(salvo_data) if length is None else length
+    cells = []
+    offset = 0
+    while offset < length:
+        cell_x = salvo_data[offset]
+        cell_y = salvo_data[offset + 1]
+        if cell_x < 0x80 and cell_y < 0x80:
+            offset += 2
+        else:
+            cell_x, offset = decompress_varint(salvo_data, offset)
+            cell_y, offset = decompress_varint(salvo_data, offset)
+        cells.append((cell_x, cell_y))
+    return cells
 
 
 def compress_move_result(move_result: MoveResult) -> bytes:
@@ -74,6 +229,43 @@ def compress_move_result(move_result: MoveResult) -> bytes:
     return _compress_number(int(move_result))
 
 
-def decompress_move_result(move_result_data: bytes) -> MoveResult:
-    """Получение результата хода из байтовых данных."""
-    return MoveResult(_decompress_number(move_result_data))
+def write_move_result(buffer: bytearray, move_result: MoveResult):
+    """Дописывание результата хода в конец буфера.
+
+    Все результаты хода меньше 256, поэтому `compress_move_result`
+    кодирует их одним байтом.
+    """
+    buffer.append(move_result)
+
+
+def decompress_move_result(
+    move_result_data: bytes, length: Optional[int] = None
+) -> MoveResult:
+    """Получение результата хода из первых `length` байт данных."""
+    if length is None:
+        return MoveResult(_decompress_number(move_result_data))
+
+    number = 0
+    for i in range(length):
+        number = number << 8 | move_result_data[i]
+    return MoveResult(number)
+
+
+def compress_move_results(move_results: Sequence[MoveResult]) -> bytes:
+    """Превращение результатов залпа в байтовые данные, по байту на выстрел."""
+    return bytes(move_results)
+
+
+def write_move_results(
+    buffer: bytearray, move_results: Sequence[MoveResult]
+):
+    """Дописывание результатов залпа в конец буфера."""
+    buffer.extend(move_results)
+
+
+def decompress_move_results(
+    move_results_data: bytes, length: Optional[int] = None
+) -> List[MoveResult]:
+    """Получение результатов залпа из первых `length` байт данных."""
+    length = len(move_results_data) if length is None else length
+    return [MoveResult(move_results_data[i]) for i in range(length)]
@@ -2,9 +2,35 @@
 
 PORT = 1024
 
-MOVE_RESULT_MESSAGE_SIZE = 1
-MOVE_COORDS_MESSAGE_SIZE = 2
+# длина корабля и количество таких кораблей во флоте
+DEFAULT_FLEET = {
+    4: 1,
+    3: 2,
+    2: 3,
+    1: 4,
+}
+
+# наибольшая площадь поля, которое хранится битбордами; поля большей
+# площади хранятся разреженно (см. `battleship.field.SparseField`)
+MAX_DENSE_AREA = 256 * 256
+
+PROTOCOL_VERSION = 4
+FRAME_HEADER_SIZE = 4
 CONFIRM_MESSAGE_SIZE = 2
 
 MSG_CLIENT_CONF = bytearray(map(ord, "CC"))
 MSG_SERVER_CONF = bytearray(map(ord, "SC"))
+MSG_WATCHER_CONF = bytearray(map(ord, "WC"))
+
+# сообщения об очерёдности хода, которые сервер лобби отправляет
+# игрокам после подбора соперника
+MSG_FIRST_TURN = b"\x01"
+MSG_SECOND_TURN = b"\x00"
+
+# интервал отправки сообщений `KEEPALIVE` в секундах; если от соперника
+# ничего не приходит дольше `PEER_TIMEOUT`, соединение считается
+# потерянным
+KEEPALIVE_INTERVAL = 5.0
+PEER_TIMEOUT = 30.0
+# время на ход игрока в секундах
+TURN_TIMEOUT = 120.0
@@ -0,0 +1,155 @@
+from collections import deque
+from enum import IntEnum
+from typing import Iterator, Optional, Tuple
+
+from battleship.compressor import (
+    compress_field,
+    compress_varint,
+    decompress_field,
+    decompress_varint,
+)
+from battleship.field import BaseField, FieldState
+
+
+HISTORY_DEPTH = 64
+
+
+class UpdateKind(IntEnum):
+    """Вид обновления поля."""
+
+    DELTA = 0
+    SNAPSHOT = 1
+
+
+class FieldHistory:
+    """История версий игрового поля на стороне отправителя.
+
+    Хранит снимки нескольких последних версий поля, чтобы получатель,
+    знающий одну из них, мог догнать текущую версию по изменённым
+    клеткам. Если версия получателя уже забыта или неизвестна,
+    отправляется снимок поля целиком.
+    """
+
+    def __init__(self, field: BaseField, depth: int = HISTORY_DEPTH):
+        self.field = field
+        self.version = 0
+        self._versions = deque([(0, field.snapshot())], maxlen=depth)
+
+    def commit(self) -> int:
+        """Фиксация текущего состояния поля новой версией."""
+        changed = self.field.changed_cells(self._versions[-1][1])
+        if next(changed, None) is not None:
+            self.version += 1
+            self._versions.append((self.version, self.field.snapshot()))
+        return self.version
+
+    def encode(self, since: Optional[int] = None) -> bytes:
+        """Получение обновления с версии `since` до текущей версии.
+
+        Обновление состоит из вида, версии поля после обновления и
+        содержимого. Для изменений содержимое - это базовая версия,
+        количество серий и сами серии подряд идущих клеток одного типа:
+        отступ от конца предыдущей серии, длина серии и тип клеток.
+        Незафиксированные изменения поля сначала фиксируются, чтобы версия
+        обновления соответствовала его содержимому.
+        """
+        self.commit()
+        base_state = self._find(since)
+        if base_state is None:
+            return b"".join((
+                bytes((UpdateKind.SNAPSHOT,)),
+                compress_varint(self.version),
+                compress_field(self.field),
+            ))
+
+        runs = list(_iter_runs(self.field, base_state))
+        data = [
+            bytes((UpdateKind.DELTA,)),
+            compress_varint(self.version),
+            compress_varint(since),
+            compress_varint(len(runs)),
+        ]
+        end = 0
+        for (start, length, cell_type) in runs:
+            data.append(compress_varint(start - end))
+            data.append(compress_varint(length))
+            data.append(bytes((cell_type,)))
+            end = start + length
+        return b"".join(data)
+
+    def _find(self, version: Optional[int]) -> Optional[FieldState]:
+        """Поиск снимка поля заданной версии."""
+        if version is None:
+            return None
+        for (known_version, state) in self._versions:
+            if known_version == version:
+                return state
+        return None
+
+
+class FieldReplica:
+    """Копия игрового поля на стороне получателя.
+
+    Применяет обновления от `FieldHistory`. Если изменения посчитаны
+    не от текущей версии копии, они не применяются, и получателю нужно
+    запросить обновление со своей версии (или снимок поля).
+    """
+
+    def __init__(self):
+        self.field: Optional[BaseField] = None
+        self.version: Optional[int] = None
+
+    def apply(self, update: bytes) -> bool:
+        """Применение обновления. Возвращает, удалось ли его применить."""
+        data = memoryview(update)
+        kind = UpdateKind(data[0])
+        version, offset = decompress_varint(data, 1)
+
+        if kind == UpdateKind.SNAPSHOT:
+            self.field = decompress_field(data[offset:])
+            self.version = version
+            return True
+
+        base, offset = decompress_varint(data, offset)
+        if self.field is None or base != self.version:
+            return False
+
+        runs_count, offset = decompress_varint(data, offset)
+        cell = 0
+        for _ in range(runs_count):
+            gap, offset = decompress_varint(data, offset)
+            length, offset = decompress_varint(data, offset)
+            cell_type = data[offset]
+            offset += 1
+
+            cell += gap
+            self.field.fill_cells(cell_type, cell, length)
+            cell += length
+
+        self.version = version
+        return True
+
+
+def _iter_runs(
+    field: BaseField, base_state: FieldState
+) -> Iterator[Tuple[int, int, int]]:
+    """Серии изменённых клеток: начало серии, её длина и тип клеток."""
+    run_start = run_length = run_type = None
+    for cell in field.changed_cells(base_state):
+        y, x = divmod(cell, field.width)
+        cell_type = field.get_type(x, y)
+
+        if (
+            run_start is not None
+            and cell == run_start + run_length
+            and cell_type == run_type
+        ):
+            run_length += 1
+            continue
+
+        if run_start is not None:
+            yield run_start, run_length, run_type
+        run_start, run_length, run_type = cell, 1, cell_type
+
+    if run_start is not None:
+        yield run_start, run_length, run_type
@@ -2,5 +2,13 @@ class CouldNotConfirmError(Exception):
     """Соглашение на соединение было отклонено."""
 
 
+class ProtocolError(Exception):
+    """Другая сторона нарушила протокол обмена сообщениями."""
+
+
 class InvalidCommand(Exception):
     """Пользователь ввёл команду неправильного вида."""
+
+
+class CouldNotPlaceShipsError(Exception):
+    """Флот не удалось расставить на поле."""
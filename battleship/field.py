@@ -1,22 +1,373 @@
-from typing import Iterator, List
+import abc
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 
-from battleship.cell import Cell
+from battleship import const
+from battleship.cell import Cell, CellType
 
 
-class Field(list):
-    """Игровое поле."""
+# снимок клеток поля: битборды слоёв плотного поля или пары "номер
+# клетки - тип клетки" разреженного
+FieldState = Union[Tuple[int, ...], Tuple[Tuple[int, CellType], ...]]
 
-    def __init__(self, width: int, height: int):
-        self.width = width
-        self.height = height
-        super().__init__(
-            [[Cell() for _ in range(self.width)] for _ in range(self.height)]
-        )
 
-    def as_transposed(self) -> Iterator[List[Cell]]:
+class BaseField(abc.ABC):
+    """Общая часть игровых полей: индексация рядов и клеток."""
+
+    width: int
+    height: int
+
+    def __getitem__(self, y: int) -> "FieldRow":
+        if not 0 <= y < self.height:
+            raise IndexError("Ряд вне поля.")
+        return FieldRow(self, y)
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __iter__(self) -> Iterator["FieldRow"]:
+        for y in range(self.height):
+            yield FieldRow(self, y)
+
+    @abc.abstractmethod
+    def has_type(self, x: int, y: int, cell_type: CellType) -> bool:
+        """Отмечен ли в клетке заданный тип."""
+
+    @abc.abstractmethod
+    def add_type(self, x: int, y: int, cell_type: CellType):
+        """Отметка заданного типа в клетке."""
+
+    @abc.abstractmethod
+    def add_cells(self, cell_type: CellType, cells: Iterable[int]):
+        """Отметка заданного типа в клетках с номерами `y * width + x`."""
+
+    @abc.abstractmethod
+    def get_type(self, x: int, y: int) -> CellType:
+        """Получение типа клетки."""
+
+    @abc.abstractmethod
+    def set_type(self, x: int, y: int, cell_type: CellType):
+        """Замена типа клетки."""
+
+    @abc.abstractmethod
+    def snapshot(self) -> FieldState:
+        """Получение неизменяемого снимка клеток поля."""
+
+    @abc.abstractmethod
+    def restore(self, state: FieldState):
+        """Восстановление клеток поля из снимка."""
+
+    @abc.abstractmethod
+    def changed_cells(self, state: FieldState) -> Iterator[int]:
+        """Номера клеток, тип которых отличается от снимка, по возрастанию."""
+
+    @abc.abstractmethod
+    def fill_cells(self, cell_type: CellType, start: int, length: int):
+        """Замена типа `length` клеток подряд, начиная с номера `start`."""
+
+    @abc.abstractmethod
+    def row_layers(self) -> List[Tuple[int, ...]]:
+        """Биты каждого ряда поля в каждом слое `CellType`.
+
+        Бит x числа слоя отмечает, есть ли тип этого слоя в клетке x ряда.
+        """
+
+    def as_transposed(self) -> Iterator[Tuple[Cell, ...]]:
         """Итерирование по транспонированному полю.
 
         Нужно для удобной проверки как горизонтальных, так и вертикальных
         положений кораблей.
         """
         yield from zip(*self)
+
+
+class Field(BaseField):
+    """Игровое поле.
+
+    Каждый слой `CellType` хранится отдельным целым числом-битбордом,
+    в котором клетке (x, y) соответствует бит под номером `y * width + x`.
+    Индексация `field[y][x]` сохранена в виде лёгких представлений рядов и
+    клеток, поэтому с полем можно работать и как со списком списков клеток.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.full_mask = (1 << (width * height)) - 1
+        # слои упорядочены так же, как и `CellType`, и изначально
+        # все клетки имеют тип `CellType.DEFAULT`
+        self.layers = [0] * len(CellType)
+        self.layers[_layer_index(CellType.DEFAULT)] = self.full_mask
+
+    @classmethod
+    def from_layers(
+        cls, width: int, height: int, layers: List[int]
+    ) -> "Field":
+        """Создание поля из готовых битбордов слоёв."""
+        field = cls(width, height)
+        field.layers = [layer & field.full_mask for layer in layers]
+        return field
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Field):
+            return NotImplemented
+        return (
+            (self.width, self.height, self.layers)
+            == (other.width, other.height, other.layers)
+        )
+
+    def bit(self, x: int, y: int) -> int:
+        """Получение бита клетки."""
+        return 1 << (y * self.width + x)
+
+    def get_layer(self, cell_type: CellType) -> int:
+        """Получение битборда клеток заданного типа."""
+        return self.layers[_layer_index(cell_type)]
+
+    def set_layer(self, cell_type: CellType, layer: int):
+        """Замена битборда клеток заданного типа."""
+        self.layers[_layer_index(cell_type)] = layer & self.full_mask
+
+    def has_type(self, x: int, y: int, cell_type: CellType) -> bool:
+        """Отмечен ли в клетке заданный тип."""
+        layer = self.layers[_layer_index(cell_type)]
+        return bool(layer >> (y*self.width + x) & 1)
+
+    def add_type(self, x: int, y: int, cell_type: CellType):
+        """Отметка заданного типа в клетке."""
+        self.layers[_layer_index(cell_type)] |= 1 << (y*self.width + x)
+
+    def add_cells(self, cell_type: CellType, cells: Iterable[int]):
+        """Отметка заданного типа в клетках с номерами `y * width + x`."""
+        mask = 0
+        for cell in cells:
+            mask |= 1 << cell
+        self.layers[_layer_index(cell_type)] |= mask
+
+    def get_type(self, x: int, y: int) -> CellType:
+        """Получение типа клетки."""
+        shift = y*self.width + x
+        value = 0
+        for i, layer in enumerate(self.layers):
+            value |= (layer >> shift & 1) << i
+        return CellType(value)
+
+    def set_type(self, x: int, y: int, cell_type: CellType):
+        """Замена типа клетки."""
+        bit = 1 << (y*self.width + x)
+        for i in range(len(self.layers)):
+            if cell_type >> i & 1:
+                self.layers[i] |= bit
+            else:
+                self.layers[i] &= ~bit
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """Получение неизменяемого снимка клеток поля.
+
+        Битборды - неизменяемые числа, поэтому снимок копирует только
+        ссылки на слои, а не сами клетки.
+        """
+        return tuple(self.layers)
+
+    def restore(self, state: Tuple[int, ...]):
+        """Восстановление клеток поля из снимка."""
+        self.layers = list(state)
+
+    def changed_cells(self, state: Tuple[int, ...]) -> Iterator[int]:
+        """Номера клеток, тип которых отличается от снимка, по возрастанию."""
+        changed = 0
+        for (layer, state_layer) in zip(self.layers, state):
+            changed |= layer ^ state_layer
+        while changed:
+            yield (changed & -changed).bit_length() - 1
+            changed &= changed - 1
+
+    def fill_cells(self, cell_type: CellType, start: int, length: int):
+        """Замена типа `length` клеток подряд, начиная с номера `start`."""
+        run_mask = ((1 << length) - 1) << start
+        for i in range(len(self.layers)):
+            if cell_type >> i & 1:
+                self.layers[i] |= run_mask
+            else:
+                self.layers[i] &= ~run_mask
+
+    def row_layers(self) -> List[Tuple[int, ...]]:
+        """Биты каждого ряда поля в каждом слое `CellType`."""
+        row_mask = (1 << self.width) - 1
+        return [
+            tuple(
+                layer >> (y * self.width) & row_mask for layer in self.layers
+            )
+            for y in range(self.height)
+        ]
+
+
+class SparseField(BaseField):
+    """Разреженное игровое поле.
+
+    Битборды занимают память пропорционально площади поля, поэтому на
+    больших полях хранятся только клетки, тип которых отличается от
+    `CellType.DEFAULT`, в словаре "номер клетки - тип клетки". Так память
+    растёт с количеством кораблей и выстрелов, а не с площадью поля.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.cells: Dict[int, CellType] = {}
+
+    @classmethod
+    def from_cells(
+        cls, width: int, height: int, cells: Dict[int, CellType]
+    ) -> "SparseField":
+        """Создание поля из готового словаря клеток."""
+        field = cls(width, height)
+        field.cells = {
+            cell: cell_type
+            for (cell, cell_type) in cells.items()
+            if cell_type != CellType.DEFAULT
+        }
+        return field
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SparseField):
+            return NotImplemented
+        return (
+            (self.width, self.height, self.cells)
+            == (other.width, other.height, other.cells)
+        )
+
+    def has_type(self, x: int, y: int, cell_type: CellType) -> bool:
+        """Отмечен ли в клетке заданный тип."""
+        cell = y*self.width + x
+        return bool(self.cells.get(cell, CellType.DEFAULT) & cell_type)
+
+    def add_type(self, x: int, y: int, cell_type: CellType):
+        """Отметка заданного типа в клетке."""
+        self.add_cells(cell_type, (y*self.width + x,))
+
+    def add_cells(self, cell_type: CellType, cells: Iterable[int]):
+        """Отметка заданного типа в клетках с номерами `y * width + x`."""
+        for cell in cells:
+            self.cells[cell] = (
+                self.cells.get(cell, CellType.DEFAULT) | cell_type
+            )
+
+    def get_type(self, x: int, y: int) -> CellType:
+        """Получение типа клетки."""
+        return self.cells.get(y*self.width + x, CellType.DEFAULT)
+
+    def set_type(self, x: int, y: int, cell_type: CellType):
+        """Замена типа клетки."""
+        cell = y*self.width + x
+        if cell_type == CellType.DEFAULT:
+            self.cells.pop(cell, None)
+        else:
+            self.cells[cell] = cell_type
+
+    def snapshot(self) -> Tuple[Tuple[int, CellType], ...]:
+        """Получение неизменяемого снимка клеток поля."""
+        return tuple(self.cells.items())
+
+    def restore(self, state: Tuple[Tuple[int, CellType], ...]):
+        """Восстановление клеток поля из снимка."""
+        self.cells = dict(state)
+
+    def changed_cells(
+        self, state: Tuple[Tuple[int, CellType], ...]
+    ) -> Iterator[int]:
+        """Номера клеток, тип которых отличается от снимка, по возрастанию."""
+        state_cells = dict(state)
+        for cell in sorted(self.cells.keys() | state_cells.keys()):
+            if self.cells.get(cell) != state_cells.get(cell):
+                yield cell
+
+    def fill_cells(self, cell_type: CellType, start: int, length: int):
+        """Замена типа `length` клеток подряд, начиная с номера `start`."""
+        for cell in range(start, start + length):
+            if cell_type == CellType.DEFAULT:
+                self.cells.pop(cell, None)
+            else:
+                self.cells[cell] = CellType(cell_type)
+
+    def row_layers(self) -> List[Tuple[int, ...]]:
+        """Биты каждого ряда поля в каждом слое `CellType`.
+
+        Ряды собираются одним проходом по отмеченным клеткам, а клетки
+        `CellType.DEFAULT` добавляются в конце.
+        """
+        rows = [[0] * len(CellType) for _ in range(self.height)]
+        marked = [0] * self.height
+        default = _layer_index(CellType.DEFAULT)
+        for (cell, cell_type) in self.cells.items():
+            y, x = divmod(cell, self.width)
+            marked[y] |= 1 << x
+            for i in range(len(CellType)):
+                if cell_type >> i & 1:
+                    rows[y][i] |= 1 << x
+        row_mask = (1 << self.width) - 1
+        for (y, row) in enumerate(rows):
+            row[default] |= row_mask & ~marked[y]
+        return [tuple(row) for row in rows]
+
+
+def is_sparse_size(width: int, height: int) -> bool:
+    """Хранится ли поле заданного размера разреженно."""
+    return width * height > const.MAX_DENSE_AREA
+
+
+def make_field(width: int, height: int) -> BaseField:
+    """Создание поля: плотного для небольших полей, иначе разреженного."""
+    if is_sparse_size(width, height):
+        return SparseField(width, height)
+    return Field(width, height)
+
+
+class FieldRow:
+    """Представление ряда игрового поля."""
+
+    def __init__(self, field: BaseField, y: int):
+        self._field = field
+        self._y = y
+
+    def __getitem__(self, x: int) -> "FieldCell":
+        if not 0 <= x < self._field.width:
+            raise IndexError("Клетка вне поля.")
+        return FieldCell(self._field, x, self._y)
+
+    def __setitem__(self, x: int, cell: Cell):
+        if not 0 <= x < self._field.width:
+            raise IndexError("Клетка вне поля.")
+        self._field.set_type(x, self._y, cell.type)
+
+    def __len__(self) -> int:
+        return self._field.width
+
+    def __iter__(self) -> Iterator["FieldCell"]:
+        for x in range(self._field.width):
+            yield FieldCell(self._field, x, self._y)
+
+
+class FieldCell(Cell):
+    """Представление клетки игрового поля.
+
+    Тип клетки не хранится в самом объекте, а читается из поля
+    и записывается в него, поэтому все методы `Cell` изменяют само поле.
+    """
+
+    def __init__(self, field: BaseField, x: int, y: int):
+        self._field = field
+        self._x = x
+        self._y = y
+
+    @property
+    def type(self) -> CellType:
+        return self._field.get_type(self._x, self._y)
+
+    @type.setter
+    def type(self, cell_type: CellType):
+        self._field.set_type(self._x, self._y, cell_type)
+
+
+def _layer_index(cell_type: CellType) -> int:
+    """Получение номера слоя, в котором хранится заданный тип клеток."""
+    return cell_type.bit_length() - 1
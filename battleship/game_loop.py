@@ -0,0 +1,351 @@
+"""Игра по сети в цикле событий.
+
+Цикл событий `EventLoop` на `selectors` ждёт одновременно ввода игрока,
+данных от другой стороны и таймеров, поэтому поле перерисовывается
+сразу после хода соперника, даже если игрок в это время набирает свой
+ход, а разрыв соединения замечается без ожидания ввода.
+
+Ввод читается из файлового дескриптора, поэтому цикл работает только
+там, где `selectors` умеет ждать консоль (не в Windows).
+"""
+
+import heapq
+import itertools
+import os
+import selectors
+import time
+from typing import Callable, List, Optional, Tuple
+
+from battleship import const, metrics
+from battleship.battleship import Battleship, MoveResult
+from battleship.command_parser import parse_command
+from battleship.commander import Commander
+from battleship.exceptions import InvalidCommand, ProtocolError
+from battleship.printer import Renderer
+from battleship.protocol import MessageType
+
+
+# сообщения об итоге игры
+RESULT_MESSAGES = {
+    "win": "Вы победили!",
+    "loss": "Вы проиграли!",
+    "timeout": "Время хода истекло, вы проиграли!",
+    "disconnected": "Соединение с соперником потеряно.",
+}
+
+
+class Timer:
+    """Отложенный вызов, который можно отменить."""
+
+    def __init__(self, when: float, callback: Callable[[], None]):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Отмена вызова."""
+        self.cancelled = True
+
+
+class EventLoop:
+    """Цикл событий: чтение дескрипторов и таймеры."""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        # куча таймеров: время вызова, порядковый номер и таймер
+        self._timers: List[Tuple[float, int, Timer]] = []
+        self._counter = itertools.count()
+        self._running = False
+
+    def add_reader(self, fd: int, callback: Callable[[], None]):
+        """Вызов `callback`, когда из дескриптора можно читать."""
+        self._selector.register(fd, selectors.EVENT_READ, callback)
+
+    def remove_reader(self, fd: int):
+        """Прекращение ожидания чтения из дескриптора."""
+        self._selector.unregister(fd)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> Timer:
+        """Вызов `callback` через `delay` секунд."""
+        timer = Timer(time.monotonic() + delay, callback)
+        heapq.heappush(self._timers, (timer.when, next(self._counter), timer))
+        return timer
+
+    def run(self):
+        """Обработка событий до вызова `stop`."""
+        self._running = True
+        while self._running:
+            for key, _ in self._selector.select(self._next_timeout()):
+                key.data()
+                if not self._running:
+                    return
+            self._run_timers()
+
+    def stop(self):
+        """Остановка цикла после текущего события."""
+        self._running = False
+
+    def close(self):
+        """Закрытие цикла."""
+        self._selector.close()
+
+    def _next_timeout(self) -> Optional[float]:
+        """Время ожидания событий до ближайшего таймера."""
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return None
+        return max(self._timers[0][0] - time.monotonic(), 0.0)
+
+    def _run_timers(self):
+        """Вызов наступивших таймеров."""
+        now = time.monotonic()
+        while self._running and self._timers and self._timers[0][0] <= now:
+            _, _, timer = heapq.heappop(self._timers)
+            if not timer.cancelled:
+                timer.callback()
+
+
+class GameSession:
+    """Игра по сети в цикле событий.
+
+    Пока ход соперника, поле перерисовывается сразу после каждого его
+    выстрела, а в свой ход игрок вводит координаты, не блокируя приём
+    сообщений. Каждые `keepalive_interval` секунд другой стороне
+    отправляется `KEEPALIVE`. Если в ожидании соперника от него ничего
+    не приходит `peer_timeout` секунд, соединение считается потерянным,
+    а если игрок не сделал ход за `turn_timeout` секунд, он проигрывает
+    и сообщает другой стороне, что сдался (`MessageType.FORFEIT`).
+    """
+
+    def __init__(
+        self,
+        loop: EventLoop,
+        channel: Commander,
+        first_turn: bool,
+        salvo_size: int = 1,
+        input_fd: int = 0,
+        renderer: Optional[Renderer] = None,
+        keepalive_interval: float = const.KEEPALIVE_INTERVAL,
+        peer_timeout: float = const.PEER_TIMEOUT,
+        turn_timeout: float = const.TURN_TIMEOUT,
+    ):
+        self.loop = loop
+        self.channel = channel
+        self.salvo_size = salvo_size
+        self.input_fd = input_fd
+        self.renderer = renderer or Renderer()
+        self.keepalive_interval = keepalive_interval
+        self.peer_timeout = peer_timeout
+        self.turn_timeout = turn_timeout
+        self.result: Optional[str] = None
+
+        self.our_battleship = Battleship(10, 10)
+        self.our_battleship.place_ships()
+        self.enemy_battleship = Battleship(10, 10)
+
+        self._turn = first_turn
+        # клетки хода, который набирает игрок или который уже отправлен
+        self._cells: List[Tuple[int, int]] = []
+        self._awaiting_results = False
+        self._input_buffer = b""
+        self._input_open = True
+        self._keepalive_timer: Optional[Timer] = None
+        self._peer_timer: Optional[Timer] = None
+        self._turn_timer: Optional[Timer] = None
+
+    def play(self) -> str:
+        """Игра до её окончания. Возвращает итог игры."""
+        self.channel.set_timeout(self.peer_timeout)
+        self.loop.add_reader(self.input_fd, self._on_input)
+        self.loop.add_reader(self.channel.fileno(), self._on_message)
+        self._keepalive_timer = self.loop.call_later(
+            self.keepalive_interval, self._send_keepalive
+        )
+        self._render()
+        if self._turn:
+            self._begin_turn()
+        else:
+            self._wait_for_peer()
+        try:
+            self.loop.run()
+        finally:
+            if self._input_open:
+                self.loop.remove_reader(self.input_fd)
+            self.loop.remove_reader(self.channel.fileno())
+        return self.result
+
+    def _render(self):
+        self.renderer.render(
+            self.our_battleship.field, self.enemy_battleship.field
+        )
+
+    def _prompt(self):
+        self.renderer.stream.write("Введите координаты хода: ")
+        self.renderer.stream.flush()
+
+    def _begin_turn(self):
+        """Начало хода игрока."""
+        _cancel(self._peer_timer)
+        self._turn_timer = self.loop.call_later(
+            self.turn_timeout, self._forfeit
+        )
+        self._prompt()
+
+    def _wait_for_peer(self):
+        """Начало ожидания сообщения от другой стороны."""
+        _cancel(self._turn_timer)
+        _cancel(self._peer_timer)
+        self._peer_timer = self.loop.call_later(
+            self.peer_timeout, lambda: self._finish("disconnected")
+        )
+
+    def _forfeit(self):
+        """Проигрыш по времени хода."""
+        try:
+            self.channel.send_forfeit()
+        except OSError:
+            pass
+        self._finish("timeout")
+
+    def _send_keepalive(self):
+        try:
+            self.channel.send_keepalive()
+        except OSError:
+            self._finish("disconnected")
+            return
+        self._keepalive_timer = self.loop.call_later(
+            self.keepalive_interval, self._send_keepalive
+        )
+
+    def _on_input(self):
+        """Чтение ввода игрока. Строки вне его хода пропускаются."""
+        data = os.read(self.input_fd, 4096)
+        if not data:
+            # ввод закрыт: ход не будет сделан и проиграется по времени
+            self._input_open = False
+            self.loop.remove_reader(self.input_fd)
+            return
+
+        *lines, self._input_buffer = (self._input_buffer + data).split(b"\n")
+        for line in lines:
+            if self.result is not None:
+                # игра закончилась на одной из предыдущих строк
+                return
+            if self._turn and not self._awaiting_results:
+                self._on_command(line.decode(errors="replace"))
+
+    def _on_command(self, command: str):
+        try:
+            self._cells.append(parse_command(command))
+        except InvalidCommand:
+            self.renderer.stream.write("Неверный формат ввода!\n")
+            self._prompt()
+            return
+
+        if len(self._cells) < self.salvo_size:
+            self._prompt()
+            return
+
+        try:
+            if self.salvo_size == 1:
+                self.channel.send_coords(*self._cells[0])
+            else:
+                self.channel.send_salvo(self._cells)
+        except OSError:
+            self._finish("disconnected")
+            return
+        self._awaiting_results = True
+        self._wait_for_peer()
+
+    def _on_message(self):
+        """Получение сообщения от другой стороны."""
+        try:
+            message_type = self.channel.receive_message_type()
+            if message_type == MessageType.KEEPALIVE:
+                if not self._turn or self._awaiting_results:
+                    self._wait_for_peer()
+                return
+            if self.channel.peer_forfeited():
+                self._finish("win")
+                return
+            move_result = (
+                self._receive_results()
+                if self._turn
+                else self._receive_shot()
+            )
+        except (OSError, ProtocolError):
+            self._finish("disconnected")
+            return
+
+        self._render()
+        if move_result.is_win:
+            self._finish("win" if self._turn else "loss")
+        elif self._turn:
+            self._awaiting_results = False
+            self._cells = []
+            if move_result.is_miss:
+                self._turn = False
+                self._wait_for_peer()
+            else:
+                self._begin_turn()
+        elif move_result.is_miss:
+            self._turn = True
+            self._begin_turn()
+        else:
+            self._wait_for_peer()
+
+    def _receive_results(self) -> MoveResult:
+        """Получение результатов хода игрока."""
+        if not self._awaiting_results:
+            raise ProtocolError("Сообщение другой стороны не в её ход.")
+        if self.salvo_size == 1:
+            move_result = self.channel.receive_move_result()
+            self.enemy_battleship.update_cell(*self._cells[0], move_result)
+            return move_result
+
+        move_results = self.channel.receive_salvo_results()
+        self.enemy_battleship.update_cells(self._cells, move_results)
+        return salvo_outcome(move_results)
+
+    def _receive_shot(self) -> MoveResult:
+        """Получение хода соперника и отправка его результатов."""
+        if self.salvo_size == 1:
+            cell_x, cell_y = self.channel.receive_coords()
+            move_result = self.our_battleship.hit_cell(cell_x, cell_y)
+            self.channel.send_move_result(move_result)
+            return move_result
+
+        cells = self.channel.receive_salvo()
+        move_results = self.our_battleship.hit_cells(cells)
+        self.channel.send_salvo_results(move_results)
+        return salvo_outcome(move_results)
+
+    def _finish(self, result: str):
+        """Окончание игры."""
+        _cancel(self._keepalive_timer)
+        _cancel(self._peer_timer)
+        _cancel(self._turn_timer)
+        self.result = result
+        self.renderer.clear()
+        self.renderer.stream.write(RESULT_MESSAGES[result] + "\n")
+        metrics.end_game(result=result)
+        self.loop.stop()
+
+
+def salvo_outcome(move_results: List[MoveResult]) -> MoveResult:
+    """Итог залпа для очерёдности ходов.
+
+    Залп победный, если победным был один из выстрелов, и промах, если
+    все выстрелы прошли мимо. Иначе игрок попал и ходит снова.
+    """
+    if any(move_result.is_win for move_result in move_results):
+        return MoveResult.WIN
+    elif all(move_result.is_miss for move_result in move_results):
+        return MoveResult.MISS
+    return MoveResult.DAMAGED
+
+
+def _cancel(timer: Optional[Timer]):
+    if timer is not None:
+        timer.cancel()
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import multiprocessing
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from battleship.ai import RandomShooter
+from battleship.battleship import Battleship
+from battleship.commander import LobbyCommander
+from battleship.exceptions import CouldNotConfirmError, ProtocolError
+from battleship.pool import DEFAULT_POOL_SIZE, FleetPool
+from battleship.server import GameServer
+
+
+class ClientResult(NamedTuple):
+    """Результат одного клиента нагрузочного теста."""
+
+    handshake_failed: bool = False
+    error: bool = False
+    won: bool = False
+    turns: int = 0
+    # время от отправки координат до получения результата хода, в секундах
+    latencies: Tuple[float, ...] = ()
+
+
+class LoadStats:
+    """Сводная статистика нагрузочного теста."""
+
+    def __init__(self):
+        self.clients = 0
+        self.matches = 0
+        self.turns = 0
+        self.handshake_failures = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.latencies: List[float] = []
+
+    def add(self, result: ClientResult):
+        """Учёт результата клиента."""
+        self.clients += 1
+        self.matches += result.won
+        self.turns += result.turns
+        self.handshake_failures += result.handshake_failed
+        self.errors += result.error
+        self.latencies.extend(result.latencies)
+
+    @property
+    def turns_per_second(self) -> float:
+        """Количество ходов во всех матчах за секунду."""
+        if not self.duration:
+            return 0.0
+        return self.turns / self.duration
+
+    def percentile(self, q: float) -> float:
+        """Перцентиль времени хода (`q` от 0 до 100)."""
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        rank = min(int(q / 100 * len(latencies)), len(latencies) - 1)
+        return latencies[rank]
+
+
+def play_client(
+    host: str,
+    port: int,
+    pool: FleetPool,
+    seed: Optional[int] = None,
+    timeout: float = 10.0,
+) -> ClientResult:
+    """Игра клиента по сценарию: стрельба по случайным клеткам.
+
+    Клиент говорит с сервером тем же протоколом, что и игрок в режиме
+    лобби, а корабли берёт из пула готовых расстановок, чтобы их
+    расстановка не попадала в замеры.
+    """
+    rng = random.Random(seed)
+    our_battleship = Battleship(10, 10)
+    our_battleship.adopt_ships(pool.get(10, 10))
+    shooter = RandomShooter(Battleship(10, 10), rng)
+
+    latencies = []
+    with closing(LobbyCommander(host, port)) as client:
+        client.set_timeout(timeout)
+        try:
+            client.connect_to_server()
+            client.handshake()
+        except CouldNotConfirmError:
+            return ClientResult(handshake_failed=True)
+        except OSError:
+            return ClientResult(error=True)
+
+        try:
+            turn = client.receive_turn()
+            while True:
+                if turn:
+                    cell_x, cell_y = shooter.next_shot()
+                    started = time.perf_counter()
+                    client.send_coords(cell_x, cell_y)
+                    move_result = client.receive_move_result()
+                    latencies.append(time.perf_counter() - started)
+                    shooter.enemy_battleship.update_cell(
+                        cell_x, cell_y, move_result
+                    )
+                    shooter.record_shot(cell_x, cell_y, move_result)
+                else:
+                    cell_x, cell_y = client.receive_coords()
+                    move_result = our_battleship.hit_cell(cell_x, cell_y)
+                    client.send_move_result(move_result)
+
+                if move_result.is_win:
+                    return ClientResult(
+                        won=turn, turns=len(latencies),
+                        latencies=tuple(latencies),
+                    )
+                elif move_result.is_miss:
+                    turn = not turn
+        except (OSError, ProtocolError):
+            return ClientResult(
+                error=True, turns=len(latencies), latencies=tuple(latencies)
+            )
+
+
+@contextmanager
+def local_server(timeout: float = 10.0) -> Iterator[int]:
+    """Сервер лобби на свободном порту в отдельном процессе.
+
+    Сервер не делит GIL с клиентами теста, поэтому замеры не включают
+    ожидание потоков клиентов. Возвращает порт сервера.
+    """
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve, args=(ports,), daemon=True
+    )
+    process.start()
+    try:
+        yield ports.get(timeout=timeout)
+    finally:
+        process.terminate()
+        process.join()
+        ports.close()
+
+
+def _serve(ports: multiprocessing.Queue):
+    """Работа сервера лобби до завершения процесса."""
+
+    async def serve():
+        server = GameServer("127.0.0.1", 0)
+        await server.start()
+        ports.put(server.port)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def run_load(
+    clients: int,
+    concurrency: int = 100,
+    rate: Optional[float] = None,
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+    seed: Optional[int] = None,
+    timeout: float = 10.0,
+) -> LoadStats:
+    """Нагрузочный тест сервера лобби.
+
+    Клиенты подключаются с частотой `rate` в секунду (без ограничения,
+    если она не задана), и одновременно играют не больше `concurrency`
+    из них. Сервер подбирает соперников попарно, поэтому количество
+    клиентов и `concurrency` должны быть чётными: клиент без соперника
+    завершится ошибкой по истечении `timeout`. Если `port` не задан,
+    тест запускает собственный сервер в отдельном процессе.
+    """
+    if port is None:
+        with local_server() as port:
+            return run_load(
+                clients, concurrency, rate, "127.0.0.1", port, seed, timeout
+            )
+
+    stats = LoadStats()
+    pool = FleetPool(size=max(concurrency, DEFAULT_POOL_SIZE))
+    pool.warm_up(10, 10)
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = []
+            for client in range(clients):
+                if rate:
+                    delay = started + client / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(
+                    executor.submit(
+                        play_client, host, port, pool,
+                        None if seed is None else seed + client,
+                        timeout,
+                    )
+                )
+            for future in futures:
+                stats.add(future.result())
+    finally:
+        pool.close()
+    stats.duration = time.perf_counter() - started
+    return stats
+
+
+def format_stats(stats: LoadStats) -> List[str]:
+    """Строковое представление статистики нагрузочного теста."""
+    percentiles = "/".join(
+        f"{stats.percentile(q) * 1000:.2f}" for q in (50, 90, 99)
+    )
+    return [
+        f"Клиентов: {stats.clients}",
+        f"Матчей: {stats.matches}",
+        f"Ходов: {stats.turns}",
+        f"Ходов в секунду: {stats.turns_per_second:.1f}",
+        f"Время хода 50/90/99, мс: {percentiles}",
+        f"Неудачных хэндшейков: {stats.handshake_failures}",
+        f"Ошибок: {stats.errors}",
+        f"Длительность, с: {stats.duration:.2f}",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Нагрузочный тест сервера лобби."
+    )
+    parser.add_argument("clients", type=int)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rate", type=float)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    stats = run_load(
+        args.clients,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        host=args.host,
+        port=args.port,
+        seed=args.seed,
+        timeout=args.timeout,
+    )
+    print("\n".join(format_stats(stats)))
+
+
+if __name__ == "__main__":
+    main()
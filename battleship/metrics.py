@@ -0,0 +1,303 @@
+"""Сбор метрик игры.
+
+Метрики выключены по умолчанию и в выключенном состоянии ничего не
+стоят: `enable` подменяет методы движка, командиров и вывода в консоль
+обёртками, которые замеряют время и считают байты и сообщения, а
+`disable` возвращает исходные методы.
+
+Метрики пишутся в файл: в формате JSON Lines (по строке с итогами на
+каждую игру), если имя файла оканчивается на `.jsonl`, иначе - в
+текстовом формате Prometheus с итогами за всё время работы.
+"""
+
+import bisect
+import functools
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from battleship.battleship import Battleship
+from battleship.client import Client, PipeClient
+from battleship.commander import Commander
+from battleship.printer import Renderer
+
+
+# переменная окружения с путём к файлу метрик
+METRICS_ENV = "BATTLESHIP_METRICS"
+# верхние границы корзин гистограмм времени в секундах
+BUCKETS = tuple(
+    mantissa * 10.0**exponent
+    for exponent in range(-6, 1)
+    for mantissa in (1, 2.5, 5)
+) + (10.0,)
+
+# замеряемые методы: класс, имя метода и имя метрики
+TIMED_METHODS = (
+    (Battleship, "place_ships", "engine.place_ships"),
+    (Battleship, "hit_cell", "engine.hit_cell"),
+    (Battleship, "update_cell", "engine.update_cell"),
+    (Commander, "send_coords", "network.send_coords"),
+    (Commander, "receive_coords", "network.receive_coords"),
+    (Commander, "send_move_result", "network.send_move_result"),
+    (Commander, "receive_move_result", "network.receive_move_result"),
+    (Commander, "send_salvo", "network.send_salvo"),
+    (Commander, "receive_salvo", "network.receive_salvo"),
+    (Commander, "send_salvo_results", "network.send_salvo_results"),
+    (Commander, "receive_salvo_results", "network.receive_salvo_results"),
+    (Renderer, "render", "printer.render"),
+)
+
+
+class Histogram:
+    """Гистограмма значений с фиксированными корзинами `BUCKETS`."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Учёт значения."""
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+
+class Metrics:
+    """Метрики: гистограммы времени и счётчики.
+
+    Метрики накапливаются за всё время работы и отдельно за текущую
+    игру; итоги игры сбрасываются в `end_game`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._game_histograms: Dict[str, Histogram] = {}
+        self._game_counters: Dict[str, int] = {}
+        self._game_started = time.time()
+
+    def observe(self, name: str, seconds: float):
+        """Учёт длительности операции."""
+        for histograms in (self.histograms, self._game_histograms):
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: int = 1):
+        """Увеличение счётчика."""
+        self.counters[name] = self.counters.get(name, 0) + value
+        self._game_counters[name] = self._game_counters.get(name, 0) + value
+
+    def game_totals(self) -> Dict[str, Any]:
+        """Итоги текущей игры."""
+        return {
+            "counters": dict(self._game_counters),
+            "timings": {
+                name: {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "max": histogram.max,
+                }
+                for (name, histogram) in self._game_histograms.items()
+            },
+        }
+
+    def end_game(self, **labels: Any):
+        """Завершение игры: запись её итогов и начало новой."""
+        now = time.time()
+        if self.path is not None:
+            if self.path.endswith(".jsonl"):
+                line = {
+                    "started": self._game_started,
+                    "duration": now - self._game_started,
+                    **labels,
+                    **self.game_totals(),
+                }
+                with open(self.path, "a") as file:
+                    file.write(json.dumps(line, ensure_ascii=False) + "\n")
+            else:
+                self.write_prometheus(self.path)
+
+        self._game_histograms = {}
+        self._game_counters = {}
+        self._game_started = now
+
+    def to_prometheus(self) -> str:
+        """Метрики за всё время в текстовом формате Prometheus."""
+        lines = []
+        for (name, histogram) in sorted(self.histograms.items()):
+            metric = _prometheus_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for (bound, count) in zip(
+                BUCKETS + (float("inf"),), histogram.counts
+            ):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram.sum!r}")
+            lines.append(f"{metric}_count {histogram.count}")
+        for (name, value) in sorted(self.counters.items()):
+            metric = _prometheus_name(name) + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Запись метрик за всё время в файл в формате Prometheus."""
+        with open(path, "w") as file:
+            file.write(self.to_prometheus())
+
+
+_metrics: Optional[Metrics] = None
+# подменённые методы: класс, имя метода и исходный метод
+_originals: List[Tuple[type, str, Callable]] = []
+
+
+def get_metrics() -> Optional[Metrics]:
+    """Получение включённых метрик."""
+    return _metrics
+
+
+def enable(path: Optional[str] = None) -> Metrics:
+    """Включение сбора метрик."""
+    global _metrics
+    if _metrics is not None:
+        return _metrics
+
+    _metrics = metrics = Metrics(path)
+    for (cls, method_name, name) in TIMED_METHODS:
+        _replace(cls, method_name, _timed(getattr(cls, method_name), name))
+
+    _replace(Commander, "send_coords", _rtt_start(Commander.send_coords))
+    _replace(
+        Commander,
+        "receive_move_result",
+        _rtt_end(Commander.receive_move_result),
+    )
+    _replace(Commander, "send_salvo", _rtt_start(Commander.send_salvo))
+    _replace(
+        Commander,
+        "receive_salvo_results",
+        _rtt_end(Commander.receive_salvo_results),
+    )
+    _replace(
+        Commander,
+        "_end_frame",
+        _counted(Commander._end_frame, "network.sent_messages"),
+    )
+    _replace(
+        Commander,
+        "_receive_message",
+        _counted(Commander._receive_message, "network.received_messages"),
+    )
+    for cls in (Client, PipeClient):
+        _replace(cls, "_send", _counted_send(cls._send))
+        _replace(
+            cls, "_receive_into", _counted_receive(cls._receive_into)
+        )
+    return metrics
+
+
+def disable():
+    """Выключение сбора метрик и запись метрик за всё время в файл."""
+    global _metrics
+    if _metrics is None:
+        return
+
+    while _originals:
+        cls, method_name, original = _originals.pop()
+        setattr(cls, method_name, original)
+
+    metrics, _metrics = _metrics, None
+    if metrics.path is not None and not metrics.path.endswith(".jsonl"):
+        metrics.write_prometheus(metrics.path)
+
+
+def end_game(**labels: Any):
+    """Завершение игры, если сбор метрик включён."""
+    if _metrics is not None:
+        _metrics.end_game(**labels)
+
+
+def _replace(cls: type, method_name: str, wrapper: Callable):
+    """Подмена метода класса с запоминанием исходного."""
+    _originals.append((cls, method_name, cls.__dict__[method_name]))
+    setattr(cls, method_name, wrapper)
+
+
+def _timed(method: Callable, name: str) -> Callable:
+    """Обёртка, замеряющая время вызова."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _metrics.observe(name, time.perf_counter() - start)
+    return wrapper
+
+
+def _counted(method: Callable, name: str) -> Callable:
+    """Обёртка, считающая вызовы."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        _metrics.inc(name)
+        return method(*args, **kwargs)
+    return wrapper
+
+
+def _counted_send(method: Callable) -> Callable:
+    """Обёртка отправки, считающая отправки и отправленные байты."""
+    @functools.wraps(method)
+    def wrapper(self, data: bytes):
+        method(self, data)
+        _metrics.inc("network.sends")
+        _metrics.inc("network.sent_bytes", len(data))
+    return wrapper
+
+
+def _counted_receive(method: Callable) -> Callable:
+    """Обёртка получения в буфер, считающая полученные байты."""
+    @functools.wraps(method)
+    def wrapper(self, data_length: int):
+        method(self, data_length)
+        _metrics.inc("network.received_bytes", data_length)
+    return wrapper
+
+
+def _rtt_start(method: Callable) -> Callable:
+    """Обёртка отправки хода, запоминающая время отправки."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._metrics_sent_at = time.perf_counter()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _rtt_end(method: Callable) -> Callable:
+    """Обёртка получения результата хода, замеряющая время с отправки хода.
+
+    Время от отправки координат или залпа до получения результата - это
+    время сети в обе стороны вместе с обработкой хода другой стороной.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        move_result = method(self, *args, **kwargs)
+        sent_at = getattr(self, "_metrics_sent_at", None)
+        if sent_at is not None:
+            _metrics.observe("network.rtt", time.perf_counter() - sent_at)
+            self._metrics_sent_at = None
+        return move_result
+    return wrapper
+
+
+def _prometheus_name(name: str) -> str:
+    """Имя метрики в формате Prometheus."""
+    return "battleship_" + name.replace(".", "_")
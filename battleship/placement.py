@@ -0,0 +1,252 @@
+import random
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from battleship.exceptions import CouldNotPlaceShipsError
+from battleship.field import is_sparse_size
+
+
+Fleet = Dict[int, int]
+ShipPoints = Tuple[int, int, int, int]
+
+PLACEMENT_ATTEMPTS = 100
+# количество случайных положений корабля, которые проверяются на большом
+# поле, прежде чем расстановка начнётся заново
+SPARSE_PLACEMENT_TRIES = 1000
+
+
+class BoardMasks:
+    """Предпосчитанные маски поля заданного размера."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.full = (1 << (width * height)) - 1
+
+        first_column = sum(1 << (y * width) for y in range(height))
+        self.not_first_column = self.full & ~first_column
+        self.not_last_column = self.full & ~(first_column << (width - 1))
+
+    def dilate(self, mask: int) -> int:
+        """Расширение маски на все соседние клетки, включая диагональные."""
+        mask |= (
+            (mask << 1) & self.not_first_column
+            | (mask >> 1) & self.not_last_column
+        )
+        mask |= (mask << self.width) | (mask >> self.width)
+        return mask & self.full
+
+    def to_points(self, start: int, ship_length: int, vertical: bool):
+        """Получение границ корабля по номеру его первой клетки."""
+        x0, y0 = start % self.width, start // self.width
+        if vertical:
+            return (x0, y0, x0, y0 + ship_length - 1)
+        return (x0, y0, x0 + ship_length - 1, y0)
+
+
+class ShipMasks:
+    """Предпосчитанные маски положений корабля заданной длины."""
+
+    def __init__(self, board: BoardMasks, ship_length: int):
+        width, height = board.width, board.height
+        self.width = width
+        self.length = ship_length
+
+        # клетки, с которых корабль может начинаться, не выходя за поле
+        self.horizontal_starts = sum(
+            1 << (y*width + x)
+            for y in range(height)
+            for x in range(width - ship_length + 1)
+        )
+        self.vertical_starts = sum(
+            1 << (y*width + x)
+            for y in range(height - ship_length + 1)
+            for x in range(width)
+        )
+        if ship_length == 1:
+            # одноклеточный корабль в обоих положениях один и тот же
+            self.vertical_starts = 0
+
+        self.horizontal_line = (1 << ship_length) - 1
+        self.vertical_line = sum(1 << (k*width) for k in range(ship_length))
+
+    def available_starts(self, free: int) -> Tuple[int, int]:
+        """Получение клеток, с которых можно начать корабль.
+
+        Корабль можно начать с клетки, если свободны она и следующие за ней
+        `length - 1` клеток в ряду (для горизонтального положения) или
+        в колонке (для вертикального положения).
+        """
+        horizontal = self.horizontal_starts
+        vertical = self.vertical_starts
+        for k in range(self.length):
+            horizontal &= free >> k
+            vertical &= free >> (k * self.width)
+        return horizontal, vertical
+
+
+@lru_cache(maxsize=None)
+def get_board_masks(width: int, height: int) -> BoardMasks:
+    """Получение масок поля заданного размера."""
+    return BoardMasks(width, height)
+
+
+@lru_cache(maxsize=None)
+def get_ship_masks(width: int, height: int, ship_length: int) -> ShipMasks:
+    """Получение масок положений корабля на поле заданного размера."""
+    return ShipMasks(get_board_masks(width, height), ship_length)
+
+
+@lru_cache(maxsize=None)
+def get_placements(
+    width: int, height: int, ship_length: int
+) -> Tuple[ShipPoints, ...]:
+    """Получение всех положений корабля на пустом поле заданного размера."""
+    board = get_board_masks(width, height)
+    ship = get_ship_masks(width, height, ship_length)
+    placements = []
+    for (starts, vertical) in (
+        (ship.horizontal_starts, False),
+        (ship.vertical_starts, True),
+    ):
+        while starts:
+            start = (starts & -starts).bit_length() - 1
+            starts &= starts - 1
+            placements.append(board.to_points(start, ship_length, vertical))
+    return tuple(placements)
+
+
+def place_fleet(
+    width: int,
+    height: int,
+    fleet: Fleet,
+    rng: Optional[random.Random] = None,
+) -> List[ShipPoints]:
+    """Получение случайной расстановки флота.
+
+    Корабли ставятся в порядке следования в `fleet`, каждый - в случайное
+    из всех доступных положений. Занятые клетки вместе с соседними
+    хранятся в одной маске, поэтому доступные положения находятся
+    несколькими побитовыми операциями.
+
+    Если на каком-то шаге очередной корабль поставить некуда, расстановка
+    начинается заново.
+
+    На больших полях маски заняли бы память пропорционально площади,
+    поэтому там используется `_try_place_fleet_sparse`.
+    """
+    rng = rng or random
+    if is_sparse_size(width, height):
+        try_place_fleet = _try_place_fleet_sparse
+    else:
+        try_place_fleet = _try_place_fleet
+
+    for _ in range(PLACEMENT_ATTEMPTS):
+        ships_points = try_place_fleet(width, height, fleet, rng)
+        if ships_points is not None:
+            return ships_points
+
+    raise CouldNotPlaceShipsError("Не удалось расставить флот на поле.")
+
+
+def _try_place_fleet(
+    width: int, height: int, fleet: Fleet, rng: random.Random
+) -> Optional[List[ShipPoints]]:
+    """Попытка случайной расстановки флота."""
+    board = get_board_masks(width, height)
+    occupied = 0
+    ships_points = []
+
+    for (ship_length, ships_count) in fleet.items():
+        ship = get_ship_masks(width, height, ship_length)
+        for _ in range(ships_count):
+            free = board.full & ~occupied
+            horizontal, vertical = ship.available_starts(free)
+
+            horizontal_count = _count_bits(horizontal)
+            total_count = horizontal_count + _count_bits(vertical)
+            if not total_count:
+                return None
+
+            choice = rng.randrange(total_count)
+            if choice < horizontal_count:
+                start = _nth_bit(horizontal, choice)
+                mask = ship.horizontal_line << start
+                vertical_ship = False
+            else:
+                start = _nth_bit(vertical, choice - horizontal_count)
+                mask = ship.vertical_line << start
+                vertical_ship = True
+
+            occupied |= board.dilate(mask)
+            ships_points.append(
+                board.to_points(start, ship_length, vertical_ship)
+            )
+
+    return ships_points
+
+
+def _try_place_fleet_sparse(
+    width: int, height: int, fleet: Fleet, rng: random.Random
+) -> Optional[List[ShipPoints]]:
+    """Попытка случайной расстановки флота на большом поле.
+
+    Положение корабля выбирается случайно среди всех его положений на
+    пустом поле и отбрасывается, если задевает занятые клетки или их
+    соседей. Так каждое доступное положение выбирается с равной
+    вероятностью, как и в `_try_place_fleet`, а занятые клетки хранятся
+    во множестве.
+    """
+    occupied: Set[int] = set()
+    ships_points = []
+
+    for (ship_length, ships_count) in fleet.items():
+        row_starts = max(0, width - ship_length + 1)
+        horizontal_count = row_starts * height
+        vertical_count = width * max(0, height - ship_length + 1)
+        if ship_length == 1:
+            # одноклеточный корабль в обоих положениях один и тот же
+            vertical_count = 0
+        total_count = horizontal_count + vertical_count
+        if not total_count:
+            return None
+
+        for _ in range(ships_count):
+            for _ in range(SPARSE_PLACEMENT_TRIES):
+                choice = rng.randrange(total_count)
+                if choice < horizontal_count:
+                    x0, y0 = choice % row_starts, choice // row_starts
+                    points = (x0, y0, x0 + ship_length - 1, y0)
+                else:
+                    choice -= horizontal_count
+                    x0, y0 = choice % width, choice // width
+                    points = (x0, y0, x0, y0 + ship_length - 1)
+
+                x0, y0, x1, y1 = points
+                if not any(
+                    y*width + x in occupied
+                    for y in range(y0, y1+1)
+                    for x in range(x0, x1+1)
+                ):
+                    break
+            else:
+                return None
+
+            for y in range(max(0, y0-1), min(height, y1+2)):
+                for x in range(max(0, x0-1), min(width, x1+2)):
+                    occupied.add(y*width + x)
+            ships_points.append(points)
+
+    return ships_points
+
+
+def _count_bits(bits: int) -> int:
+    """Количество установленных битов."""
+    return bin(bits).count("1")
+
+
+def _nth_bit(bits: int, n: int) -> int:
+    """Номер n-го (начиная с нуля) установленного бита."""
+    for _ in range(n):
+        bits &= bits - 1
+    return (bits & -bits).bit_length() - 1
@@ -0,0 +1,144 @@
+import random
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from battleship import const
+from battleship.exceptions import CouldNotPlaceShipsError
+from battleship.placement import Fleet, ShipPoints, place_fleet
+
+
+# наибольшее количество готовых расстановок для одного поля и флота
+DEFAULT_POOL_SIZE = 64
+# количество расстановок, ниже которого пул пополняется
+DEFAULT_LOW_WATER = 16
+
+# ширина и высота поля и флот в виде пар в порядке расстановки
+PoolKey = Tuple[int, int, Tuple[Tuple[int, int], ...]]
+
+
+class FleetPool:
+    """Пул готовых расстановок флота.
+
+    Для каждого размера поля и флота хранится ограниченная очередь
+    расстановок, поэтому начало игры не ждёт `place_fleet`. Когда в
+    очереди остаётся меньше `low_water` расстановок, фоновый поток
+    пополняет её до `size`. Если очередь пуста, расстановка делается
+    сразу в вызывающем потоке.
+
+    Расстановки делаются тем же `place_fleet` и в том же порядке
+    кораблей, что и в `Battleship.place_ships`, поэтому они распределены
+    так же, и их можно передавать в `Battleship.adopt_ships` без
+    повторной проверки. Флоты, различающиеся только порядком кораблей,
+    хранятся в разных очередях.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        low_water: int = DEFAULT_LOW_WATER,
+        seed: Optional[int] = None,
+    ):
+        self.size = size
+        self.low_water = low_water
+
+        self._queues: Dict[PoolKey, Deque[List[ShipPoints]]] = {}
+        # очереди, которые пополняются до `size`
+        self._refilling: Set[PoolKey] = set()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._rng = random.Random(seed)
+        self._thread = threading.Thread(
+            target=self._refill, name="fleet-pool", daemon=True
+        )
+        self._thread.start()
+
+    def get(
+        self, width: int, height: int, fleet: Optional[Fleet] = None
+    ) -> List[ShipPoints]:
+        """Получение готовой расстановки флота."""
+        key = _pool_key(width, height, fleet)
+        with self._condition:
+            queue = self._watch(key)
+            ships_points = queue.popleft() if queue else None
+            self._check_low_water(key)
+
+        if ships_points is None:
+            ships_points = place_fleet(width, height, dict(key[2]))
+        return ships_points
+
+    def warm_up(
+        self, width: int, height: int, fleet: Optional[Fleet] = None
+    ):
+        """Начало пополнения очереди до первой игры."""
+        key = _pool_key(width, height, fleet)
+        with self._condition:
+            self._watch(key)
+            self._check_low_water(key)
+
+    def available(
+        self, width: int, height: int, fleet: Optional[Fleet] = None
+    ) -> int:
+        """Количество готовых расстановок."""
+        key = _pool_key(width, height, fleet)
+        with self._condition:
+            return len(self._queues.get(key, ()))
+
+    def close(self):
+        """Остановка фонового потока."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _watch(self, key: PoolKey) -> Deque[List[ShipPoints]]:
+        """Получение очереди, создаваемой при первом обращении."""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque(maxlen=self.size)
+        return queue
+
+    def _check_low_water(self, key: PoolKey):
+        """Запуск пополнения очереди, если в ней мало расстановок."""
+        if len(self._queues[key]) < self.low_water:
+            self._refilling.add(key)
+            self._condition.notify()
+
+    def _refill(self):
+        """Пополнение очередей в фоновом потоке.
+
+        Расстановка делается вне блокировки, чтобы не задерживать `get`.
+        """
+        while True:
+            with self._condition:
+                while not self._closed and not self._refilling:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                key = next(iter(self._refilling))
+
+            width, height, fleet = key
+            try:
+                ships_points = place_fleet(
+                    width, height, dict(fleet), self._rng
+                )
+            except CouldNotPlaceShipsError:
+                # такой флот не расставить, ошибку получит `get`
+                with self._condition:
+                    self._refilling.discard(key)
+                continue
+
+            with self._condition:
+                queue = self._queues[key]
+                queue.append(ships_points)
+                if len(queue) >= self.size:
+                    self._refilling.discard(key)
+
+
+def _pool_key(
+    width: int, height: int, fleet: Optional[Fleet] = None
+) -> PoolKey:
+    """Ключ очереди расстановок."""
+    fleet = const.DEFAULT_FLEET if fleet is None else fleet
+    return (width, height, tuple(fleet.items()))
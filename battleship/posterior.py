@@ -0,0 +1,494 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from battleship import const
+from battleship.cell import CellType
+from battleship.field import Field
+from battleship.placement import (
+    Fleet,
+    ShipPoints,
+    get_board_masks,
+    get_placements,
+)
+
+
+# наибольшее количество состояний точного подсчёта расстановок; если
+# наблюдений мало и состояний больше, используется цепь Маркова
+MEMO_BUDGET = 100_000
+# шаги цепи Маркова до первой расстановки и между расстановками
+BURN_IN = 1000
+THINNING = 50
+# количество попыток найти начальную расстановку для цепи Маркова
+BACKTRACKING_LIMIT = 100_000
+
+
+# оставшиеся корабли каждой длины, занятые клетки вместе с соседними
+# и клетки кораблей, начиная с текущей клетки обхода
+State = Tuple[Tuple[int, ...], int, int]
+
+
+class Observations(NamedTuple):
+    """Наблюдения за полем соперника.
+
+    `allowed` - клетки, в которых может стоять непотопленный корабль,
+    `hits` - подбитые, но не потопленные клетки, которые обязательно
+    покрыты кораблями, `remaining` - непотопленные корабли, `sunk` -
+    границы потопленных кораблей.
+    """
+
+    width: int
+    height: int
+    allowed: int
+    hits: int
+    remaining: Fleet
+    sunk: List[ShipPoints]
+
+
+class BudgetExceeded(Exception):
+    """Точный подсчёт требует больше состояний, чем разрешено."""
+
+
+def observe(field: Field, fleet: Optional[Fleet] = None) -> Observations:
+    """Получение наблюдений из поля соперника.
+
+    Потопленные корабли находятся как связные группы потопленных клеток.
+    Вокруг промахов и потопленных кораблей (по правилу, что корабли не
+    касаются друг друга) непотопленных кораблей быть не может.
+    """
+    if not isinstance(field, Field):
+        raise ValueError("Выборка поддерживает только плотные поля.")
+
+    board = get_board_masks(field.width, field.height)
+    destroyed = field.get_layer(CellType.DESTROYED)
+    hits = field.get_layer(CellType.DAMAGED) & ~destroyed
+    allowed = (
+        board.full
+        & ~field.get_layer(CellType.MISS)
+        & ~board.dilate(destroyed)
+    )
+
+    remaining = dict(const.DEFAULT_FLEET if fleet is None else fleet)
+    sunk = _find_ships(field.width, destroyed)
+    for (x0, y0, x1, y1) in sunk:
+        ship_length = max(x1 - x0, y1 - y0) + 1
+        if remaining.get(ship_length):
+            remaining[ship_length] -= 1
+
+    return Observations(
+        field.width, field.height, allowed, hits, remaining, sunk
+    )
+
+
+class ExactSampler:
+    """Точная равномерная выборка расстановок, согласных с наблюдениями.
+
+    Клетки поля обходятся по порядку, и в каждой клетке либо ничего не
+    начинается, либо начинается один из оставшихся кораблей. Состояние
+    обхода - номер клетки, оставшиеся корабли и занятые клетки вместе с
+    соседними от уже поставленных кораблей, начиная с текущей клетки.
+    Для каждого состояния подсчитывается количество способов завершить
+    расстановку, после чего расстановка выбирается проходом по клеткам
+    с выбором каждого шага пропорционально количеству завершений - так
+    все согласные расстановки равновероятны.
+
+    Если состояний больше `memo_budget`, выбрасывается `BudgetExceeded`.
+    """
+
+    def __init__(
+        self, observations: Observations, memo_budget: int = MEMO_BUDGET
+    ):
+        self.observations = observations
+        width, height = observations.width, observations.height
+        self._cells_count = width * height
+        self._lengths = sorted(
+            length for (length, count) in observations.remaining.items()
+            if count
+        )
+        self._options = _ship_options(observations, self._lengths)
+
+        counts = tuple(
+            observations.remaining[length] for length in self._lengths
+        )
+        start = (counts, 0, 0)
+        # состояния в каждой клетке
+        layers = [{start}]
+        states_count = 1
+        for cell in range(self._cells_count):
+            layer = set()
+            for state in layers[cell]:
+                for (next_state, _) in self._transitions(cell, state):
+                    layer.add(next_state)
+            states_count += len(layer)
+            if states_count > memo_budget:
+                raise BudgetExceeded
+            layers.append(layer)
+
+        last = {
+            state: 0 if any(state[0]) else 1
+            for state in layers[self._cells_count]
+        }
+        # количество завершений расстановки из состояний в каждой клетке
+        self._counts: List[Dict[State, int]] = (
+            [{}] * self._cells_count + [last]
+        )
+        for cell in reversed(range(self._cells_count)):
+            following = self._counts[cell + 1]
+            self._counts[cell] = {
+                state: sum(
+                    following[next_state]
+                    for (next_state, _) in self._transitions(cell, state)
+                )
+                for state in layers[cell]
+            }
+        self._start = start
+
+    @property
+    def total(self) -> int:
+        """Количество расстановок, согласных с наблюдениями."""
+        return self._counts[0][self._start]
+
+    def sample(self, rng: random.Random) -> List[ShipPoints]:
+        """Получение случайной расстановки оставшихся кораблей."""
+        if not self.total:
+            raise ValueError("Нет расстановок, согласных с наблюдениями.")
+
+        ships_points = []
+        state = self._start
+        for cell in range(self._cells_count):
+            following = self._counts[cell + 1]
+            transitions = [
+                (next_state, points, following[next_state])
+                for (next_state, points) in self._transitions(cell, state)
+            ]
+            choice = rng.randrange(self._counts[cell][state])
+            for (next_state, points, count) in transitions:
+                if choice < count:
+                    break
+                choice -= count
+            if points is not None:
+                ships_points.append(points)
+            state = next_state
+        return ships_points
+
+    def _transitions(
+        self, cell: int, state: State
+    ) -> Iterator[Tuple[State, Optional[ShipPoints]]]:
+        """Переходы из состояния в клетке: следующее состояние и корабль."""
+        counts, zone, ship = self._normalized(cell, state)
+        hit = self.observations.hits >> cell & 1
+        if zone & 1:
+            # клетка занята кораблём или его соседями
+            if not hit or ship & 1:
+                yield self._skipped(cell, counts, zone, ship), None
+            return
+
+        if not hit:
+            yield self._skipped(cell, counts, zone, ship), None
+        for (i, ship_mask, zone_mask, points) in self._options[cell]:
+            if counts[i] and not ship_mask & zone:
+                next_counts = counts[:i] + (counts[i] - 1,) + counts[i+1:]
+                next_state = (
+                    next_counts,
+                    (zone | zone_mask) >> 1,
+                    (ship | ship_mask) >> 1,
+                )
+                yield self._normalized(cell + 1, next_state), points
+
+    def _skipped(
+        self, cell: int, counts: Tuple[int, ...], zone: int, ship: int
+    ) -> State:
+        """Состояние в следующей клетке, если в текущей ничего не начато."""
+        return self._normalized(cell + 1, (counts, zone >> 1, ship >> 1))
+
+    def _normalized(self, cell: int, state: State) -> State:
+        """Отбрасывание частей состояния, не влияющих на расстановку.
+
+        Занятость важна только в клетках, где может стоять корабль, а то,
+        что клетку занимает именно корабль, - только в подбитых клетках.
+        """
+        counts, zone, ship = state
+        observations = self.observations
+        return (
+            counts,
+            zone & (observations.allowed >> cell),
+            ship & (observations.hits >> cell),
+        )
+
+
+class ChainSampler:
+    """Приближённая равномерная выборка с помощью цепи Маркова.
+
+    Используется, когда наблюдений мало и точный подсчёт слишком велик.
+    Начальная расстановка находится перебором с возвратом, а каждый шаг
+    цепи переносит случайный корабль в случайное положение той же длины,
+    если новая расстановка согласна с наблюдениями. Предложения
+    симметричны, поэтому распределение цепи сходится к равномерному.
+    """
+
+    def __init__(self, observations: Observations, rng: random.Random):
+        self.observations = observations
+        width, height = observations.width, observations.height
+        self._board = get_board_masks(width, height)
+
+        self._placements: Dict[int, List[Tuple[int, int, ShipPoints]]] = {}
+        for (length, count) in observations.remaining.items():
+            if not count:
+                continue
+            self._placements[length] = [
+                (mask, self._board.dilate(mask), points)
+                for (mask, points) in _ship_masks(width, height, length)
+                if not mask & ~observations.allowed
+                and mask & observations.hits != mask
+            ]
+
+        self._lengths, self._ships = self._find_initial(rng)
+        for _ in range(BURN_IN):
+            self._step(rng)
+
+    def sample(self, rng: random.Random) -> List[ShipPoints]:
+        """Получение случайной расстановки оставшихся кораблей."""
+        for _ in range(THINNING):
+            self._step(rng)
+        return [points for (_, _, points) in self._ships]
+
+    def _step(self, rng: random.Random):
+        """Перенос случайного корабля в случайное положение."""
+        if not self._ships:
+            return
+        k = rng.randrange(len(self._ships))
+        placement = rng.choice(self._placements[self._lengths[k]])
+        mask, zone, _ = placement
+
+        others_zone = 0
+        others_ships = 0
+        for (i, (other_mask, other_zone, _)) in enumerate(self._ships):
+            if i != k:
+                others_zone |= other_zone
+                others_ships |= other_mask
+        if mask & others_zone:
+            return
+        hits = self.observations.hits
+        if hits & ~(others_ships | mask):
+            return
+        self._ships[k] = placement
+
+    def _find_initial(
+        self, rng: random.Random
+    ) -> Tuple[List[int], List[Tuple[int, int, ShipPoints]]]:
+        """Поиск расстановки, согласной с наблюдениями, перебором с возвратом.
+
+        Пока есть непокрытые попадания, ставится корабль через первое из
+        них, затем оставшиеся корабли ставятся от длинных к коротким -
+        так тупиковые ветви с непокрываемыми попаданиями отсекаются сразу.
+        Возвращаются длины кораблей и их положения.
+        """
+        hits = self.observations.hits
+        remaining = dict(self.observations.remaining)
+        lengths = []
+        ships = []
+        attempts = 0
+
+        def place(zone: int, covered: int) -> bool:
+            nonlocal attempts
+            if not any(remaining.values()):
+                return not hits & ~covered
+            attempts += 1
+            if attempts > BACKTRACKING_LIMIT:
+                return False
+
+            uncovered = hits & ~covered
+            if uncovered:
+                hit = uncovered & -uncovered
+                candidates = [
+                    (length, placement)
+                    for (length, count) in remaining.items() if count
+                    for placement in self._placements[length]
+                    if placement[0] & hit
+                ]
+            else:
+                length = max(
+                    length for (length, count) in remaining.items() if count
+                )
+                candidates = [
+                    (length, placement)
+                    for placement in self._placements[length]
+                ]
+            rng.shuffle(candidates)
+
+            for (length, placement) in candidates:
+                mask, ship_zone, _ = placement
+                # попадание рядом с кораблём, но не на нём, уже не покрыть
+                if mask & zone or ship_zone & uncovered & ~mask:
+                    continue
+                remaining[length] -= 1
+                lengths.append(length)
+                ships.append(placement)
+                if place(zone | ship_zone, covered | mask):
+                    return True
+                remaining[length] += 1
+                lengths.pop()
+                ships.pop()
+            return False
+
+        if not place(0, 0):
+            raise ValueError("Нет расстановок, согласных с наблюдениями.")
+        return lengths, ships
+
+
+def make_sampler(
+    observations: Observations,
+    rng: random.Random,
+    memo_budget: int = MEMO_BUDGET,
+) -> Union[ExactSampler, ChainSampler]:
+    """Создание точной выборки, а если она слишком велика - цепи Маркова."""
+    try:
+        return ExactSampler(observations, memo_budget)
+    except BudgetExceeded:
+        return ChainSampler(observations, rng)
+
+
+def sample_fleets(
+    observations: Observations,
+    count: int,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    memo_budget: int = MEMO_BUDGET,
+) -> List[List[ShipPoints]]:
+    """Получение `count` расстановок оставшихся кораблей в пуле процессов.
+
+    Каждый процесс строит свою выборку (или свою цепь Маркова) и делает
+    свою часть расстановок. При `workers=1` выборка проводится в текущем
+    процессе.
+    """
+    seed = random.randrange(2**32) if seed is None else seed
+    if workers == 1:
+        return _sample_chunk((observations, count, seed, memo_budget))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = [
+            (
+                observations,
+                count // workers + (worker < count % workers),
+                seed + worker,
+                memo_budget,
+            )
+            for worker in range(workers)
+        ]
+        fleets = []
+        for chunk in executor.map(_sample_chunk, tasks):
+            fleets.extend(chunk)
+        return fleets
+
+
+def _sample_chunk(task) -> List[List[ShipPoints]]:
+    """Получение части расстановок в процессе пула."""
+    observations, count, seed, memo_budget = task
+    rng = random.Random(seed)
+    if not count:
+        return []
+    sampler = make_sampler(observations, rng, memo_budget)
+    return [sampler.sample(rng) for _ in range(count)]
+
+
+def hit_probabilities(
+    field: Field,
+    fleet: Optional[Fleet] = None,
+    samples: int = 1000,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[float]:
+    """Вероятности того, что в клетках стоит корабль.
+
+    Вероятности считаются по `samples` расстановкам, согласным с полем
+    соперника, и возвращаются списком по клеткам с номерами
+    `y * width + x`. В клетках потопленных кораблей вероятность равна 1.
+    """
+    observations = observe(field, fleet)
+    width = field.width
+    ship_counts = [0] * (width * field.height)
+    fleets = sample_fleets(observations, samples, seed, workers)
+    for ships_points in fleets:
+        for (x0, y0, x1, y1) in ships_points:
+            for y in range(y0, y1+1):
+                for x in range(x0, x1+1):
+                    ship_counts[y*width + x] += 1
+
+    probabilities = [count / max(1, len(fleets)) for count in ship_counts]
+    for (x0, y0, x1, y1) in observations.sunk:
+        for y in range(y0, y1+1):
+            for x in range(x0, x1+1):
+                probabilities[y*width + x] = 1.0
+    return probabilities
+
+
+def _ship_masks(
+    width: int, height: int, ship_length: int
+) -> List[Tuple[int, ShipPoints]]:
+    """Маски и границы всех положений корабля на пустом поле."""
+    return [
+        (
+            sum(
+                1 << (y*width + x)
+                for y in range(y0, y1+1)
+                for x in range(x0, x1+1)
+            ),
+            (x0, y0, x1, y1),
+        )
+        for (x0, y0, x1, y1) in get_placements(width, height, ship_length)
+    ]
+
+
+def _ship_options(observations: Observations, lengths: List[int]):
+    """Корабли, которые можно начать в каждой клетке.
+
+    Для каждой клетки - список из номера длины корабля в `lengths`,
+    маски корабля и маски корабля с соседними клетками (обе маски
+    сдвинуты так, что текущая клетка - нулевой бит) и границ корабля.
+    Корабль нельзя ставить на клетки, где его быть не может, и целиком
+    на подбитые клетки: такой корабль был бы потоплен.
+    """
+    width, height = observations.width, observations.height
+    board = get_board_masks(width, height)
+    options = [[] for _ in range(width * height)]
+    for (i, length) in enumerate(lengths):
+        for (mask, points) in _ship_masks(width, height, length):
+            if mask & ~observations.allowed:
+                continue
+            if mask & observations.hits == mask:
+                continue
+            x0, y0, _, _ = points
+            cell = y0*width + x0
+            options[cell].append(
+                (i, mask >> cell, board.dilate(mask) >> cell, points)
+            )
+    return options
+
+
+def _find_ships(width: int, cells: int) -> List[ShipPoints]:
+    """Границы кораблей, составленных из клеток маски."""
+    ships = []
+    while cells:
+        cell = (cells & -cells).bit_length() - 1
+        x0, y0 = cell % width, cell // width
+        # клетка с наименьшим номером - левая верхняя клетка корабля
+        x1, y1 = x0, y0
+        while x1 + 1 < width and cells >> (y1*width + x1 + 1) & 1:
+            x1 += 1
+        while cells >> ((y1 + 1)*width + x0) & 1:
+            y1 += 1
+        for y in range(y0, y1+1):
+            for x in range(x0, x1+1):
+                cells &= ~(1 << (y*width + x))
+        ships.append((x0, y0, x1, y1))
+    return ships
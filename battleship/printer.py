@@ -1,7 +1,9 @@
-from typing import List
+import sys
+from functools import lru_cache
+from typing import List, Optional, TextIO, Tuple
 
-from battleship.cell import Cell
-from battleship.field import Field
+from battleship.cell import Cell, CellType
+from battleship.field import BaseField
 
 
 ROWS_INDEXES = tuple(map(str, range(1, 11)))
@@ -9,52 +11,189 @@ COLS_INDEXES = "АБВГДЕЖЗИК"
 FIELDS_SEP = "   #   "
 
 
-def print_fields(player_field: Field, enemy_field: Field):
+def column_name(x: int) -> str:
+    """Название колонки.
+
+    После букв `COLS_INDEXES` колонки называются их сочетаниями, как
+    в электронных таблицах: ..., И, К, АА, АБ, ..., КК, ААА, ...
+    """
+    name = ""
+    x += 1
+    while x:
+        x, letter = divmod(x - 1, len(COLS_INDEXES))
+        name = COLS_INDEXES[letter] + name
+    return name
+
+
+def column_index(name: str) -> int:
+    """Получение номера колонки по её названию."""
+    if not name:
+        raise ValueError("Пустое название колонки.")
+    x = 0
+    for letter in name:
+        x = x*len(COLS_INDEXES) + COLS_INDEXES.index(letter) + 1
+    return x - 1
+
+
+def row_name(y: int) -> str:
+    """Название ряда."""
+    return str(y + 1)
+
+
+def row_index(name: str) -> int:
+    """Получение номера ряда по его названию."""
+    if not name.isdecimal():
+        raise ValueError("Ряд должен быть числом.")
+    return int(name) - 1
+
+
+# очистка экрана вместе с переводом курсора в начало и очистка экрана
+# от курсора до конца
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+CLEAR_BELOW = "\x1b[J"
+
+# состояние ряда: биты ряда в каждом слое поля
+RowState = Tuple[int, ...]
+
+
+class Renderer:
+    """Вывод полей в консоль с перерисовкой только изменившихся клеток.
+
+    Renderer помнит состояние рядов последнего выведенного кадра. Первый
+    кадр выводится целиком, а в следующих кадрах в консоль пишутся только
+    изменившиеся клетки - перемещением курсора ANSI-последовательностями.
+    Весь кадр записывается в поток одной операцией. После кадра курсор
+    стоит под полями, а всё, что было выведено ниже, стирается.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        # состояния рядов полей игрока и соперника в последнем кадре
+        self._frame: Optional[Tuple[List[RowState], List[RowState]]] = None
+
+    def render(self, player_field: BaseField, enemy_field: BaseField):
+        """Вывод кадра с полями игрока и соперника."""
+        frame = (_row_states(player_field), _row_states(enemy_field))
+        width, height = player_field.width, player_field.height
+
+        if self._frame is None:
+            output = [CLEAR_SCREEN, _str_fields(width, frame)]
+        else:
+            output = []
+            # отступ поля соперника от начала строки
+            enemy_offset = _row_width(width) + 3 + len(FIELDS_SEP)
+            for (offset, old_rows, new_rows) in zip(
+                (0, enemy_offset), self._frame, frame
+            ):
+                for (y, (old_row, new_row)) in enumerate(
+                    zip(old_rows, new_rows)
+                ):
+                    if old_row != new_row:
+                        output.append(
+                            _str_row_diff(
+                                width, y, offset, old_row, new_row
+                            )
+                        )
+            # первые две строки кадра заняты заголовками
+            output.append(f"\x1b[{height + 3};1H{CLEAR_BELOW}")
+
+        self._frame = frame
+        self.stream.write("".join(output))
+        self.stream.flush()
+
+    def clear(self):
+        """Очистка консоли. Следующий кадр будет выведен целиком."""
+        self._frame = None
+        self.stream.write(CLEAR_SCREEN)
+        self.stream.flush()
+
+
+def print_fields(player_field: BaseField, enemy_field: BaseField):
     """Вывод своего игрового поля и игрового поля соперника в консоль."""
-    _print_fields_titles(player_field.width)
-    _print_columns()
+    frame = (_row_states(player_field), _row_states(enemy_field))
+    print(_str_fields(player_field.width, frame), end="")
 
-    for row_index, player_row, enemy_row in zip(
-        ROWS_INDEXES, player_field, enemy_field
-    ):
-        _print_rows(row_index, player_row, enemy_row)
 
+def _str_fields(
+    width: int, frame: Tuple[List[RowState], List[RowState]]
+) -> str:
+    """Строковое представление полей игрока и соперника с заголовками."""
+    lines = [_str_fields_titles(width), _str_columns()]
+    for row_index, player_row, enemy_row in zip(ROWS_INDEXES, *frame):
+        player_row = f"{row_index:>2} {_str_row(width, player_row)}"
+        enemy_row = f"{row_index:>2} {_str_row(width, enemy_row)}"
+        lines.append(f"{player_row}{FIELDS_SEP}{enemy_row}")
+    return "\n".join(lines) + "\n"
 
-def _print_fields_titles(cells_count: int):
-    """Вывод владельцев игровых полей в консоль."""
-    # длина ряда состоит из N клеток, N-1 разделителей между ними,
-    # и 2 разделителей по краям
-    row_width = cells_count * 2 + 1
+
+def _str_fields_titles(cells_count: int) -> str:
+    """Строка с владельцами игровых полей."""
+    row_width = _row_width(cells_count)
 
     # первые 3 пробела это 2 символа индекса рядов и 1 пробел между
     # индексами рядов и самими рядами.
     our_title = " " * 3 + f"{'Ваше поле':^{row_width}}"
     enemy_title = " " * 3 + f"{'Поле соперника':^{row_width}}"
-    print(f"{our_title}{FIELDS_SEP}{enemy_title}")
+    return f"{our_title}{FIELDS_SEP}{enemy_title}"
 
 
-def _print_columns():
-    """Вывод букв колонок полей игрока и соперника в консоль."""
+def _str_columns() -> str:
+    """Строка с буквами колонок полей игрока и соперника."""
     # первые четыре пробела это 2 символа индекса рядов, 1 пробел между
     # индексами рядов и полей, и 1 символ первого разделителя клеток.
     # Последний пробел обозначает последний разделитель клеток.
     column_row = " " * 4 + " ".join(COLS_INDEXES) + " "
-    print(f"{column_row}{FIELDS_SEP}{column_row}")
+    return f"{column_row}{FIELDS_SEP}{column_row}"
+
+
+def _row_width(cells_count: int) -> int:
+    """Длина ряда в символах."""
+    # длина ряда состоит из N клеток, N-1 разделителей между ними,
+    # и 2 разделителей по краям
+    return cells_count * 2 + 1
+
+
+def _row_states(field: BaseField) -> List[RowState]:
+    """Получение состояний всех рядов поля."""
+    return field.row_layers()
 
 
-def _print_rows(row_index: str, player_row: List[Cell], enemy_row: List[Cell]):
-    """Вывод рядов полей игрока и соперника с их индексами в консоль."""
-    player_row = f"{row_index:>2} {_str_row(player_row)}"
-    enemy_row = f"{row_index:>2} {_str_row(enemy_row)}"
-    print(f"{player_row}{FIELDS_SEP}{enemy_row}")
+def _str_row_diff(
+    width: int, y: int, offset: int, old_row: RowState, new_row: RowState
+) -> str:
+    """Перерисовка изменившихся клеток ряда.
 
+    `offset` - отступ поля от начала строки консоли.
+    """
+    old_str = _str_row(width, old_row)
+    new_str = _str_row(width, new_row)
+    # ряд выводится после двух строк заголовков, а перед рядом стоят
+    # 3 символа его индекса; координаты консоли начинаются с 1
+    line = y + 3
+    output = []
+    for x in range(1, len(new_str), 2):
+        if old_str[x] != new_str[x]:
+            output.append(f"\x1b[{line};{offset + 4 + x}H{new_str[x]}")
+    return "".join(output)
 
-def _str_row(row: List[Cell]) -> str:
+
+@lru_cache(maxsize=4096)
+def _str_row(width: int, row: RowState) -> str:
     """Строковое представление ряда игрового поля для вывода в консоль."""
-    str_row = "|".join(_str_cell(cell) for cell in row)
+    str_row = "|".join(
+        _str_cell(Cell(_cell_type(row, x))) for x in range(width)
+    )
     return f"|{str_row}|"
 
 
+def _cell_type(row: RowState, x: int) -> CellType:
+    """Получение типа клетки ряда по его состоянию."""
+    value = 0
+    for (i, layer) in enumerate(row):
+        value |= (layer >> x & 1) << i
+    return CellType(value)
+
+
 def _str_cell(cell: Cell) -> str:
     """Строковое представление клетки для вывода в консоль."""
     if cell.is_destroyed:
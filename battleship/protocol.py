@@ -0,0 +1,48 @@
+import struct
+from enum import IntEnum
+from typing import Tuple
+
+from battleship import const
+from battleship.exceptions import ProtocolError
+
+
+class MessageType(IntEnum):
+    """Тип сообщения протокола."""
+
+    COORDS = 1
+    MOVE_RESULT = 2
+    TURN = 3
+    WATCH = 4
+    FIELD_UPDATE = 5
+    SALVO = 6
+    SALVO_RESULTS = 7
+    KEEPALIVE = 8
+    SALVO_SIZE = 9
+    FORFEIT = 10
+
+
+# версия протокола, тип сообщения и длина содержимого
+FRAME_HEADER = struct.Struct("!BBH")
+
+
+def pack_frame(message_type: MessageType, payload: bytes) -> bytes:
+    """Упаковка сообщения в кадр протокола."""
+    return FRAME_HEADER.pack(
+        const.PROTOCOL_VERSION, message_type, len(payload)
+    ) + payload
+
+
+def unpack_frame_header(header: bytes) -> Tuple[MessageType, int]:
+    """Получение типа сообщения и длины содержимого из заголовка кадра.
+
+    Заголовок читается из начала данных, поэтому ими может быть и буфер.
+    """
+    version, message_type, length = FRAME_HEADER.unpack_from(header)
+    if version != const.PROTOCOL_VERSION:
+        raise ProtocolError(
+            f"Неподдерживаемая версия протокола: {version}."
+        )
+    try:
+        return MessageType(message_type), length
+    except ValueError:
+        raise ProtocolError(f"Неизвестный тип сообщения: {message_type}.")
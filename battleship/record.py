@@ -0,0 +1,485 @@
+import argparse
+import itertools as it
+import mmap
+import os
+import random
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from battleship.ai import SHOOTERS, Shooter
+from battleship.battleship import Battleship, MoveResult
+from battleship.compressor import compress_field, decompress_field
+from battleship.placement import ShipPoints
+
+
+MAGIC = b"BSR4"
+INDEX_MAGIC = b"BSRI"
+SNAPSHOT_INTERVAL = 32
+
+# магическое число, ширина и высота поля
+HEADER = struct.Struct("!4sII")
+# задано ли начальное значение генератора матча и само значение
+SEED = struct.Struct("!?q")
+# количество кораблей игрока
+SHIPS_COUNT = struct.Struct("!I")
+# границы корабля
+SHIP = struct.Struct("!IIII")
+# тип записи
+TAG = struct.Struct("!c")
+# стреляющий игрок, координаты выстрела и его результат
+TURN = struct.Struct("!BIIB")
+# номер хода, после которого сделан снимок, и длина снимка
+SNAPSHOT = struct.Struct("!II")
+# длина поля в снимке: поля игроков кодируются в разное число байт
+FIELD_LENGTH = struct.Struct("!I")
+# количество снимков в индексе
+INDEX_SIZE = struct.Struct("!I")
+# номер хода снимка и смещение записи снимка в файле
+INDEX_ENTRY = struct.Struct("!IQ")
+# смещение индекса в файле и магическое число индекса
+TRAILER = struct.Struct("!Q4s")
+
+TURN_TAG = b"T"
+SNAPSHOT_TAG = b"S"
+INDEX_TAG = b"I"
+
+
+class Turn(NamedTuple):
+    """Ход записанной игры."""
+
+    player: int
+    cell_x: int
+    cell_y: int
+    move_result: MoveResult
+
+
+class GameRecorder:
+    """Запись игры в файл.
+
+    Файл состоит из заголовка с размерами поля, начальным значением
+    генератора матча (если оно известно) и флотами обоих игроков, за
+    которым по мере игры дописываются ходы и, каждые `snapshot_interval`
+    ходов, снимки полей обоих игроков. При закрытии в конец файла
+    дописывается индекс снимков, по которому читатель переходит к любому
+    ходу, не проигрывая игру с начала.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        battleships: Tuple[Battleship, Battleship],
+        snapshot_interval: int = SNAPSHOT_INTERVAL,
+        seed: Optional[int] = None,
+    ):
+        self.battleships = battleships
+        self.snapshot_interval = snapshot_interval
+        self.turns = 0
+
+        self._file: BinaryIO = open(path, "wb")
+        self._index: List[Tuple[int, int]] = []
+
+        width, height = battleships[0].width, battleships[0].height
+        self._file.write(HEADER.pack(MAGIC, width, height))
+        if seed is not None and not -2**63 <= seed < 2**63:
+            seed = None
+        self._file.write(SEED.pack(seed is not None, seed or 0))
+        for battleship in battleships:
+            self._file.write(SHIPS_COUNT.pack(len(battleship.ships)))
+            for ship_points in battleship.ships:
+                self._file.write(SHIP.pack(*ship_points))
+
+    def record_turn(
+        self, player: int, cell_x: int, cell_y: int, move_result: MoveResult
+    ):
+        """Запись хода после того, как он сделан на полях игроков."""
+        self._file.write(TAG.pack(TURN_TAG))
+        self._file.write(TURN.pack(player, cell_x, cell_y, move_result))
+        self.turns += 1
+
+        if self.turns % self.snapshot_interval == 0:
+            self._write_snapshot()
+
+    def close(self):
+        """Запись индекса снимков и закрытие файла."""
+        index_offset = self._file.tell()
+        self._file.write(TAG.pack(INDEX_TAG))
+        self._file.write(INDEX_SIZE.pack(len(self._index)))
+        for (turn, offset) in self._index:
+            self._file.write(INDEX_ENTRY.pack(turn, offset))
+        self._file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+        self._file.close()
+
+    def _write_snapshot(self):
+        """Запись снимка полей обоих игроков."""
+        snapshot = bytearray()
+        for battleship in self.battleships:
+            field_data = compress_field(battleship.field)
+            snapshot += FIELD_LENGTH.pack(len(field_data))
+            snapshot += field_data
+        self._index.append((self.turns, self._file.tell()))
+        self._file.write(TAG.pack(SNAPSHOT_TAG))
+        self._file.write(SNAPSHOT.pack(self.turns, len(snapshot)))
+        self._file.write(snapshot)
+
+
+class GameLog:
+    """Запись игры в память.
+
+    Даёт те же поля и ходы, что и `GameRecord`, для игр, которые не нужно
+    сохранять в файл.
+    """
+
+    def __init__(self):
+        self.width = self.height = 0
+        self.fleets: List[List[ShipPoints]] = []
+        self.turns: List[Turn] = []
+
+    def begin(self, battleships: Tuple[Battleship, Battleship]):
+        """Запись полей игроков перед первым ходом."""
+        self.width, self.height = battleships[0].width, battleships[0].height
+        self.fleets = [list(battleship.ships) for battleship in battleships]
+
+    def record_turn(
+        self, player: int, cell_x: int, cell_y: int, move_result: MoveResult
+    ):
+        """Запись хода."""
+        self.turns.append(Turn(player, cell_x, cell_y, move_result))
+
+    def iter_turns(self) -> Iterator[Turn]:
+        """Итерирование по ходам."""
+        return iter(self.turns)
+
+
+class GameRecord:
+    """Чтение записанной игры.
+
+    Файл отображается в память, поэтому чтение не загружает его целиком.
+    Если игра была записана не до конца и индекса нет, он строится одним
+    проходом по записям.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.width, self.height = HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError(f"Файл {path} не является записью игры.")
+
+        has_seed, seed = SEED.unpack_from(self._data, HEADER.size)
+        self.seed: Optional[int] = seed if has_seed else None
+
+        offset = HEADER.size + SEED.size
+        self.fleets: List[List[ShipPoints]] = []
+        for _ in range(2):
+            (ships_count,) = SHIPS_COUNT.unpack_from(self._data, offset)
+            offset += SHIPS_COUNT.size
+            fleet = []
+            for _ in range(ships_count):
+                fleet.append(SHIP.unpack_from(self._data, offset))
+                offset += SHIP.size
+            self.fleets.append(fleet)
+
+        self._records_offset = offset
+        self._index = self._read_index()
+
+    def close(self):
+        """Закрытие файла."""
+        self._data.close()
+
+    def initial_battleships(self) -> Tuple[Battleship, Battleship]:
+        """Получение полей игроков перед первым ходом."""
+        battleships = []
+        for fleet in self.fleets:
+            battleship = Battleship(self.width, self.height)
+            for ship_points in fleet:
+                battleship._place_ship(*ship_points)
+            battleships.append(battleship)
+        return tuple(battleships)
+
+    def iter_turns(self, offset: Optional[int] = None) -> Iterator[Turn]:
+        """Итерирование по ходам, начиная с записи по смещению `offset`.
+
+        Если запись оборвалась посреди хода или снимка, итерирование
+        заканчивается на последней целой записи.
+        """
+        data = self._data
+        offset = self._records_offset if offset is None else offset
+        while True:
+            tag, end = self._record_end(offset)
+            if tag == TURN_TAG:
+                player, cell_x, cell_y, move_result = TURN.unpack_from(
+                    data, offset + TAG.size
+                )
+                yield Turn(player, cell_x, cell_y, MoveResult(move_result))
+            elif tag != SNAPSHOT_TAG:
+                return
+            offset = end
+
+    def state_at(self, turn: int) -> Tuple[Battleship, Battleship]:
+        """Получение полей игроков после `turn` ходов.
+
+        Поля восстанавливаются из ближайшего снимка перед ходом, а
+        оставшиеся ходы проигрываются с помощью `hit_cell`.
+        """
+        battleships = self.initial_battleships()
+        played = 0
+        offset = None
+        for (snapshot_turn, snapshot_offset) in self._index:
+            if snapshot_turn > turn:
+                break
+            played, offset = snapshot_turn, snapshot_offset
+
+        if offset is not None:
+            offset = self._restore_snapshot(battleships, offset)
+
+        for record in self.iter_turns(offset):
+            if played == turn:
+                break
+            battleships[1 - record.player].hit_cell(
+                record.cell_x, record.cell_y
+            )
+            played += 1
+
+        return battleships
+
+    def _restore_snapshot(
+        self, battleships: Tuple[Battleship, Battleship], offset: int
+    ) -> int:
+        """Восстановление полей из снимка. Возвращает смещение за ним."""
+        offset += TAG.size
+        _, length = SNAPSHOT.unpack_from(self._data, offset)
+        offset += SNAPSHOT.size
+
+        start = offset
+        for battleship in battleships:
+            (field_length,) = FIELD_LENGTH.unpack_from(self._data, start)
+            start += FIELD_LENGTH.size
+            field = decompress_field(self._data[start:start+field_length])
+            battleship.load_field(field)
+            start += field_length
+
+        return offset + length
+
+    def _read_index(self) -> List[Tuple[int, int]]:
+        """Чтение индекса снимков из конца файла или построение его."""
+        data = self._data
+        if len(data) >= TRAILER.size:
+            index_offset, magic = TRAILER.unpack_from(
+                data, len(data) - TRAILER.size
+            )
+            if magic == INDEX_MAGIC:
+                offset = index_offset + TAG.size
+                (size,) = INDEX_SIZE.unpack_from(data, offset)
+                offset += INDEX_SIZE.size
+                return [
+                    INDEX_ENTRY.unpack_from(data, offset + i*INDEX_ENTRY.size)
+                    for i in range(size)
+                ]
+
+        index = []
+        offset = self._records_offset
+        while True:
+            tag, end = self._record_end(offset)
+            if tag == SNAPSHOT_TAG:
+                (turn, _) = SNAPSHOT.unpack_from(data, offset + TAG.size)
+                index.append((turn, offset))
+            elif tag != TURN_TAG:
+                return index
+            offset = end
+
+    def _record_end(self, offset: int) -> Tuple[Optional[bytes], int]:
+        """Тип записи по смещению `offset` и смещение за ней.
+
+        Для записи, оборванной на середине, тип - `None`: запись игры,
+        прерванной во время записи хода, заканчивается там же, где и
+        последняя целая запись.
+        """
+        data = self._data
+        if offset + TAG.size > len(data):
+            return None, offset
+        (tag,) = TAG.unpack_from(data, offset)
+        end = offset + TAG.size
+        if tag == TURN_TAG:
+            end += TURN.size
+        elif tag == SNAPSHOT_TAG:
+            if end + SNAPSHOT.size > len(data):
+                return None, offset
+            _, length = SNAPSHOT.unpack_from(data, end)
+            end += SNAPSHOT.size + length
+        if end > len(data):
+            return None, offset
+        return tag, end
+
+
+def verify_record(
+    path: str, shooter_class: Optional[Type[Shooter]] = None
+) -> bool:
+    """Проверка записанной игры.
+
+    Игра проигрывается заново, и результат каждого хода, посчитанный
+    `hit_cell`, сравнивается с записанным. Если задана стратегия, она
+    ведёт поле соперника каждого игрока и на каждом ходу предлагает
+    клетку выстрела. Если в записи есть начальное значение генератора
+    матча, стратегии получают тот же генератор, что и в `play_match`, и
+    предложенная клетка должна совпасть с записанной. Иначе клетка
+    должна быть в пределах поля, и игрок не должен был в неё стрелять.
+    """
+    record = GameRecord(path)
+    try:
+        battleships = record.initial_battleships()
+        enemy_battleships = tuple(
+            Battleship(record.width, record.height) for _ in range(2)
+        )
+        shooters = None
+        if shooter_class is not None:
+            shooters = _replay_shooters(record, shooter_class)
+            if shooters is None:
+                return False
+            # стратегия читает поле соперника, которое ведёт проверка
+            enemy_battleships = tuple(
+                shooter.enemy_battleship for shooter in shooters
+            )
+        shot_cells = (set(), set())
+
+        for turn in record.iter_turns():
+            if shooters is not None:
+                cell = shooters[turn.player].next_shot()
+                if record.seed is not None:
+                    legal = cell == (turn.cell_x, turn.cell_y)
+                else:
+                    legal = (
+                        0 <= cell[0] < record.width
+                        and 0 <= cell[1] < record.height
+                        and cell not in shot_cells[turn.player]
+                    )
+                if not legal:
+                    return False
+
+            move_result = battleships[1 - turn.player].hit_cell(
+                turn.cell_x, turn.cell_y
+            )
+            if move_result != turn.move_result:
+                return False
+
+            shot_cells[turn.player].add((turn.cell_x, turn.cell_y))
+            enemy_battleships[turn.player].update_cell(
+                turn.cell_x, turn.cell_y, move_result
+            )
+            if shooters is not None:
+                shooters[turn.player].record_shot(
+                    turn.cell_x, turn.cell_y, move_result
+                )
+        return True
+    finally:
+        record.close()
+
+
+def _replay_shooters(
+    record: GameRecord, shooter_class: Type[Shooter]
+) -> Optional[List[Shooter]]:
+    """Стратегии обоих игроков для проверки записи.
+
+    Если начальное значение генератора известно, расстановка и стратегии
+    создаются в том же порядке, что и в `play_match`, и расстановка
+    должна совпасть с записанной, иначе возвращается `None`.
+    """
+    if record.seed is None:
+        return [
+            shooter_class(
+                Battleship(record.width, record.height), random.Random(0)
+            )
+            for _ in range(2)
+        ]
+
+    # флот восстанавливается в порядке расстановки кораблей
+    fleet: Dict[int, int] = {}
+    for (x0, y0, x1, y1) in record.fleets[0]:
+        length = max(x1 - x0, y1 - y0) + 1
+        fleet[length] = fleet.get(length, 0) + 1
+
+    rng = random.Random(record.seed)
+    shooters = []
+    for ships in record.fleets:
+        battleship = Battleship(record.width, record.height)
+        battleship.place_ships(fleet, rng)
+        if battleship.ships != tuple(map(tuple, ships)):
+            return None
+        enemy_battleship = Battleship(record.width, record.height)
+        shooters.append(shooter_class(enemy_battleship, rng, fleet))
+    return shooters
+
+
+def verify_records(
+    paths: Iterable[str],
+    shooter_class: Optional[Type[Shooter]] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 10_000,
+) -> Iterator[Tuple[str, bool]]:
+    """Проверка множества записанных игр в пуле процессов.
+
+    Пути обрабатываются частями по `batch_size` штук, поэтому количество
+    игр, одновременно находящихся в работе, ограничено.
+    """
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(it.islice(paths, batch_size))
+            if not batch:
+                return
+            results = executor.map(
+                verify_record,
+                batch,
+                it.repeat(shooter_class),
+                chunksize=max(1, len(batch) // 64),
+            )
+            yield from zip(batch, results)
+
+
+def iter_record_paths(paths: List[str]) -> Iterator[str]:
+    """Итерирование по файлам записей, включая файлы в папках."""
+    for path in paths:
+        if os.path.isdir(path):
+            for (root, _, files) in os.walk(path):
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Проверка записанных игр повторным проигрыванием."
+    )
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--shooter", choices=SHOOTERS)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    checked = failed = 0
+    for (path, ok) in verify_records(
+        iter_record_paths(args.paths),
+        SHOOTERS.get(args.shooter),
+        args.workers,
+    ):
+        checked += 1
+        if not ok:
+            failed += 1
+            print(f"Расхождение: {path}")
+
+    print(f"Проверено игр: {checked}, с расхождениями: {failed}")
+
+
+if __name__ == "__main__":
+    main()
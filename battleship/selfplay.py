@@ -0,0 +1,329 @@
+import argparse
+import multiprocessing
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from typing import List, NamedTuple, Optional, Tuple, Type
+
+from battleship.ai import SHOOTERS, Shooter
+from battleship.battleship import Battleship
+from battleship.commander import Commander, pipe_commanders
+from battleship.placement import Fleet
+from battleship.record import GameLog, GameRecorder
+
+
+class MatchResult(NamedTuple):
+    """Результат матча."""
+
+    winner: int
+    shots: Tuple[int, int]
+
+
+class MatchStats:
+    """Сводная статистика матчей."""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0, 0]
+        self.shots_to_win = Counter()
+
+    def add(self, result: MatchResult):
+        """Учёт результата матча."""
+        self.games += 1
+        self.wins[result.winner] += 1
+        self.shots_to_win[result.shots[result.winner]] += 1
+
+    def merge(self, other: "MatchStats"):
+        """Объединение со статистикой других матчей."""
+        self.games += other.games
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        self.shots_to_win.update(other.shots_to_win)
+
+    @property
+    def average_shots_to_win(self) -> float:
+        """Среднее количество выстрелов победителя."""
+        if not self.games:
+            return 0.0
+        total = sum(
+            shots * count for (shots, count) in self.shots_to_win.items()
+        )
+        return total / self.games
+
+    def percentile(self, q: float) -> int:
+        """Перцентиль количества выстрелов победителя (`q` от 0 до 100)."""
+        rank = q / 100 * self.games
+        seen = 0
+        for shots in sorted(self.shots_to_win):
+            seen += self.shots_to_win[shots]
+            if seen >= rank:
+                return shots
+        return 0
+
+
+def play_match(
+    first: Type[Shooter],
+    second: Type[Shooter],
+    width: int = 10,
+    height: int = 10,
+    fleet: Optional[Fleet] = None,
+    seed: Optional[int] = None,
+    first_turn: int = 0,
+    record_path: Optional[str] = None,
+    log: Optional[GameLog] = None,
+) -> MatchResult:
+    """Проведение матча между двумя стратегиями без участия игроков.
+
+    Каждый игрок расставляет свои корабли и ведёт поле соперника так же,
+    как это делается в сетевой игре: выстрел обрабатывается `hit_cell`
+    на поле стреляемого игрока и отмечается `update_cell` на поле
+    соперника стреляющего. После промаха ход переходит к сопернику.
+
+    Если задан `record_path`, игра записывается в этот файл
+    (см. `battleship.record`), а если задан `log` - в память.
+    """
+    rng = random.Random(seed)
+
+    our_battleships = []
+    shooters = []
+    for shooter_class in (first, second):
+        our_battleship = Battleship(width, height)
+        our_battleship.place_ships(fleet, rng)
+        our_battleships.append(our_battleship)
+
+        enemy_battleship = Battleship(width, height)
+        shooters.append(shooter_class(enemy_battleship, rng, fleet))
+
+    recorder = None
+    if record_path is not None:
+        recorder = GameRecorder(
+            record_path, tuple(our_battleships), seed=seed
+        )
+    if log is not None:
+        log.begin(tuple(our_battleships))
+
+    shots = [0, 0]
+    turn = first_turn
+    try:
+        while True:
+            shooter = shooters[turn]
+            cell_x, cell_y = shooter.next_shot()
+            move_result = our_battleships[1 - turn].hit_cell(cell_x, cell_y)
+            shooter.enemy_battleship.update_cell(cell_x, cell_y, move_result)
+            shooter.record_shot(cell_x, cell_y, move_result)
+            shots[turn] += 1
+            if recorder is not None:
+                recorder.record_turn(turn, cell_x, cell_y, move_result)
+            if log is not None:
+                log.record_turn(turn, cell_x, cell_y, move_result)
+
+            if move_result.is_win:
+                return MatchResult(winner=turn, shots=tuple(shots))
+            elif move_result.is_miss:
+                turn = 1 - turn
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+def play_over_channel(
+    channel: Commander,
+    shooter_class: Type[Shooter],
+    first_turn: bool,
+    width: int = 10,
+    height: int = 10,
+    fleet: Optional[Fleet] = None,
+    seed: Optional[int] = None,
+) -> Tuple[bool, Tuple[int, int]]:
+    """Игра стратегии против другой стороны через командира.
+
+    Ходы передаются так же, как в сетевой игре `process_game`.
+    Возвращает, победил ли игрок, и количество выстрелов игрока и
+    другой стороны.
+    """
+    rng = random.Random(seed)
+    our_battleship = Battleship(width, height)
+    our_battleship.place_ships(fleet, rng)
+    shooter = shooter_class(Battleship(width, height), rng, fleet)
+
+    shots = [0, 0]
+    turn = first_turn
+    while True:
+        if turn:
+            cell_x, cell_y = shooter.next_shot()
+            channel.send_coords(cell_x, cell_y)
+            move_result = channel.receive_move_result()
+            shooter.enemy_battleship.update_cell(cell_x, cell_y, move_result)
+            shooter.record_shot(cell_x, cell_y, move_result)
+            shots[0] += 1
+        else:
+            move_result = our_battleship.hit_cell(*channel.receive_coords())
+            channel.send_move_result(move_result)
+            shots[1] += 1
+
+        if move_result.is_win:
+            return turn, tuple(shots)
+        elif move_result.is_miss:
+            turn = not turn
+
+
+def play_pipe_match(
+    first: Type[Shooter],
+    second: Type[Shooter],
+    width: int = 10,
+    height: int = 10,
+    fleet: Optional[Fleet] = None,
+    seed: Optional[int] = None,
+) -> MatchResult:
+    """Проведение матча между стратегиями в двух процессах.
+
+    Игроки обмениваются ходами через каналы (см. `PipeCommander`), а не
+    через сокет, поэтому параллельные матчи не делят порт. Первым ходит
+    первый игрок, второй играет в дочернем процессе.
+    """
+    first_channel, second_channel = pipe_commanders()
+    process = multiprocessing.Process(
+        target=_play_second,
+        args=(
+            first_channel, second_channel, second, width, height, fleet,
+            seed,
+        ),
+    )
+    process.start()
+    second_channel.close()
+    with closing(first_channel):
+        won, shots = play_over_channel(
+            first_channel, first, True, width, height, fleet, seed
+        )
+    process.join()
+    return MatchResult(winner=0 if won else 1, shots=shots)
+
+
+def _play_second(
+    first_channel: Commander,
+    second_channel: Commander,
+    shooter_class: Type[Shooter],
+    width: int,
+    height: int,
+    fleet: Optional[Fleet],
+    seed: Optional[int],
+):
+    """Игра второго игрока в дочернем процессе."""
+    first_channel.close()
+    with closing(second_channel):
+        play_over_channel(
+            second_channel,
+            shooter_class,
+            False,
+            width,
+            height,
+            fleet,
+            None if seed is None else seed + 1,
+        )
+
+
+def run_matches(
+    games: int,
+    first: Type[Shooter],
+    second: Type[Shooter],
+    width: int = 10,
+    height: int = 10,
+    fleet: Optional[Fleet] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 100,
+    record_dir: Optional[str] = None,
+) -> MatchStats:
+    """Проведение множества матчей в пуле процессов.
+
+    Матчи делятся на части по `chunk_size` штук, каждая часть проводится
+    в отдельном процессе, и статистика частей объединяется. Первый ход
+    в матчах переходит от игрока к игроку по очереди. При `workers=1`
+    матчи проводятся в текущем процессе. Если задана `record_dir`,
+    каждый матч записывается в отдельный файл в этой папке.
+    """
+    tasks = [
+        (
+            start, min(chunk_size, games - start),
+            first, second, width, height, fleet, seed, record_dir,
+        )
+        for start in range(0, games, chunk_size)
+    ]
+
+    stats = MatchStats()
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for chunk_stats in map(_play_chunk, tasks):
+            stats.merge(chunk_stats)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_stats in executor.map(_play_chunk, tasks):
+                stats.merge(chunk_stats)
+
+    return stats
+
+
+def _play_chunk(task: tuple) -> MatchStats:
+    """Проведение части матчей."""
+    (
+        start, count, first, second, width, height, fleet, seed, record_dir,
+    ) = task
+    stats = MatchStats()
+    for game in range(start, start + count):
+        record_path = None
+        if record_dir is not None:
+            record_path = os.path.join(record_dir, f"{game:08d}.bsr")
+        stats.add(
+            play_match(
+                first, second, width, height, fleet,
+                seed=None if seed is None else seed + game,
+                first_turn=game % 2,
+                record_path=record_path,
+            )
+        )
+    return stats
+
+
+def format_stats(stats: MatchStats) -> List[str]:
+    """Строковое представление статистики матчей."""
+    percentiles = "/".join(str(stats.percentile(q)) for q in (50, 90, 99))
+    return [
+        f"Матчей: {stats.games}",
+        f"Побед первого игрока: {stats.wins[0]}",
+        f"Побед второго игрока: {stats.wins[1]}",
+        "Среднее число выстрелов до победы: "
+        f"{stats.average_shots_to_win:.2f}",
+        f"Перцентили 50/90/99: {percentiles}",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Проведение матчей между стратегиями стрельбы."
+    )
+    parser.add_argument("games", type=int)
+    parser.add_argument("--first", choices=SHOOTERS, default="random")
+    parser.add_argument("--second", choices=SHOOTERS, default="random")
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--record-dir")
+    args = parser.parse_args()
+
+    stats = run_matches(
+        args.games,
+        SHOOTERS[args.first],
+        SHOOTERS[args.second],
+        width=args.width,
+        height=args.height,
+        seed=args.seed,
+        workers=args.workers,
+        record_dir=args.record_dir,
+    )
+    print("\n".join(format_stats(stats)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from battleship import const
+from battleship.compressor import (
+    decompress_move_result,
+    decompress_move_results,
+    decompress_salvo,
+    decompress_varint,
+    decomress_coords,
+)
+from battleship.exceptions import ProtocolError
+from battleship.protocol import (
+    MessageType,
+    pack_frame,
+    unpack_frame_header,
+)
+from battleship.spectator import Broadcast
+
+
+Player = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class GameServer:
+    """Сервер лобби.
+
+    Принимает любое количество соединений на одном порту, подбирает
+    игрокам соперников в порядке очереди и проводит каждый матч отдельной
+    сопрограммой. Сервер только пересылает кадры `Commander` между
+    игроками: координаты хода - от стреляющего к стреляемому, результат
+    хода - обратно, а очерёдность ходов отслеживает по результатам.
+
+    Игрок сообщает количество выстрелов за ход сообщением
+    `MessageType.SALVO_SIZE` сразу после согласия на соединение, и
+    соперники подбираются только с одинаковым количеством. При
+    нескольких выстрелах за ход игрок делает залп (`MessageType.SALVO`),
+    на который получит результаты всех выстрелов одним сообщением; ход
+    переходит к сопернику, если все выстрелы залпа прошли мимо.
+    Сообщения `KEEPALIVE` игрока, от которого ожидается ход или его
+    результат, пересылаются сопернику, чтобы тот знал, что игрок на связи.
+    Вместо хода игрок может сдаться (`MessageType.FORFEIT`): сообщение
+    пересылается сопернику, и матч завершается.
+
+    Каждый матч транслируется зрителям (см. `battleship.spectator`):
+    зритель подключается с подтверждением `MSG_WATCHER_CONF` и номером
+    матча, а затем получает изменения полей обоих игроков.
+    """
+
+    def __init__(
+        self,
+        host: str = "",
+        port: int = const.PORT,
+        width: int = 10,
+        height: int = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.width = width
+        self.height = height
+        self.matches_played = 0
+        self.broadcasts: Dict[int, Broadcast] = {}
+
+        self._next_match_id = 0
+        # очереди ожидающих соперника игроков по количеству выстрелов
+        self._lobby: Dict[int, Deque[Player]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._matches = set()
+
+    async def start(self):
+        """Запуск сервера."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Обслуживание соединений до остановки.
+
+        Сервер запускается, если он ещё не запущен.
+        """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Остановка сервера и всех идущих матчей."""
+        self._server.close()
+        await self._server.wait_closed()
+        for match in list(self._matches):
+            match.cancel()
+        await asyncio.gather(*self._matches, return_exceptions=True)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Приём нового игрока в лобби или нового зрителя."""
+        try:
+            response = await reader.readexactly(const.CONFIRM_MESSAGE_SIZE)
+            if response == const.MSG_CLIENT_CONF:
+                _, salvo_size_data = await _read_frame(
+                    reader, MessageType.SALVO_SIZE
+                )
+                salvo_size, _ = decompress_varint(salvo_size_data)
+                if salvo_size:
+                    await self._join_lobby((reader, writer), salvo_size)
+                    return
+            elif response == const.MSG_WATCHER_CONF:
+                await self._watch(reader, writer)
+                return
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+
+        writer.close()
+
+    async def _watch(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Подписка зрителя на трансляцию матча до её окончания."""
+        _, match_id_data = await _read_frame(reader, MessageType.WATCH)
+        match_id, _ = decompress_varint(match_id_data)
+        broadcast = self.broadcasts.get(match_id)
+        if broadcast is None:
+            writer.close()
+            return
+
+        writer.write(const.MSG_SERVER_CONF)
+        broadcast.subscribe(writer)
+        try:
+            # от зрителя ничего не ожидается, чтение только отслеживает
+            # закрытие соединения
+            while await reader.read(1024):
+                pass
+        finally:
+            broadcast.unsubscribe(writer)
+            writer.close()
+
+    async def _join_lobby(self, player: Player, salvo_size: int):
+        """Постановка игрока в очередь и подбор ему соперника."""
+        lobby = self._lobby.setdefault(salvo_size, deque())
+        while lobby:
+            opponent = lobby.popleft()
+            if opponent[1].is_closing() or opponent[0].at_eof():
+                continue
+
+            match_id = self._next_match_id
+            self._next_match_id += 1
+            self.broadcasts[match_id] = Broadcast(self.width, self.height)
+
+            match = asyncio.ensure_future(
+                self._play_match(match_id, opponent, player, salvo_size)
+            )
+            self._matches.add(match)
+            match.add_done_callback(self._matches.discard)
+            return
+
+        lobby.append(player)
+
+    async def _play_match(
+        self,
+        match_id: int,
+        first: Player,
+        second: Player,
+        salvo_size: int = 1,
+    ):
+        """Проведение матча между двумя игроками.
+
+        Первым ходит игрок, дольше ожидавший соперника. Матч завершается
+        победой одного из игроков либо разрывом соединения любым из них.
+        Ход не из `salvo_size` выстрелов - нарушение протокола, и матч
+        прерывается.
+        """
+        shot_type = (
+            MessageType.COORDS if salvo_size == 1 else MessageType.SALVO
+        )
+        players = (first, second)
+        broadcast = self.broadcasts[match_id]
+        try:
+            for (_, writer), turn_message in zip(
+                players, (const.MSG_FIRST_TURN, const.MSG_SECOND_TURN)
+            ):
+                writer.write(
+                    bytes(const.MSG_SERVER_CONF)
+                    + pack_frame(MessageType.TURN, turn_message)
+                )
+
+            turn = 0
+            while True:
+                (shooter_reader, shooter_writer) = players[turn]
+                (target_reader, target_writer) = players[1 - turn]
+
+                message_type, frame, shot_data = await _read_any_frame(
+                    shooter_reader,
+                    (shot_type, MessageType.FORFEIT),
+                    target_writer,
+                )
+                if message_type == MessageType.FORFEIT:
+                    target_writer.write(frame)
+                    await target_writer.drain()
+                    self.matches_played += 1
+                    return
+
+                if shot_type == MessageType.COORDS:
+                    cells = [decomress_coords(shot_data)]
+                else:
+                    cells = decompress_salvo(shot_data)
+                if len(cells) != salvo_size:
+                    raise ProtocolError(
+                        f"Ожидался залп из {salvo_size} выстрелов, "
+                        f"получено {len(cells)}."
+                    )
+                target_writer.write(frame)
+
+                if shot_type == MessageType.COORDS:
+                    frame, move_result_data = await _read_frame(
+                        target_reader, MessageType.MOVE_RESULT, shooter_writer
+                    )
+                    move_results = [decompress_move_result(move_result_data)]
+                else:
+                    frame, move_results_data = await _read_frame(
+                        target_reader,
+                        MessageType.SALVO_RESULTS,
+                        shooter_writer,
+                    )
+                    move_results = decompress_move_results(move_results_data)
+                shooter_writer.write(frame)
+                await shooter_writer.drain()
+
+                broadcast.record_moves(1 - turn, cells, move_results)
+                if any(move_result.is_win for move_result in move_results):
+                    self.matches_played += 1
+                    return
+                elif all(move_result.is_miss for move_result in move_results):
+                    turn = 1 - turn
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            return
+        finally:
+            for (_, writer) in players:
+                writer.close()
+            broadcast.close()
+            del self.broadcasts[match_id]
+
+
+async def _read_frame(
+    reader: asyncio.StreamReader,
+    message_type: MessageType,
+    keepalive_writer: Optional[asyncio.StreamWriter] = None,
+) -> Tuple[bytes, bytes]:
+    """Чтение кадра заданного типа: весь кадр целиком и его содержимое."""
+    _, frame, payload = await _read_any_frame(
+        reader, (message_type,), keepalive_writer
+    )
+    return frame, payload
+
+
+async def _read_any_frame(
+    reader: asyncio.StreamReader,
+    message_types: Tuple[MessageType, ...],
+    keepalive_writer: Optional[asyncio.StreamWriter] = None,
+) -> Tuple[MessageType, bytes, bytes]:
+    """Чтение кадра одного из заданных типов.
+
+    Сообщения `KEEPALIVE` перед кадром пропускаются и, если задан
+    `keepalive_writer`, пересылаются в него. Возвращает тип сообщения,
+    весь кадр целиком и его содержимое.
+    """
+    while True:
+        header = await reader.readexactly(const.FRAME_HEADER_SIZE)
+        received_type, length = unpack_frame_header(header)
+        if received_type != MessageType.KEEPALIVE:
+            break
+        keepalive = header + await reader.readexactly(length)
+        if keepalive_writer is not None:
+            keepalive_writer.write(keepalive)
+
+    if received_type not in message_types:
+        expected = ", ".join(
+            message_type.name for message_type in message_types
+        )
+        raise ProtocolError(
+            f"Ожидалось сообщение {expected}, получено {received_type.name}."
+        )
+    payload = await reader.readexactly(length)
+    return received_type, header + payload, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Сервер лобби для множества матчей."
+    )
+    parser.add_argument("--host", default="")
+    parser.add_argument("--port", type=int, default=const.PORT)
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+from typing import Dict, Sequence, Tuple
+
+from battleship.battleship import Battleship, MoveResult
+from battleship.delta import FieldHistory
+from battleship.protocol import MessageType, pack_frame
+
+
+# размер неотправленных зрителю данных, после которого зритель считается
+# отстающим, и размер, до которого его буфер должен опустеть, чтобы
+# зритель получил снимок полей и снова начал получать изменения
+HIGH_WATER = 64 * 1024
+LOW_WATER = 16 * 1024
+
+
+class Broadcast:
+    """Трансляция матча зрителям.
+
+    Хранит поля обоих игроков в том виде, в котором их видят соперники,
+    и после каждого хода кодирует изменения поля один раз, а затем пишет
+    один и тот же кадр всем зрителям. Запись не дожидается отправки,
+    поэтому медленные зрители не задерживают игроков: зритель с
+    переполненным буфером пропускает кадры, пока буфер не опустеет,
+    а затем получает снимок обоих полей.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.battleships = (
+            Battleship(width, height),
+            Battleship(width, height),
+        )
+        self.histories = tuple(
+            FieldHistory(battleship.field) for battleship in self.battleships
+        )
+        # зритель и то, отстаёт ли он
+        self._spectators: Dict[asyncio.StreamWriter, bool] = {}
+
+    @property
+    def spectators_count(self) -> int:
+        """Количество зрителей."""
+        return len(self._spectators)
+
+    def subscribe(self, writer: asyncio.StreamWriter):
+        """Подписка зрителя на трансляцию."""
+        writer.write(self._snapshot_frames())
+        self._spectators[writer] = False
+
+    def unsubscribe(self, writer: asyncio.StreamWriter):
+        """Отписка зрителя от трансляции."""
+        self._spectators.pop(writer, None)
+
+    def record_move(
+        self, player: int, cell_x: int, cell_y: int, move_result: MoveResult
+    ):
+        """Учёт хода по полю игрока `player` и рассылка изменений."""
+        self.record_moves(player, ((cell_x, cell_y),), (move_result,))
+
+    def record_moves(
+        self,
+        player: int,
+        cells: Sequence[Tuple[int, int]],
+        move_results: Sequence[MoveResult],
+    ):
+        """Учёт залпа по полю игрока `player` и рассылка изменений.
+
+        Все выстрелы залпа рассылаются одним изменением поля.
+        """
+        # победный ход на поле выглядит так же, как потопление
+        move_results = [
+            MoveResult.DESTROYED if move_result.is_win else move_result
+            for move_result in move_results
+        ]
+
+        history = self.histories[player]
+        version = history.version
+        self.battleships[player].update_cells(cells, move_results)
+        history.commit()
+
+        self.publish(_update_frame(player, history.encode(since=version)))
+
+    def publish(self, frame: bytes):
+        """Рассылка кадра всем зрителям."""
+        snapshot = None
+        for (writer, lagging) in list(self._spectators.items()):
+            if writer.is_closing():
+                self.unsubscribe(writer)
+                continue
+
+            buffered = writer.transport.get_write_buffer_size()
+            if lagging:
+                if buffered <= LOW_WATER:
+                    if snapshot is None:
+                        snapshot = self._snapshot_frames()
+                    writer.write(snapshot)
+                    self._spectators[writer] = False
+            elif buffered > HIGH_WATER:
+                self._spectators[writer] = True
+            else:
+                writer.write(frame)
+
+    def close(self):
+        """Завершение трансляции."""
+        for writer in self._spectators:
+            writer.close()
+        self._spectators.clear()
+
+    def _snapshot_frames(self) -> bytes:
+        """Кадры со снимками полей обоих игроков."""
+        return b"".join(
+            _update_frame(player, history.encode())
+            for (player, history) in enumerate(self.histories)
+        )
+
+
+def _update_frame(player: int, update: bytes) -> bytes:
+    """Кадр с обновлением поля игрока."""
+    return pack_frame(MessageType.FIELD_UPDATE, bytes((player,)) + update)
+
+
+def split_update(message: bytes) -> Tuple[int, bytes]:
+    """Получение номера игрока и обновления его поля из сообщения."""
+    return message[0], message[1:]
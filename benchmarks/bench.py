@@ -0,0 +1,450 @@
+"""Замеры производительности горячих участков игры.
+
+Запуск всех замеров с сохранением результатов:
+
+    python -m benchmarks.bench run -o benchmarks/baseline.json
+
+Сравнение с сохранёнными результатами:
+
+    python -m benchmarks.bench compare benchmarks/baseline.json
+
+Замеры с суффиксом `.alloc` считают не время, а память, выделяемую за
+вызов, в байтах.
+"""
+
+import argparse
+import copy
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from battleship import const
+from battleship.battleship import Battleship, MoveResult
+from battleship.cell import CellType
+from battleship.command_parser import parse_command
+from battleship.commander import pipe_commanders, socket_commanders
+from battleship.compressor import (
+    compress_coords,
+    compress_field,
+    compress_move_result,
+    decomress_coords,
+    decompress_field,
+    decompress_move_result,
+)
+from battleship.placement import Fleet
+from battleship.printer import Renderer, print_fields
+
+
+# стороны полей, на которых проводятся замеры
+SIZES = (10, 20, 40)
+# количество повторов замера, из которых берётся лучший
+REPEATS = 5
+# минимальное время одного повтора
+MIN_TIME = 0.05
+# наибольшее количество вызовов в повторе для замеров с подготовкой
+# состояния перед каждым вызовом
+MAX_STATEFUL_NUMBER = 1000
+# количество вызовов при замере выделяемой памяти
+ALLOCATION_CALLS = 100
+THRESHOLD = 0.2
+# залп и его результаты для замеров обмена залпами
+SALVO = ((1, 2), (3, 4), (5, 6), (7, 8), (9, 0))
+SALVO_RESULTS = (MoveResult.MISS,) * 4 + (MoveResult.DAMAGED,)
+
+
+class Benchmark(NamedTuple):
+    """Замер.
+
+    `setup` готовит состояние, которое передаётся в `run`. Если замер
+    меняет состояние (`stateful`), то состояние готовится заново для
+    каждого вызова, и подготовка не входит в замер. Если `allocations`,
+    замеряется не время, а выделяемая за вызов память.
+    """
+
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    stateful: bool = False
+    allocations: bool = False
+
+
+def scaled_fleet(size: int) -> Fleet:
+    """Флот, занимающий ту же долю поля, что и стандартный флот на 10x10."""
+    scale = max(1, size*size // 100)
+    return {
+        length: count * scale
+        for (length, count) in const.DEFAULT_FLEET.items()
+    }
+
+
+def placed_battleship(size: int, seed: int = 0) -> Battleship:
+    """Поле с размещённым флотом."""
+    battleship = Battleship(size, size)
+    battleship.place_ships(scaled_fleet(size), random.Random(seed))
+    return battleship
+
+
+def played_battleship(size: int, seed: int = 0) -> Battleship:
+    """Поле в середине игры: обстреляна половина клеток."""
+    battleship = placed_battleship(size, seed)
+    rng = random.Random(seed)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    for (x, y) in rng.sample(cells, len(cells) // 2):
+        battleship.hit_cell(x, y)
+    return battleship
+
+
+def near_empty_battleship(size: int) -> Battleship:
+    """Поле, на котором не подбита только одна клетка последнего корабля."""
+    battleship = placed_battleship(size)
+    x0, y0, *_ = battleship.ships[-1]
+    for (ship_x0, ship_y0, ship_x1, ship_y1) in battleship.ships:
+        for x in range(ship_x0, ship_x1 + 1):
+            for y in range(ship_y0, ship_y1 + 1):
+                if (x, y) != (x0, y0):
+                    battleship.hit_cell(x, y)
+    return battleship
+
+
+def iter_benchmarks() -> Iterator[Benchmark]:
+    """Итерирование по всем замерам."""
+    for size in SIZES:
+        fleet = scaled_fleet(size)
+        rng = random.Random(0)
+        yield Benchmark(
+            f"place_ships[{size}]",
+            lambda size=size: Battleship(size, size),
+            lambda battleship, fleet=fleet, rng=rng: battleship.place_ships(
+                fleet, rng
+            ),
+            stateful=True,
+        )
+
+        full = placed_battleship(size)
+        ship_x, ship_y, *_ = full.ships[0]
+        yield Benchmark(
+            f"hit_cell.full[{size}]",
+            lambda full=full: full.clone(),
+            lambda battleship, x=ship_x, y=ship_y: battleship.hit_cell(x, y),
+            stateful=True,
+        )
+
+        near_empty = near_empty_battleship(size)
+        last_x, last_y, *_ = near_empty.ships[-1]
+        yield Benchmark(
+            f"hit_cell.win[{size}]",
+            lambda near_empty=near_empty: near_empty.clone(),
+            lambda battleship, x=last_x, y=last_y: battleship.hit_cell(x, y),
+            stateful=True,
+        )
+
+        enemy = Battleship(size, size)
+        for x in range(4):
+            enemy.update_cell(x, 0, MoveResult.DAMAGED)
+        yield Benchmark(
+            f"get_ship_points[{size}]",
+            lambda enemy=enemy: enemy,
+            lambda enemy: list(enemy.get_ship_points(0, 0)),
+        )
+
+        played = played_battleship(size)
+        yield Benchmark(
+            f"clone[{size}]",
+            lambda played=played: played,
+            lambda battleship: battleship.clone(),
+        )
+
+        field = played.field
+        yield Benchmark(
+            f"compress_field[{size}]",
+            lambda field=field: field,
+            compress_field,
+        )
+        yield Benchmark(
+            f"decompress_field[{size}]",
+            lambda field=field: compress_field(field),
+            decompress_field,
+        )
+
+    yield Benchmark(
+        "compress_coords",
+        lambda: (5, 7),
+        lambda coords: compress_coords(*coords),
+    )
+    yield Benchmark(
+        "decompress_coords", lambda: compress_coords(5, 7), decomress_coords
+    )
+    yield Benchmark(
+        "compress_move_result",
+        lambda: MoveResult.DESTROYED,
+        compress_move_result,
+    )
+    yield Benchmark(
+        "decompress_move_result",
+        lambda: compress_move_result(MoveResult.DESTROYED),
+        decompress_move_result,
+    )
+    yield Benchmark("parse_command", lambda: "5 Д", parse_command)
+
+    # вывод в консоль поддерживает только поле 10x10
+    player_field = played_battleship(10).field
+    enemy_field = played_battleship(10, seed=1).field
+    yield Benchmark(
+        "print_fields",
+        lambda: (player_field, enemy_field),
+        lambda fields: print_fields(*fields),
+    )
+    yield Benchmark(
+        "renderer.render",
+        lambda: _renderer_state(player_field, enemy_field),
+        _render_next,
+        stateful=True,
+    )
+
+    yield Benchmark("commander.round_trip", socket_commanders, _round_trip)
+    yield Benchmark("commander.pipe_round_trip", pipe_commanders, _round_trip)
+    yield Benchmark(
+        "commander.round_trip.alloc",
+        socket_commanders,
+        _round_trip,
+        allocations=True,
+    )
+    yield Benchmark(
+        "commander.salvo_round_trip.alloc",
+        socket_commanders,
+        _salvo_round_trip,
+        allocations=True,
+    )
+
+
+def _renderer_state(player_field, enemy_field):
+    """Renderer с уже выведенным кадром и поле со следующим выстрелом."""
+    renderer = Renderer(io.StringIO())
+    renderer.render(player_field, enemy_field)
+    enemy_field = copy.deepcopy(enemy_field)
+    enemy_field.add_type(0, 0, CellType.MISS)
+    return renderer, player_field, enemy_field
+
+
+def _render_next(state):
+    """Вывод кадра, в котором изменилась одна клетка."""
+    renderer, player_field, enemy_field = state
+    renderer.render(player_field, enemy_field)
+
+
+def _round_trip(commanders):
+    """Ход: координаты в одну сторону, результат в другую."""
+    first, second = commanders
+    first.send_coords(5, 7)
+    second.receive_coords()
+    second.send_move_result(MoveResult.MISS)
+    first.receive_move_result()
+
+
+def _salvo_round_trip(commanders):
+    """Ход залпом: клетки в одну сторону, результаты в другую."""
+    first, second = commanders
+    first.send_salvo(SALVO)
+    second.receive_salvo()
+    second.send_salvo_results(SALVO_RESULTS)
+    first.receive_salvo_results()
+
+
+def calibrate(benchmark: Benchmark) -> Tuple[int, float]:
+    """Подбор количества вызовов в повторе замера.
+
+    Количество вызовов подбирается так, чтобы повтор длился не меньше
+    `MIN_TIME`. Возвращает количество вызовов и время первого повтора
+    в секундах.
+    """
+    number = 1
+    while True:
+        elapsed = _time_calls(benchmark, number)
+        if elapsed >= MIN_TIME or (
+            benchmark.stateful and number >= MAX_STATEFUL_NUMBER
+        ):
+            return number, elapsed
+        number *= 2
+
+
+def measure_allocations(benchmark: Benchmark) -> float:
+    """Замер памяти, выделяемой за один вызов, в байтах.
+
+    Память считает `tracemalloc`: за вызов берётся пик выделенной памяти
+    сверх выделенной до вызова, а из `ALLOCATION_CALLS` вызовов - лучший.
+    Первый вызов не учитывается, так как в нём заполняются буферы.
+    """
+    state = benchmark.setup()
+    benchmark.run(state)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOCATION_CALLS):
+            if benchmark.stateful:
+                state = benchmark.setup()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            benchmark.run(state)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return min(peaks)
+
+
+def _time_calls(benchmark: Benchmark, number: int) -> float:
+    """Время `number` вызовов замера в секундах."""
+    if benchmark.stateful:
+        states = [benchmark.setup() for _ in range(number)]
+    else:
+        states = [benchmark.setup()] * number
+
+    run = benchmark.run
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for state in states:
+            run(state)
+        return time.perf_counter() - start
+
+
+def run_benchmarks(pattern: Optional[str] = None) -> Dict[str, float]:
+    """Проведение замеров, имя которых содержит `pattern`.
+
+    Время вызова - лучшее из `REPEATS` повторов замера. Повторы идут
+    кругами по всем замерам, а не подряд:
+    если машина на несколько секунд замедлилась, это задевает по одному
+    повтору многих замеров, а не все повторы одного, и лучший повтор
+    каждого замера остаётся честным.
+    """
+    benchmarks = [
+        benchmark
+        for benchmark in iter_benchmarks()
+        if pattern is None or pattern in benchmark.name
+    ]
+    timed = [
+        benchmark for benchmark in benchmarks if not benchmark.allocations
+    ]
+
+    numbers = {}
+    best = {}
+    for benchmark in timed:
+        numbers[benchmark.name], best[benchmark.name] = calibrate(benchmark)
+    for _ in range(REPEATS - 1):
+        for benchmark in timed:
+            elapsed = _time_calls(benchmark, numbers[benchmark.name])
+            best[benchmark.name] = min(best[benchmark.name], elapsed)
+
+    results = {}
+    for benchmark in benchmarks:
+        if benchmark.allocations:
+            value, unit = measure_allocations(benchmark), "Б"
+        else:
+            value = best[benchmark.name] / numbers[benchmark.name] * 1e9
+            unit = "нс"
+        results[benchmark.name] = value
+        print(f"{benchmark.name:<32}{value:>14.0f} {unit}", file=sys.stderr)
+    return results
+
+
+def compare(
+    baseline: Dict[str, float],
+    current: Dict[str, float],
+    threshold: float = THRESHOLD,
+) -> List[str]:
+    """Получение замеров, замедлившихся больше, чем на `threshold`."""
+    return [
+        name
+        for (name, value) in current.items()
+        if name in baseline and value > baseline[name] * (1 + threshold)
+    ]
+
+
+def load_results(path: str) -> Dict[str, float]:
+    """Чтение результатов замеров из файла."""
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def save_results(path: str, results: Dict[str, float]):
+    """Запись результатов замеров в файл."""
+    with open(path, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            file,
+            indent=2,
+            ensure_ascii=False,
+        )
+        file.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Замеры производительности горячих участков игры."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="провести замеры")
+    run_parser.add_argument("-o", "--output")
+    run_parser.add_argument("-k", "--pattern")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="сравнить замеры с сохранёнными"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument(
+        "--current", help="файл с замерами вместо проведения новых"
+    )
+    compare_parser.add_argument("-k", "--pattern")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(args.pattern)
+        if args.output:
+            save_results(args.output, results)
+        return
+
+    baseline = load_results(args.baseline)
+    if args.current:
+        current = load_results(args.current)
+    else:
+        current = run_benchmarks(args.pattern)
+
+    regressions = compare(baseline, current, args.threshold)
+    print(f"{'Замер':<32}{'Было':>12}{'Стало':>12}")
+    for (name, value) in current.items():
+        if name not in baseline:
+            continue
+        change = value / baseline[name] - 1
+        mark = "  ЗАМЕДЛЕНИЕ" if name in regressions else ""
+        print(
+            f"{name:<32}{baseline[name]:>12.0f}{value:>12.0f}"
+            f"{change:>+9.1%}{mark}"
+        )
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,49 @@
 import os
+import sys
 from contextlib import closing
 from typing import Tuple
 
-from battleship.commander import Commander, MainCommander, SubCommander
+from battleship import metrics
+from battleship.ai import BotCommander
+from battleship.commander import (
+    Commander,
+    LobbyCommander,
+    MainCommander,
+    SubCommander,
+)
 from battleship.command_parser import parse_command
-from battleship.exceptions import InvalidCommand
-from battleship.printer import print_fields
+from battleship.exceptions import InvalidCommand, ProtocolError
+from battleship.game_loop import (
+    RESULT_MESSAGES,
+    EventLoop,
+    GameSession,
+    salvo_outcome,
+)
+from battleship.printer import Renderer
 from battleship.battleship import Battleship
 
 
 def main():
+    metrics_path = os.environ.get(metrics.METRICS_ENV)
+    if metrics_path:
+        metrics.enable(metrics_path)
+    try:
+        play()
+    finally:
+        metrics.disable()
+
+
+def play():
+    """Выбор режима игры и игра."""
     mode = None
-    while mode not in {"s", "c"}:
-        mode = input("Сервер - s, клиент - c: ")
+    while mode not in {"s", "c", "l", "b"}:
+        mode = input(
+            "Сервер - s, клиент - c, лобби - l, игра с компьютером - b: "
+        )
+
+    # клиент играет с тем количеством выстрелов за ход, которое выбрал
+    # сервер, а в лобби соперник подбирается с тем же количеством
+    salvo_size = get_salvo_size() if mode in {"s", "l"} else 1
 
     if mode == "s":
         with closing(MainCommander()) as server:
@@ -20,17 +51,74 @@ def main():
 
             server.listen_and_connect_to_client()
             server.handshake()
-            process_game(server, first_turn=True)
+            server.send_salvo_size(salvo_size)
+            play_network_game(server, first_turn=True, salvo_size=salvo_size)
 
     elif mode == "c":
         server_host = input("Введите адрес сервера: ")
         with closing(SubCommander(server_host)) as client:
             client.connect_to_server()
             client.handshake()
-            process_game(client, first_turn=False)
-
-
-def process_game(channel: Commander, first_turn: bool):
+            salvo_size = client.receive_salvo_size()
+            print(f"Выстрелов за ход: {salvo_size}")
+            play_network_game(
+                client, first_turn=False, salvo_size=salvo_size
+            )
+
+    elif mode == "l":
+        server_host = input("Введите адрес сервера лобби: ")
+        with closing(LobbyCommander(server_host)) as client:
+            client.connect_to_server()
+            print("Ожидание соперника...")
+            client.handshake(salvo_size)
+            play_network_game(
+                client,
+                first_turn=client.receive_turn(),
+                salvo_size=salvo_size,
+            )
+
+    elif mode == "b":
+        with closing(BotCommander()) as bot:
+            process_game(bot, first_turn=True)
+
+
+def play_network_game(
+    channel: Commander, first_turn: bool, salvo_size: int = 1
+):
+    """Игра по сети.
+
+    Там, где консоль можно ждать через `selectors`, игра идёт в цикле
+    событий (см. `battleship.game_loop`), иначе - поочерёдным блокирующим
+    ожиданием ввода и сообщений.
+    """
+    if sys.platform == "win32":
+        # другая сторона может играть в цикле событий и ждать KEEPALIVE
+        with channel.keepalive():
+            process_game(channel, first_turn, salvo_size)
+        return
+
+    loop = EventLoop()
+    with closing(loop):
+        GameSession(loop, channel, first_turn, salvo_size).play()
+
+
+def process_game(channel: Commander, first_turn: bool, salvo_size: int = 1):
+    """Игра поочерёдным блокирующим ожиданием ввода и сообщений."""
+    renderer = Renderer()
+    try:
+        result = play_turns(channel, first_turn, salvo_size, renderer)
+    except (OSError, ProtocolError):
+        result = "disconnected"
+
+    renderer.clear()
+    print(RESULT_MESSAGES[result])
+    metrics.end_game(result=result)
+
+
+def play_turns(
+    channel: Commander, first_turn: bool, salvo_size: int, renderer: Renderer
+) -> str:
+    """Ходы игроков до окончания игры. Возвращает итог игры."""
     our_battleship = Battleship(10, 10)
     our_battleship.place_ships()
 
@@ -38,38 +126,54 @@ def process_game(channel: Commander, first_turn: bool):
 
     turn = first_turn
     while True:
-        clear_screen()
-        print_fields(our_battleship.field, enemy_battleship.field)
+        renderer.render(our_battleship.field, enemy_battleship.field)
 
         if turn:
-            cell_x, cell_y = get_move_coords()
-            channel.send_coords(cell_x, cell_y)
-            move_result = channel.receive_move_result()
+            if salvo_size == 1:
+                cell_x, cell_y = get_move_coords()
+                channel.send_coords(cell_x, cell_y)
+                move_result = channel.receive_move_result()
 
-            enemy_battleship.update_cell(cell_x, cell_y, move_result)
+                enemy_battleship.update_cell(cell_x, cell_y, move_result)
+            else:
+                cells = [get_move_coords() for _ in range(salvo_size)]
+                channel.send_salvo(cells)
+                move_results = channel.receive_salvo_results()
+
+                enemy_battleship.update_cells(cells, move_results)
+                move_result = salvo_outcome(move_results)
 
             if move_result.is_miss:
                 turn = False
             elif move_result.is_win:
-                clear_screen()
-                print("Вы победили!")
-                return
+                return "win"
 
         else:
-            cell_x, cell_y = channel.receive_coords()
-            move_result = our_battleship.hit_cell(cell_x, cell_y)
-            channel.send_move_result(move_result)
+            if channel.peer_forfeited():
+                return "win"
+            if salvo_size == 1:
+                cell_x, cell_y = channel.receive_coords()
+                move_result = our_battleship.hit_cell(cell_x, cell_y)
+                channel.send_move_result(move_result)
+            else:
+                cells = channel.receive_salvo()
+                move_results = our_battleship.hit_cells(cells)
+                channel.send_salvo_results(move_results)
+                move_result = salvo_outcome(move_results)
 
             if move_result.is_miss:
                 turn = True
             elif move_result.is_win:
-                clear_screen()
-                print("Вы проиграли!")
-                return
+                return "loss"
 
 
-def clear_screen():
-    os.system("clear")
+def get_salvo_size() -> int:
+    """Получение количества выстрелов за ход от игрока."""
+    while True:
+        salvo_size = input("Выстрелов за ход (1 - обычная игра): ") or "1"
+        if salvo_size.isdecimal() and int(salvo_size) > 0:
+            return int(salvo_size)
+        print("Неверный формат ввода!")
 
 
 def get_move_coords() -> Tuple[int, int]:
@@ -0,0 +1,13 @@
+import pytest
+
+from battleship.commander import socket_commanders
+
+
+@pytest.fixture
+def channels():
+    first, second = socket_commanders()
+
+    yield first, second
+
+    first.close()
+    second.close()
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from battleship.ai import BotCommander, DensityShooter, Shooter
+from battleship.battleship import Battleship, MoveResult
+
+
+def test_density_shooter_targets_hit():
+    enemy_battleship = Battleship(width=10, height=10)
+    shooter = DensityShooter(enemy_battleship, random.Random(1))
+
+    enemy_battleship.update_cell(4, 4, MoveResult.DAMAGED)
+    shooter.record_shot(4, 4, MoveResult.DAMAGED)
+
+    assert shooter.next_shot() in {(3, 4), (5, 4), (4, 3), (4, 5)}
+    assert shooter.density[3*10 + 3] == 0
+
+
+def test_density_shooter_skips_destroyed_neighbourhood():
+    enemy_battleship = Battleship(width=3, height=3)
+    shooter = DensityShooter(enemy_battleship, random.Random(1), {1: 2})
+
+    enemy_battleship.update_cell(1, 1, MoveResult.DESTROYED)
+    shooter.record_shot(1, 1, MoveResult.DESTROYED)
+
+    assert not any(shooter.density)
+
+
+def test_bot_commander():
+    bot = BotCommander()
+
+    move_result = None
+    for cell in range(100):
+        bot.send_coords(cell % 10, cell // 10)
+        move_result = bot.receive_move_result()
+        if move_result.is_win:
+            break
+    assert move_result.is_win
+
+    cell_x, cell_y = bot.receive_coords()
+    bot.send_move_result(MoveResult.MISS)
+    assert bot.enemy_battleship.field[cell_y][cell_x].is_miss
+
+
+def test_shooter_without_next_shot():
+    class SilentShooter(Shooter):
+        pass
+
+    with pytest.raises(TypeError):
+        SilentShooter(Battleship(width=10, height=10), random.Random(1))
@@ -0,0 +1,31 @@
+import numpy as np
+
+from battleship.ai import DensityShooter, RandomShooter
+from battleship.analytics import analyze_matches, analyze_records
+from battleship.record import iter_record_paths
+from battleship.selfplay import run_matches
+
+
+def test_records_match_engine(tmp_path):
+    run_matches(
+        6, RandomShooter, DensityShooter, seed=1, workers=1,
+        record_dir=str(tmp_path),
+    )
+    recorded = analyze_records(
+        iter_record_paths([str(tmp_path)]), workers=2, chunk_size=4
+    )
+    played = analyze_matches(
+        6, RandomShooter, DensityShooter, seed=1, workers=1
+    )
+
+    assert recorded.games == played.games == 6
+    for name in ("occupancy", "first_hit_sum", "results", "sink_count"):
+        assert np.array_equal(getattr(recorded, name), getattr(played, name))
+
+    # на каждом поле по 20 клеток кораблей, победитель топит все 10
+    assert played.occupancy.sum() == 6 * 2 * 20
+    assert played.first_hit_count.sum() >= 6 * 20
+    assert played.sink_count.sum() >= 6 * 10
+    assert played.shots_to_sink()[1] == 1.0
+    shot = played.results.sum(axis=2) > 0
+    assert np.allclose(played.result_rates.sum(axis=2)[shot], 1.0)
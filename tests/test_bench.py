@@ -0,0 +1,15 @@
+from benchmarks.bench import Benchmark, compare, measure_allocations
+
+
+def test_compare():
+    baseline = {"fast": 100.0, "slow": 100.0, "removed": 100.0}
+    current = {"fast": 90.0, "slow": 130.0, "added": 1000.0}
+    assert compare(baseline, current) == ["slow"]
+    assert compare(baseline, current, threshold=0.5) == []
+
+
+def test_measure_allocations():
+    benchmark = Benchmark(
+        "alloc", lambda: None, lambda _: bytearray(10_000), allocations=True
+    )
+    assert 10_000 <= measure_allocations(benchmark) < 11_000
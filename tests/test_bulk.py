@@ -0,0 +1,24 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from battleship.bulk import generate_fleets, iter_fleets  # noqa: E402
+
+
+def test_generate_fleets():
+    boards = generate_fleets(200, 10, 10, rng=np.random.default_rng(1))
+
+    assert boards.shape == (200, 10, 10)
+    assert (boards.sum(axis=(1, 2)) == 4*1 + 3*2 + 2*3 + 1*4).all()
+    # корабли не касаются друг друга углами
+    assert not (boards[:, :-1, :-1] & boards[:, 1:, 1:]).any()
+    assert not (boards[:, :-1, 1:] & boards[:, 1:, :-1]).any()
+
+
+def test_iter_fleets_chunks():
+    chunks = list(
+        iter_fleets(25, 6, 5, {2: 2, 1: 2}, chunk_size=10, packed=True)
+    )
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert all(chunk.shape[1] == 4 for chunk in chunks)
@@ -30,3 +30,12 @@ def test_invalid_command(command):
 )
 def test_valid_command(command, expected):
     assert parse_command(command) == expected
+
+
+def test_large_board():
+    assert parse_command("1234 АА", 10_000, 10_000) == (10, 1233)
+    assert parse_command("10000 КК", 10_000, 10_000) == (109, 9_999)
+    with pytest.raises(InvalidCommand):
+        parse_command("11 А")
+    with pytest.raises(InvalidCommand):
+        parse_command("1 ББ")
@@ -2,16 +2,28 @@ import pytest
 
 from battleship import compressor
 from battleship.battleship import MoveResult
+from battleship.cell import Cell, CellType
+from battleship.field import Field, make_field
 
 
 @pytest.mark.parametrize(
-    "cell_x, cell_y", [(0, 0), (0, 1), (1, 0), (1, 1), (10, 10)]
+    "cell_x, cell_y",
+    [
+        (0, 0), (0, 1), (1, 0), (1, 1), (10, 10), (127, 127), (127, 128),
+        (128, 127), (300, 9_999),
+    ],
 )
 def test_coords(cell_x, cell_y):
     assert compressor.decomress_coords(
         compressor.compress_coords(cell_x, cell_y)
     ) == (cell_x, cell_y)
 
+    cells = [(cell_x, cell_y), (3, 4), (cell_y, cell_x)]
+    buffer = bytearray()
+    compressor.write_salvo(buffer, cells)
+    assert buffer == compressor.compress_salvo(cells)
+    assert compressor.decompress_salvo(buffer) == cells
+
 
 @pytest.mark.parametrize(
     "move_result",
@@ -26,3 +38,38 @@ def test_move_result(move_result):
     assert compressor.decompress_move_result(
         compressor.compress_move_result(move_result)
     ) == move_result
+
+
+def test_field():
+    field = Field(width=12, height=3)
+    field[0][0].set_ship()
+    field[0][0].set_damaged()
+    field[2][11].set_miss()
+    field[1][5] = Cell(CellType.SHIP | CellType.DESTROYED)
+
+    field_data = compressor.compress_field(field)
+    assert len(field_data) == 2 + len(CellType) * 5
+    assert compressor.decompress_field(field_data) == field
+
+
+def test_sparse_field():
+    field = make_field(width=10_000, height=10_000)
+    field[0][0].set_ship()
+    field[5_000][7].set_miss()
+    field[9_999][9_999] = Cell(CellType.SHIP | CellType.DESTROYED)
+
+    field_data = compressor.compress_field(field)
+    assert len(field_data) < 32
+    assert compressor.decompress_field(field_data) == field
+
+    # размеры поля не ограничены 16 битами
+    field = make_field(width=100_000, height=3)
+    field[2][99_999].set_miss()
+    field_data = compressor.compress_field(field)
+    assert compressor.decompress_field(field_data) == field
+
+
+@pytest.mark.parametrize("number", [0, 1, 127, 128, 300, 2**40])
+def test_varint(number):
+    data = b"\xff" + compressor.compress_varint(number)
+    assert compressor.decompress_varint(data, 1) == (number, len(data))
@@ -0,0 +1,82 @@
+from battleship.battleship import Battleship, MoveResult
+from battleship.compressor import compress_field
+from battleship.delta import FieldHistory, FieldReplica
+
+
+def test_delta_updates():
+    battleship = Battleship(width=10, height=10)
+    battleship._place_ship(0, 0, 3, 0)
+    history = FieldHistory(battleship.field)
+    replica = FieldReplica()
+
+    assert replica.apply(history.encode())
+    assert replica.field == battleship.field
+
+    for (x, y) in [(0, 0), (1, 0), (5, 5), (2, 0), (3, 0)]:
+        version = replica.version
+        battleship.hit_cell(x, y)
+        history.commit()
+        update = history.encode(since=version)
+
+        assert replica.apply(update)
+        assert replica.version == history.version
+        assert replica.field == battleship.field
+        assert len(update) < 16
+
+
+def test_resync():
+    battleship = Battleship(width=4, height=4)
+    history = FieldHistory(battleship.field, depth=2)
+    replica = FieldReplica()
+    replica.apply(history.encode())
+
+    for x in range(3):
+        battleship.update_cell(x, 0, MoveResult.MISS)
+        history.commit()
+
+    # версия копии уже забыта историей, поэтому приходит снимок поля
+    update = history.encode(since=replica.version)
+    assert len(update) > len(compress_field(battleship.field))
+    assert replica.apply(update)
+    assert replica.field == battleship.field
+
+
+def test_base_mismatch():
+    battleship = Battleship(width=4, height=4)
+    history = FieldHistory(battleship.field)
+    battleship.update_cell(0, 0, MoveResult.MISS)
+    history.commit()
+
+    replica = FieldReplica()
+    assert not replica.apply(history.encode(since=0))
+    assert replica.field is None
+
+
+def test_encode_uncommitted():
+    battleship = Battleship(width=4, height=4)
+    history = FieldHistory(battleship.field)
+    replica = FieldReplica()
+    replica.apply(history.encode())
+
+    # изменения без commit попадают в обновление под новой версией
+    battleship.update_cell(1, 1, MoveResult.MISS)
+    assert replica.apply(history.encode(since=replica.version))
+    assert replica.version == history.version == 1
+    assert replica.field == battleship.field
+
+
+def test_sparse_delta_updates():
+    battleship = Battleship(width=300, height=300)
+    battleship._place_ship(290, 10, 293, 10)
+    history = FieldHistory(battleship.field)
+    replica = FieldReplica()
+    replica.apply(history.encode())
+
+    for (x, y) in [(290, 10), (291, 10), (5, 250)]:
+        version = replica.version
+        battleship.hit_cell(x, y)
+        update = history.encode(since=version)
+
+        assert replica.apply(update)
+        assert replica.field == battleship.field
+        assert len(update) < 16
@@ -0,0 +1,61 @@
+import pytest
+
+from battleship.cell import Cell, CellType
+from battleship.field import BaseField, Field, SparseField, make_field
+
+
+def test_cell_views():
+    field = Field(width=3, height=2)
+    field[1][2].set_ship()
+    field[1][2].set_damaged()
+    field[0][0] = Cell(CellType.MISS)
+
+    assert field[1][2].is_ship and field[1][2].is_damaged
+    assert not field[1][2].is_miss
+    assert field[0][0].type == CellType.MISS
+    assert field[0][1].type == CellType.DEFAULT
+
+    assert field.get_layer(CellType.SHIP) == field.bit(2, 1)
+    assert field.has_type(2, 1, CellType.DAMAGED)
+
+
+def test_as_transposed():
+    field = Field(width=3, height=2)
+    field[0][1].set_ship()
+
+    columns = [[cell.is_ship for cell in column]
+               for column in field.as_transposed()]
+    assert len(columns) == 3
+    assert [bool(is_ship) for is_ship in columns[1]] == [True, False]
+
+
+def test_sparse_field():
+    field = make_field(width=10_000, height=10_000)
+    assert isinstance(field, SparseField)
+
+    field[9_999][5_000].set_ship()
+    field.add_cells(CellType.DAMAGED, [9_999 * 10_000 + 5_000])
+    field[0][0] = Cell(CellType.MISS)
+    field[0][0] = Cell(CellType.DEFAULT)
+
+    assert field[9_999][5_000].is_ship and field[9_999][5_000].is_damaged
+    assert field.get_type(1, 1) == CellType.DEFAULT
+    assert len(field.cells) == 1
+
+
+def test_row_layers():
+    dense = Field(width=5, height=3)
+    sparse = SparseField(width=5, height=3)
+    for field in (dense, sparse):
+        field.add_cells(CellType.SHIP, [1, 2, 13])
+        field.add_type(2, 0, CellType.DAMAGED)
+        field.set_type(4, 1, CellType.MISS)
+    assert sparse.row_layers() == dense.row_layers()
+
+
+def test_incomplete_field():
+    class RowlessField(BaseField):
+        get_type = SparseField.get_type
+
+    with pytest.raises(TypeError):
+        RowlessField()
@@ -0,0 +1,131 @@
+import io
+import os
+import socket
+import threading
+
+import pytest
+
+from battleship.battleship import MoveResult
+from battleship.game_loop import EventLoop, GameSession
+from battleship.printer import Renderer
+from battleship.protocol import MessageType
+
+
+@pytest.fixture
+def pipe():
+    read_fd, write_fd = os.pipe()
+    yield read_fd, write_fd
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def make_session(channel, input_fd, first_turn, **timeouts):
+    return GameSession(
+        EventLoop(),
+        channel,
+        first_turn,
+        input_fd=input_fd,
+        renderer=Renderer(io.StringIO()),
+        **timeouts,
+    )
+
+
+def test_loss_with_keepalives(channels, pipe):
+    ours, enemy = channels
+    session = make_session(ours, pipe[0], first_turn=False)
+    cells = [
+        (x, y)
+        for (x0, y0, x1, y1) in session.our_battleship.ships
+        for x in range(x0, x1 + 1)
+        for y in range(y0, y1 + 1)
+    ]
+
+    # все выстрелы соперника приходят до запуска цикла
+    with enemy.batch():
+        for cell_x, cell_y in cells:
+            enemy.send_keepalive()
+            enemy.send_coords(cell_x, cell_y)
+
+    assert session.play() == "loss"
+    results = [enemy.receive_move_result() for _ in cells]
+    assert results[-1] == MoveResult.WIN
+    assert MoveResult.MISS not in results
+
+
+def test_move_from_input(channels, pipe):
+    ours, enemy = channels
+    session = make_session(ours, pipe[0], first_turn=True)
+
+    def answer():
+        assert enemy.receive_coords() == (4, 4)
+        enemy.send_move_result(MoveResult.WIN)
+
+    thread = threading.Thread(target=answer)
+    thread.start()
+    os.write(pipe[1], "не ход\n5 Д\n".encode())
+
+    assert session.play() == "win"
+    thread.join()
+    assert "Неверный формат ввода!" in session.renderer.stream.getvalue()
+
+
+def test_disconnect_on_send(channels, pipe):
+    ours, _ = channels
+    session = make_session(ours, pipe[0], first_turn=True)
+    # соединение оборвалось до выстрела игрока
+    ours._client_socket.shutdown(socket.SHUT_WR)
+    os.write(pipe[1], "5 Д\n6 Е\n".encode())
+
+    assert session.play() == "disconnected"
+
+
+def test_timeouts(channels, pipe):
+    ours, enemy = channels
+    session = make_session(
+        ours, pipe[0], first_turn=True, turn_timeout=0.05
+    )
+    assert session.play() == "timeout"
+    assert enemy.peer_forfeited()
+
+    session = make_session(
+        ours,
+        pipe[0],
+        first_turn=False,
+        keepalive_interval=0.01,
+        peer_timeout=0.1,
+    )
+    assert session.play() == "disconnected"
+    assert enemy.receive_message_type() == MessageType.KEEPALIVE
+
+
+def test_event_loop_timers():
+    loop = EventLoop()
+    calls = []
+    loop.call_later(0.02, lambda: (calls.append(2), loop.stop()))
+    loop.call_later(0.01, lambda: calls.append(1))
+    loop.call_later(0.015, lambda: calls.append(3)).cancel()
+    loop.run()
+    loop.close()
+    assert calls == [1, 2]
+
+
+def test_forfeit_on_timeout(channels):
+    ours, enemy = channels
+    read_fds, write_fds = zip(os.pipe(), os.pipe())
+    session = make_session(
+        ours, read_fds[0], first_turn=True, turn_timeout=0.05
+    )
+    enemy_session = make_session(enemy, read_fds[1], first_turn=False)
+
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(enemy_session.play())
+    )
+    thread.start()
+    assert session.play() == "timeout"
+    thread.join(5)
+    for fd in read_fds + write_fds:
+        os.close(fd)
+
+    # соперник узнаёт о проигрыше по времени, а не о разрыве соединения
+    assert results == ["win"]
@@ -0,0 +1,39 @@
+import socket
+import threading
+
+from battleship import const
+from battleship.loadtest import run_load
+
+
+def test_run_load():
+    stats = run_load(6, concurrency=4, rate=200, seed=1)
+
+    assert stats.clients == 6
+    assert stats.matches == 3
+    assert stats.errors == stats.handshake_failures == 0
+    assert stats.turns == len(stats.latencies) >= 3 * 20
+    assert 0 < stats.percentile(50) <= stats.percentile(99)
+    assert stats.turns_per_second > 0
+
+
+def test_failed_handshakes():
+    server_socket = socket.socket()
+    server_socket.bind(("127.0.0.1", 0))
+    server_socket.listen()
+
+    def reject(count):
+        for _ in range(count):
+            client_socket, _ = server_socket.accept()
+            client_socket.sendall(const.MSG_CLIENT_CONF)
+            client_socket.close()
+
+    thread = threading.Thread(target=reject, args=(2,))
+    thread.start()
+    stats = run_load(
+        2, concurrency=1, port=server_socket.getsockname()[1], timeout=5
+    )
+    thread.join()
+    server_socket.close()
+
+    assert stats.handshake_failures == 2
+    assert stats.matches == stats.turns == 0
@@ -0,0 +1,43 @@
+import json
+
+from battleship import metrics
+from battleship.battleship import Battleship, MoveResult
+from battleship.commander import socket_commanders
+
+
+def test_metrics(tmp_path):
+    original = Battleship.hit_cell
+    path = tmp_path / "metrics.jsonl"
+    collected = metrics.enable(str(path))
+    try:
+        battleship = Battleship(10, 10)
+        battleship._place_ship(0, 0, 0, 0)
+        battleship.hit_cell(1, 1)
+        battleship.hit_cell(0, 0)
+
+        first, second = socket_commanders()
+        first.send_coords(1, 1)
+        second.receive_coords()
+        second.send_move_result(MoveResult.MISS)
+        first.receive_move_result()
+        first.close()
+        second.close()
+        metrics.end_game(result="win")
+    finally:
+        metrics.disable()
+    assert Battleship.hit_cell is original
+
+    (line,) = path.read_text().splitlines()
+    game = json.loads(line)
+    assert game["result"] == "win"
+    assert game["timings"]["engine.hit_cell"]["count"] == 2
+    assert game["timings"]["network.rtt"]["count"] == 1
+    assert game["counters"]["network.sent_messages"] == 2
+    assert (
+        game["counters"]["network.sent_bytes"]
+        == game["counters"]["network.received_bytes"]
+    )
+
+    text = collected.to_prometheus()
+    assert 'battleship_engine_hit_cell_seconds_bucket{le="+Inf"} 2' in text
+    assert "battleship_network_sends_total 2" in text
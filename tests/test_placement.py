@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from battleship.exceptions import CouldNotPlaceShipsError
+from battleship.placement import get_board_masks, place_fleet
+
+
+def test_place_fleet_no_touch():
+    fleet = {3: 2, 2: 2, 1: 3}
+    board = get_board_masks(8, 6)
+    ships_points = place_fleet(8, 6, fleet, rng=random.Random(1))
+
+    lengths = sorted(
+        max(x1 - x0, y1 - y0) + 1 for (x0, y0, x1, y1) in ships_points
+    )
+    assert lengths == [1, 1, 1, 2, 2, 3, 3]
+
+    for i, (x0, y0, x1, y1) in enumerate(ships_points):
+        zone = board.dilate(_mask(board.width, x0, y0, x1, y1))
+        for (other_x0, other_y0, other_x1, other_y1) in ships_points[i+1:]:
+            other = _mask(board.width, other_x0, other_y0, other_x1, other_y1)
+            assert not zone & other
+
+
+def test_place_fleet_large_board():
+    ships_points = place_fleet(10_000, 10_000, {4: 3, 1: 5}, random.Random(1))
+    assert len(ships_points) == 8
+
+    for i, (x0, y0, x1, y1) in enumerate(ships_points):
+        assert 0 <= x0 <= x1 < 10_000 and 0 <= y0 <= y1 < 10_000
+        assert max(x1 - x0, y1 - y0) + 1 in (1, 4)
+        # корабли не касаются друг друга
+        for (other_x0, other_y0, other_x1, other_y1) in ships_points[i+1:]:
+            assert (
+                other_x0 > x1 + 1 or other_x1 < x0 - 1
+                or other_y0 > y1 + 1 or other_y1 < y0 - 1
+            )
+
+
+def test_impossible_fleet():
+    with pytest.raises(CouldNotPlaceShipsError):
+        place_fleet(3, 3, {3: 3})
+
+
+def _mask(width, x0, y0, x1, y1):
+    return sum(
+        1 << (y*width + x)
+        for y in range(y0, y1+1)
+        for x in range(x0, x1+1)
+    )
@@ -0,0 +1,80 @@
+import random
+import time
+
+from battleship.ai import BotCommander
+from battleship.battleship import Battleship
+from battleship.pool import FleetPool
+
+
+def test_fleet_pool_refills():
+    pool = FleetPool(size=8, low_water=4, seed=1)
+    pool.warm_up(8, 8, {3: 1, 2: 2})
+    _wait_for(lambda: pool.available(8, 8, {3: 1, 2: 2}) == 8)
+
+    for _ in range(5):
+        ships_points = pool.get(8, 8, {3: 1, 2: 2})
+        assert len(ships_points) == 3
+    assert pool.available(8, 8, {3: 1, 2: 2}) >= 3
+    _wait_for(lambda: pool.available(8, 8, {3: 1, 2: 2}) == 8)
+
+    battleship = Battleship(8, 8)
+    battleship.adopt_ships(ships_points)
+    assert battleship._ships_left == 3
+    pool.close()
+
+
+def test_empty_pool_places_synchronously():
+    pool = FleetPool(size=1, low_water=0)
+    assert len(pool.get(10, 10)) == 10
+
+    bot = BotCommander(pool=pool)
+    assert bot.our_battleship._ships_left == 10
+    pool.close()
+
+
+def test_pool_keeps_fleet_order():
+    pool = FleetPool(size=1, low_water=0, seed=1)
+    assert [_length(points) for points in pool.get(8, 8, {3: 1, 2: 2})] == [
+        3, 2, 2
+    ]
+    assert [_length(points) for points in pool.get(8, 8, {2: 2, 3: 1})] == [
+        2, 2, 3
+    ]
+    pool.close()
+
+
+def test_pool_matches_place_ships_distribution():
+    # четырёхпалубный корабль ставится первым и поэтому реже прижимается
+    # к краю поля, чем при расстановке от коротких кораблей к длинным
+    games = 2000
+    pool = FleetPool(size=1, low_water=0, seed=1)
+    pooled = sum(_long_ship_on_edge(pool.get(10, 10)) for _ in range(games))
+    pool.close()
+
+    rng = random.Random(2)
+    placed = 0
+    for _ in range(games):
+        battleship = Battleship(10, 10)
+        battleship.place_ships(rng=rng)
+        placed += _long_ship_on_edge(battleship.ships)
+
+    assert abs(pooled - placed) / games < 0.08
+
+
+def _length(points):
+    x0, y0, x1, y1 = points
+    return max(x1 - x0, y1 - y0) + 1
+
+
+def _long_ship_on_edge(ships_points):
+    x0, y0, x1, y1 = next(
+        points for points in ships_points if _length(points) == 4
+    )
+    return min(x0, y0) == 0 or max(x1, y1) == 9
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,77 @@
+import random
+
+from battleship.ai import PosteriorShooter
+from battleship.battleship import Battleship, MoveResult
+from battleship.posterior import (
+    ChainSampler,
+    ExactSampler,
+    hit_probabilities,
+    observe,
+    sample_fleets,
+)
+from battleship.selfplay import play_match
+
+
+def test_exact_sampler_counts_placements():
+    battleship = Battleship(width=4, height=4)
+    battleship.update_cell(1, 1, MoveResult.DAMAGED)
+    battleship.update_cell(1, 2, MoveResult.MISS)
+    observations = observe(battleship.field, {2: 1, 1: 1})
+
+    # двухпалубный корабль через (1, 1) - влево, вправо или вверх, а
+    # однопалубный - в любой клетке не рядом с ним
+    assert ExactSampler(observations).total == 7 + 4 + 7
+
+
+def test_samplers_respect_observations():
+    battleship = Battleship(width=6, height=6)
+    battleship.update_cell(2, 2, MoveResult.DAMAGED)
+    battleship.update_cell(3, 2, MoveResult.MISS)
+    battleship.update_cell(0, 0, MoveResult.DESTROYED)
+    observations = observe(battleship.field, {3: 1, 2: 1, 1: 2})
+    assert observations.remaining == {3: 1, 2: 1, 1: 1}
+
+    rng = random.Random(1)
+    samplers = (ExactSampler(observations), ChainSampler(observations, rng))
+    for sampler in samplers:
+        for _ in range(20):
+            ships_points = sampler.sample(rng)
+            assert len(ships_points) == 3
+            assert any(
+                x0 <= 2 <= x1 and y0 <= 2 <= y1
+                for (x0, y0, x1, y1) in ships_points
+            )
+            assert all(
+                not (x0 <= 3 <= x1 and y0 <= 2 <= y1)
+                and not (x0 <= 1 and y0 <= 1)
+                for (x0, y0, x1, y1) in ships_points
+            )
+
+
+def test_sample_fleets_in_pool():
+    battleship = Battleship(width=6, height=6)
+    observations = observe(battleship.field, {3: 1, 2: 1})
+
+    fleets = sample_fleets(observations, 10, seed=1, workers=2)
+    assert len(fleets) == 10
+    assert fleets == sample_fleets(observations, 10, seed=1, workers=2)
+
+
+def test_hit_probabilities():
+    battleship = Battleship(width=5, height=5)
+    battleship.update_cell(2, 2, MoveResult.DAMAGED)
+    battleship.update_cell(1, 2, MoveResult.MISS)
+    battleship.update_cell(3, 2, MoveResult.MISS)
+    battleship.update_cell(2, 1, MoveResult.MISS)
+
+    probabilities = hit_probabilities(
+        battleship.field, {2: 1}, samples=50, seed=1, workers=1
+    )
+    # единственное положение корабля - вниз от попадания
+    assert probabilities[3*5 + 2] == 1.0
+    assert sum(probabilities) == 2.0
+
+
+def test_posterior_shooter():
+    result = play_match(PosteriorShooter, PosteriorShooter, 6, 6, {2: 2}, 1)
+    assert result.shots[result.winner] <= 36
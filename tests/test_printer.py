@@ -0,0 +1,32 @@
+import io
+
+from battleship.battleship import Battleship
+from battleship.printer import CLEAR_SCREEN, Renderer
+
+
+def test_renderer():
+    our_battleship = Battleship(10, 10)
+    our_battleship._place_ship(0, 0, 0, 1)
+    enemy_battleship = Battleship(10, 10)
+    stream = io.StringIO()
+    renderer = Renderer(stream)
+
+    renderer.render(our_battleship.field, enemy_battleship.field)
+    frame = stream.getvalue()
+    assert frame.startswith(CLEAR_SCREEN)
+    assert " 1 |&| | | | | | | | | |   #    1 | | | | | | | | | | |" in frame
+
+    stream.seek(0)
+    stream.truncate()
+    our_battleship.hit_cell(0, 1)
+    enemy_battleship.update_cell(2, 0, our_battleship.hit_cell(2, 0))
+    renderer.render(our_battleship.field, enemy_battleship.field)
+    # перерисованы только изменившиеся клетки, а курсор переведён под поля
+    assert stream.getvalue() == (
+        "\x1b[3;9H." "\x1b[4;5H+" "\x1b[3;40H." "\x1b[13;1H\x1b[J"
+    )
+
+    stream.seek(0)
+    stream.truncate()
+    renderer.render(our_battleship.field, enemy_battleship.field)
+    assert stream.getvalue() == "\x1b[13;1H\x1b[J"
@@ -0,0 +1,95 @@
+import socket
+from contextlib import closing
+
+import pytest
+
+from battleship.battleship import MoveResult
+from battleship.commander import pipe_commanders
+from battleship.exceptions import ProtocolError
+from battleship.protocol import MessageType, pack_frame
+
+
+def test_pipelined_batch(channels):
+    first, second = channels
+    with first.batch():
+        first.send_coords(1, 2)
+        first.send_coords(3, 4)
+        first.send_move_result(MoveResult.DESTROYED)
+
+    assert second.receive_coords() == (1, 2)
+    assert second.receive_coords() == (3, 4)
+    assert second.receive_move_result() == MoveResult.DESTROYED
+
+
+def test_salvo(channels):
+    first, second = channels
+    first.send_salvo([(0, 0), (300, 9_999), (5, 5)])
+    assert second.receive_salvo() == [(0, 0), (300, 9_999), (5, 5)]
+
+    second.send_salvo_results([MoveResult.MISS, MoveResult.WIN])
+    assert first.receive_salvo_results() == [MoveResult.MISS, MoveResult.WIN]
+
+
+def test_fragmented_frame(channels):
+    first, second = channels
+    frame = pack_frame(MessageType.COORDS, b"\x01\x02")
+    for i in range(len(frame)):
+        first._send(frame[i:i+1])
+
+    assert second.receive_coords() == (1, 2)
+
+
+def test_unexpected_message(channels):
+    first, second = channels
+    first.send_coords(0, 0)
+
+    with pytest.raises(ProtocolError):
+        second.receive_move_result()
+
+
+def test_unsupported_version(channels):
+    first, second = channels
+    first._send(b"\xff\x01\x00\x00")
+
+    with pytest.raises(ProtocolError):
+        second.receive_coords()
+
+
+def test_closed_connection(channels):
+    first, second = channels
+    first._send(b"\x01")
+    first.close()
+
+    with pytest.raises(ConnectionError):
+        second.receive_coords()
+
+
+def test_pipe_commanders():
+    first, second = pipe_commanders()
+    with closing(first), closing(second):
+        first.send_salvo([(1, 2), (3, 4)])
+        assert second.receive_salvo() == [(1, 2), (3, 4)]
+        second.send_move_result(MoveResult.WIN)
+        assert first.receive_move_result() == MoveResult.WIN
+
+        first.set_timeout(0.01)
+        with pytest.raises(socket.timeout):
+            first.receive_coords()
+
+
+def test_salvo_size(channels):
+    first, second = channels
+    first.send_salvo_size(3)
+    assert second.receive_salvo_size() == 3
+
+    first.send_salvo_size(0)
+    with pytest.raises(ProtocolError):
+        second.receive_salvo_size()
+
+
+def test_background_keepalive(channels):
+    first, second = channels
+    with first.keepalive(interval=0.01):
+        assert second.receive_message_type() == MessageType.KEEPALIVE
+        first.send_coords(1, 2)
+    assert second.receive_coords() == (1, 2)
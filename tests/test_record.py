@@ -0,0 +1,128 @@
+from battleship.ai import DensityShooter, RandomShooter
+from battleship.battleship import Battleship, MoveResult
+from battleship.field import SparseField
+from battleship.record import (
+    TRAILER,
+    GameRecord,
+    GameRecorder,
+    iter_record_paths,
+    verify_record,
+    verify_records,
+)
+from battleship.selfplay import play_match, run_matches
+
+
+def test_seek_replay(tmp_path):
+    path = str(tmp_path / "game.bsr")
+    result = play_match(RandomShooter, RandomShooter, seed=1, record_path=path)
+
+    record = GameRecord(path)
+    turns = list(record.iter_turns())
+    assert len(turns) == sum(result.shots)
+    assert turns[-1].move_result.is_win
+    assert record._index
+
+    # переход к ходу по снимку совпадает с проигрыванием с начала
+    battleships = record.initial_battleships()
+    for turn in turns[:45]:
+        battleships[1 - turn.player].hit_cell(turn.cell_x, turn.cell_y)
+    seeked = record.state_at(45)
+    for (battleship, expected) in zip(seeked, battleships):
+        assert battleship.field == expected.field
+        assert battleship._ships_health == expected._ships_health
+    record.close()
+
+    assert verify_record(path)
+    # по записанному генератору матча ходы повторяются только той
+    # стратегией, которой игра была сыграна
+    assert verify_record(path, RandomShooter)
+    assert not verify_record(path, DensityShooter)
+
+
+def test_unfinished_record(tmp_path):
+    path = tmp_path / "game.bsr"
+    play_match(RandomShooter, RandomShooter, seed=2, record_path=str(path))
+    record = GameRecord(str(path))
+    expected = record.state_at(40)
+    turns = list(record.iter_turns())
+    index = record._index
+    record.close()
+
+    data = path.read_bytes()
+    # запись оборвалась до индекса
+    index_offset, _ = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+    path.write_bytes(data[:index_offset])
+
+    record = GameRecord(str(path))
+    assert record._index == index
+    for (battleship, other) in zip(record.state_at(40), expected):
+        assert battleship.field == other.field
+    record.close()
+
+    # запись оборвалась посреди хода
+    path.write_bytes(data[:index_offset - 3])
+    record = GameRecord(str(path))
+    assert list(record.iter_turns()) == turns[:-1]
+    record.close()
+
+    # запись оборвалась посреди снимка
+    snapshot_turn, snapshot_offset = index[-1]
+    path.write_bytes(data[:snapshot_offset + 20])
+    record = GameRecord(str(path))
+    assert record._index == index[:-1]
+    assert list(record.iter_turns()) == turns[:snapshot_turn]
+    record.close()
+
+
+def test_verify_archive(tmp_path):
+    run_matches(
+        10, RandomShooter, RandomShooter, seed=0, workers=1,
+        record_dir=str(tmp_path),
+    )
+    paths = list(iter_record_paths([str(tmp_path)]))
+    results = dict(verify_records(paths, RandomShooter, workers=2))
+    assert len(results) == 10
+    assert all(results.values())
+
+
+def test_wide_field(tmp_path):
+    path = str(tmp_path / "game.bsr")
+    battleships = (Battleship(100_000, 3), Battleship(100_000, 3))
+    for battleship in battleships:
+        battleship._place_ship(99_998, 1, 99_999, 1)
+    recorder = GameRecorder(path, battleships)
+    battleships[1].hit_cell(99_999, 1)
+    recorder.record_turn(0, 99_999, 1, MoveResult.DAMAGED)
+    recorder.close()
+
+    record = GameRecord(path)
+    assert (record.width, record.height) == (100_000, 3)
+    assert record.fleets[0] == [(99_998, 1, 99_999, 1)]
+    assert list(record.iter_turns()) == [(0, 99_999, 1, MoveResult.DAMAGED)]
+    record.close()
+    assert verify_record(path)
+
+
+def test_sparse_snapshot(tmp_path):
+    path = str(tmp_path / "game.bsr")
+    battleships = (Battleship(300, 300), Battleship(300, 300))
+    battleships[0]._place_ship(0, 0, 0, 0)
+    battleships[1]._place_ship(10, 10, 12, 10)
+    recorder = GameRecorder(path, battleships, snapshot_interval=2)
+    # поля игроков в снимке кодируются в разное число байт
+    for (player, cell_x, cell_y) in [(0, 5, 5), (0, 10, 10), (1, 200, 7)]:
+        move_result = battleships[1 - player].hit_cell(cell_x, cell_y)
+        recorder.record_turn(player, cell_x, cell_y, move_result)
+    recorder.close()
+
+    record = GameRecord(path)
+    assert record._index == [(2, record._index[0][1])]
+    for turn in (2, 3):
+        seeked = record.state_at(turn)
+        assert all(
+            isinstance(battleship.field, SparseField)
+            for battleship in seeked
+        )
+    for (battleship, expected) in zip(seeked, battleships):
+        assert battleship.field == expected.field
+    record.close()
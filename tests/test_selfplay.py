@@ -0,0 +1,43 @@
+import multiprocessing
+
+from battleship.ai import DensityShooter, RandomShooter
+from battleship.selfplay import play_match, play_pipe_match, run_matches
+
+
+def test_play_match():
+    result = play_match(RandomShooter, RandomShooter, seed=1)
+
+    assert result.winner in (0, 1)
+    # победитель должен попасть во все клетки всех кораблей
+    assert 20 <= result.shots[result.winner] <= 100
+    assert result == play_match(RandomShooter, RandomShooter, seed=1)
+
+
+def test_run_matches():
+    stats = run_matches(
+        10, RandomShooter, RandomShooter, seed=1, workers=2, chunk_size=3
+    )
+
+    assert stats.games == 10
+    assert sum(stats.wins) == 10
+    assert sum(stats.shots_to_win.values()) == 10
+    assert 20 <= stats.percentile(50) <= stats.percentile(99) <= 100
+
+
+def test_play_pipe_match():
+    result = play_pipe_match(RandomShooter, DensityShooter, seed=1)
+
+    assert result.winner in (0, 1)
+    assert 20 <= result.shots[result.winner] <= 100
+
+
+def test_play_pipe_match_spawn(monkeypatch):
+    # каналы передаются и процессу, запущенному без fork
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(multiprocessing, "Process", spawn.Process)
+    result = play_pipe_match(
+        RandomShooter, RandomShooter, width=6, height=6, fleet={2: 2}, seed=1
+    )
+
+    assert result.winner in (0, 1)
+    assert 4 <= result.shots[result.winner] <= 36
@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+from battleship.battleship import Battleship, MoveResult
+from battleship.commander import LobbyCommander, SpectatorCommander
+from battleship.protocol import MessageType
+from battleship.server import GameServer
+
+
+@pytest.fixture
+def server():
+    loop = asyncio.new_event_loop()
+    server = GameServer("127.0.0.1", 0)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def play(server, moves, results, start=None):
+    """Игра по заранее заданным ходам на поле с одним кораблём в (0, 0)."""
+    our_battleship = Battleship(width=3, height=3)
+    our_battleship._place_ship(0, 0, 0, 0)
+
+    with closing(LobbyCommander("127.0.0.1", server.port)) as client:
+        client.connect_to_server()
+        client.handshake()
+        turn = client.receive_turn()
+        if start is not None:
+            start.wait(5)
+        moves = iter(moves)
+        while True:
+            if turn:
+                client.send_coords(*next(moves))
+                move_result = client.receive_move_result()
+            else:
+                move_result = our_battleship.hit_cell(*client.receive_coords())
+                client.send_move_result(move_result)
+            results.append((turn, move_result))
+            if move_result.is_win:
+                return
+            if move_result.is_miss:
+                turn = not turn
+
+
+def start_match(server, first_moves, second_moves, start=None):
+    """Запуск матча двух игроков, каждый в своём потоке."""
+    first_results, second_results = [], []
+    first = threading.Thread(
+        target=play, args=(server, first_moves, first_results, start)
+    )
+    first.start()
+    wait_until(lambda: server._lobby)
+    second = threading.Thread(
+        target=play, args=(server, second_moves, second_results, start)
+    )
+    second.start()
+    return (first, second), (first_results, second_results)
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_lobby_match(server):
+    threads, (first_results, second_results) = start_match(
+        server, [(1, 1), (2, 2)], [(0, 0)]
+    )
+    for thread in threads:
+        thread.join(5)
+
+    assert first_results == [(True, MoveResult.MISS), (False, MoveResult.WIN)]
+    assert second_results == [(False, MoveResult.MISS), (True, MoveResult.WIN)]
+    wait_until(lambda: server.matches_played)
+    assert server.matches_played == 1
+
+
+def test_salvo_match(server):
+    def play_salvo(salvo, results):
+        our_battleship = Battleship(width=3, height=3)
+        our_battleship._place_ship(0, 0, 0, 0)
+        with closing(LobbyCommander("127.0.0.1", server.port)) as client:
+            client.connect_to_server()
+            client.handshake(salvo_size=2)
+            if client.receive_turn():
+                client.send_salvo(salvo)
+                results.extend(client.receive_salvo_results())
+            else:
+                cells = client.receive_salvo()
+                results.extend(our_battleship.hit_cells(cells))
+                client.send_salvo_results(results)
+
+    first_results, second_results = [], []
+    first = threading.Thread(
+        target=play_salvo, args=([(1, 1), (0, 0)], first_results)
+    )
+    first.start()
+    wait_until(lambda: server._lobby)
+    second = threading.Thread(target=play_salvo, args=([], second_results))
+    second.start()
+    for thread in (first, second):
+        thread.join(5)
+
+    assert first_results == [MoveResult.MISS, MoveResult.WIN]
+    assert second_results == first_results
+    wait_until(lambda: server.matches_played)
+    assert server.matches_played == 1
+
+
+def test_salvo_size_mismatch(server):
+    clients = []
+    for salvo_size in (1, 3):
+        client = LobbyCommander("127.0.0.1", server.port)
+        client.connect_to_server()
+        client._send_confirm()
+        client.send_salvo_size(salvo_size)
+        clients.append(client)
+
+    # игроки с разным количеством выстрелов за ход не подбираются друг
+    # другу в соперники
+    wait_until(lambda: sum(map(len, server._lobby.values())) == 2)
+    assert [len(server._lobby[size]) for size in (1, 3)] == [1, 1]
+    assert not server.broadcasts
+    for client in clients:
+        client.close()
+
+
+def test_spectator(server):
+    start = threading.Event()
+    threads, _ = start_match(server, [(1, 1), (2, 2)], [(0, 0)], start)
+    wait_until(lambda: 0 in server.broadcasts)
+
+    with closing(SpectatorCommander("127.0.0.1", server.port)) as spectator:
+        spectator.connect_to_server()
+        spectator.watch(0)
+        # снимки полей обоих игроков
+        players = {spectator.receive_update() for _ in range(2)}
+        assert players == {0, 1}
+
+        start.set()
+        assert spectator.receive_update() == 1
+        assert spectator.receive_update() == 0
+
+    for thread in threads:
+        thread.join(5)
+
+    first_field, second_field = (
+        replica.field for replica in spectator.replicas
+    )
+    assert second_field[1][1].is_miss
+    assert first_field[0][0].is_destroyed
+
+
+def test_keepalive_relay(server):
+    def play_keepalive(message_types):
+        with closing(LobbyCommander("127.0.0.1", server.port)) as client:
+            client.connect_to_server()
+            client.handshake()
+            if client.receive_turn():
+                client.send_keepalive()
+                client.send_coords(0, 0)
+                message_types.append(client.receive_message_type())
+                client.receive_move_result()
+            else:
+                message_types.append(client.receive_message_type())
+                message_types.append(client.receive_message_type())
+                client.receive_coords()
+                client.send_move_result(MoveResult.WIN)
+
+    first_types, second_types = [], []
+    first = threading.Thread(target=play_keepalive, args=(first_types,))
+    first.start()
+    wait_until(lambda: server._lobby)
+    second = threading.Thread(target=play_keepalive, args=(second_types,))
+    second.start()
+    for thread in (first, second):
+        thread.join(5)
+
+    assert first_types == [MessageType.MOVE_RESULT]
+    assert second_types == [MessageType.KEEPALIVE, MessageType.COORDS]
+
+
+def test_forfeit_relay(server):
+    def play_forfeit(forfeited):
+        with closing(LobbyCommander("127.0.0.1", server.port)) as client:
+            client.connect_to_server()
+            client.handshake()
+            if client.receive_turn():
+                client.send_forfeit()
+            else:
+                forfeited.append(client.peer_forfeited())
+
+    forfeited = []
+    first = threading.Thread(target=play_forfeit, args=(forfeited,))
+    first.start()
+    wait_until(lambda: server._lobby)
+    second = threading.Thread(target=play_forfeit, args=(forfeited,))
+    second.start()
+    for thread in (first, second):
+        thread.join(5)
+
+    assert forfeited == [True]
+    wait_until(lambda: server.matches_played)
+    assert server.matches_played == 1
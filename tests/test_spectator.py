@@ -0,0 +1,65 @@
+from battleship.battleship import MoveResult
+from battleship.spectator import HIGH_WATER, Broadcast
+
+
+class FakeTransport:
+    def __init__(self):
+        self.buffered = 0
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.frames = []
+
+    def write(self, data):
+        self.frames.append(data)
+
+    def is_closing(self):
+        return False
+
+
+def test_shared_frames():
+    broadcast = Broadcast(10, 10)
+    writers = [FakeWriter() for _ in range(3)]
+    for writer in writers:
+        broadcast.subscribe(writer)
+
+    broadcast.record_move(0, 1, 1, MoveResult.MISS)
+
+    frames = [writer.frames[-1] for writer in writers]
+    assert all(frame is frames[0] for frame in frames)
+
+
+def test_slow_spectator_resync():
+    broadcast = Broadcast(10, 10)
+    fast, slow = FakeWriter(), FakeWriter()
+    broadcast.subscribe(fast)
+    broadcast.subscribe(slow)
+    snapshot = slow.frames[0]
+
+    slow.transport.buffered = HIGH_WATER + 1
+    broadcast.record_move(0, 1, 1, MoveResult.MISS)
+    broadcast.record_move(0, 2, 2, MoveResult.MISS)
+    assert len(fast.frames) == 3
+    assert len(slow.frames) == 1
+
+    slow.transport.buffered = 0
+    broadcast.record_move(0, 3, 3, MoveResult.MISS)
+    assert len(fast.frames) == 4
+    assert len(slow.frames) == 2
+    # отставший зритель получает снимки полей вместо изменений
+    assert len(slow.frames[1]) == len(snapshot)
+
+
+def test_sparse_broadcast():
+    broadcast = Broadcast(300, 300)
+    writer = FakeWriter()
+    broadcast.subscribe(writer)
+
+    broadcast.record_move(1, 250, 250, MoveResult.MISS)
+    assert len(writer.frames) == 2
+    assert len(writer.frames[-1]) < 16
@@ -1,6 +1,7 @@
+import pickle
 from collections import defaultdict
 
-from battleship.battleship import Battleship
+from battleship.battleship import Battleship, MoveResult
 
 
 def test_hit_cell():
@@ -26,6 +27,18 @@ def test_hit_cell():
     assert move_result.is_win
 
 
+def test_hit_cell_twice():
+    battleship = Battleship(width=3, height=3)
+    battleship._place_ship(x0=0, y0=0, x1=1, y1=0)
+    battleship._place_ship(x0=2, y0=2, x1=2, y1=2)
+
+    assert battleship.hit_cell(cell_x=0, cell_y=0).is_damaged
+    assert battleship.hit_cell(cell_x=0, cell_y=0).is_damaged
+    assert battleship.hit_cell(cell_x=1, cell_y=0).is_destroyed
+    assert battleship.field[0][0].is_destroyed
+    assert battleship.hit_cell(cell_x=1, cell_y=0).is_destroyed
+    assert battleship.hit_cell(cell_x=2, cell_y=2).is_win
+
 
 def test_get_ship_points():
     battleship = Battleship(width=5, height=4)
@@ -61,3 +74,96 @@ def test_place_ships():
                     ships_count[ship_length] += 1
 
     assert ships_count == {4: 1, 3: 2, 2: 3, 1: 4}
+
+    # явно пустой флот не заменяется флотом по умолчанию
+    battleship = Battleship(width=10, height=10)
+    battleship.place_ships({})
+    assert battleship.ships == ()
+
+
+def test_large_board():
+    battleship = Battleship(width=10_000, height=10_000)
+    battleship.place_ships()
+    x0, y0, x1, y1 = battleship.ships[0]
+
+    for x in range(x0, x1+1):
+        for y in range(y0, y1+1):
+            move_result = battleship.hit_cell(x, y)
+    assert move_result.is_destroyed
+    assert battleship.field[y0][x0].is_destroyed
+    assert len(battleship.field.cells) == 20
+
+
+def test_hit_cells():
+    battleship = Battleship(width=4, height=3)
+    battleship._place_ship(x0=0, y0=0, x1=1, y1=0)
+    battleship._place_ship(x0=3, y0=2, x1=3, y1=2)
+
+    assert battleship.hit_cells([(0, 0), (3, 1), (1, 0), (3, 2)]) == [
+        MoveResult.DAMAGED,
+        MoveResult.MISS,
+        MoveResult.DESTROYED,
+        MoveResult.WIN,
+    ]
+
+    # после победы залп не продолжается
+    battleship = Battleship(width=4, height=3)
+    battleship._place_ship(x0=0, y0=0, x1=0, y1=0)
+    assert battleship.hit_cells([(0, 0), (2, 2)]) == [MoveResult.WIN]
+    assert not battleship.field[2][2].is_miss
+
+    enemy_battleship = Battleship(width=4, height=3)
+    enemy_battleship.update_cells(
+        [(0, 0), (1, 0)], [MoveResult.DAMAGED, MoveResult.DESTROYED]
+    )
+    assert enemy_battleship.field[0][0].is_destroyed
+
+
+def test_snapshot_and_undo():
+    battleship = Battleship(width=4, height=3, undo=True)
+    battleship._place_ship(x0=0, y0=0, x1=1, y1=0)
+    battleship._place_ship(x0=3, y0=2, x1=3, y1=2)
+    snapshot = battleship.snapshot()
+
+    battleship.hit_cell(0, 0)
+    clone = battleship.clone()
+    assert battleship.hit_cell(1, 0).is_destroyed
+
+    battleship.undo()
+    assert battleship.snapshot() == clone.snapshot()
+    assert battleship.hit_cell(1, 0).is_destroyed
+    assert not clone.field[0][1].is_damaged
+
+    battleship.restore(snapshot)
+    assert not battleship.field[0][0].is_damaged
+    assert battleship.hit_cell(0, 0).is_damaged
+
+
+def test_pickle():
+    battleship = Battleship(width=10, height=10)
+    battleship.place_ships()
+    x0, y0, _, _ = battleship.ships[0]
+    battleship.hit_cell(x0, y0)
+
+    # состояние занимает пару десятков байт, остальное - заголовок pickle
+    # и ссылка на класс
+    assert len(battleship.__getstate__()) < 40
+    data = pickle.dumps(battleship)
+    assert len(data) < 100
+    loaded = pickle.loads(data)
+    assert loaded.field == battleship.field
+    assert loaded.ships == battleship.ships
+    assert loaded._ships_health == battleship._ships_health
+
+
+def test_pickle_wide_field():
+    battleship = Battleship(width=100_000, height=3)
+    battleship._place_ship(99_997, 2, 99_999, 2)
+    battleship._place_ship(0, 0, 0, 2)
+
+    battleship.update_cell(5, 0, MoveResult.MISS)
+
+    loaded = pickle.loads(pickle.dumps(battleship))
+    assert loaded.ships == ((99_997, 2, 99_999, 2), (0, 0, 0, 2))
+    assert loaded.field == battleship.field
+    assert loaded.hit_cell(99_999, 2).is_damaged